@@ -0,0 +1,116 @@
+import time
+
+from django.contrib.auth.models import User, Permission
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from expirybot.apps.apiv1.views.get_unsubscribe_links_view import (
+    MAX_EMAIL_ADDRESSES
+)
+from expirybot.apps.blacklist.models import EmailAddress
+
+SINGLE_URL = '/apiv1/blacklist/unsubscribe-link/'
+BATCH_URL = '/apiv1/blacklist/unsubscribe-links/'
+
+
+class Command(BaseCommand):
+    help = ('Compares asking about --emails email addresses one request at a '
+            'time (GetUnsubscribeLinkView) against in batches '
+            '(GetUnsubscribeLinksView). The API user and email addresses are '
+            'created inside a transaction which is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--emails',
+            dest='num_emails',
+            type=int,
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        for line in benchmark_unsubscribe_links(options['num_emails']):
+            self.stdout.write(line)
+
+
+def benchmark_unsubscribe_links(num_emails):
+    # Half are known to us, and of those a third have unsubscribed
+    email_addresses = [
+        'user-{}@example.com'.format(i) for i in range(num_emails)
+    ]
+
+    with override_settings(ALLOWED_HOSTS=['testserver']), \
+            transaction.atomic():
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION='Token {}'.format(_make_api_token())
+        )
+
+        EmailAddress.objects.bulk_create([
+            EmailAddress(
+                email_address=email_address,
+                unsubscribe_datetime=timezone.now() if i % 3 == 0 else None,
+            )
+            for i, email_address in enumerate(email_addresses[::2])
+        ])
+
+        started = time.monotonic()
+        num_queries = sum(
+            _count_queries(client.get, SINGLE_URL,
+                           {'email_address': email_address})
+            for email_address in email_addresses
+        )
+
+        yield _report('one per request', started, num_queries, num_emails)
+
+        started = time.monotonic()
+        num_queries = sum(
+            _count_queries(client.post, BATCH_URL,
+                           {'email_addresses':
+                               email_addresses[i:i + MAX_EMAIL_ADDRESSES]},
+                           format='json')
+            for i in range(0, num_emails, MAX_EMAIL_ADDRESSES)
+        )
+
+        yield _report('batches of {}'.format(MAX_EMAIL_ADDRESSES),
+                      started, num_queries, num_emails)
+
+        transaction.set_rollback(True)
+
+
+def _make_api_token():
+    """
+    Authenticate with a token, as Expirybot 'classic' does, so that the
+    token and permission lookups are part of what's measured.
+    """
+    user = User.objects.create(username='benchmark-unsubscribe-links')
+    user.user_permissions.add(
+        Permission.objects.get(codename='make_unsubscribe_links')
+    )
+    return Token.objects.create(user=user).key
+
+
+def _count_queries(send, *args, **kwargs):
+    """
+    Make the request and return how many queries it made. The query log is
+    emptied first because Django only keeps the last 9000 queries.
+    """
+    reset_queries()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = send(*args, **kwargs)
+
+    assert response.status_code == 200, response.status_code
+    return len(queries)
+
+
+def _report(name, started, num_queries, num_emails):
+    seconds = time.monotonic() - started
+
+    return '{}: {:.0f} addresses/s, {:.2f} queries per address'.format(
+        name, num_emails / seconds, num_queries / num_emails
+    )
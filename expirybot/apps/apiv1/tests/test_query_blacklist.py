@@ -1,17 +1,21 @@
 from django.utils import timezone
 from django.contrib.auth.models import User, Permission
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from rest_framework.test import APISimpleTestCase
 
 from nose.tools import assert_equal
 
+from expirybot.apps.blacklist import domain_cache
 from expirybot.apps.blacklist.models import EmailAddress, BlacklistedDomain
 from expirybot.apps.users.models import (
     EmailAddressOwnershipProof, UserProfile
 )
 
 
-class TestGetUnsubscribeLinkView(APISimpleTestCase):
+class UnsubscribeLinkTestCase(APISimpleTestCase):
 
     @classmethod
     def setUpClass(cls):
@@ -58,13 +62,13 @@ class TestGetUnsubscribeLinkView(APISimpleTestCase):
             email_address='opt+out@example.com',
         )
 
-        cls.create_user(
+        cls.opt_in_user = cls.create_user(
             'opt+in',
             notify_expiry=True,
             connect_email=cls.subscriber_opt_in
         )
 
-        cls.create_user(
+        cls.opt_out_user = cls.create_user(
             'opt+out',
             notify_expiry=False,
             connect_email=cls.subscriber_opt_out
@@ -87,8 +91,14 @@ class TestGetUnsubscribeLinkView(APISimpleTestCase):
     @classmethod
     def tearDownClass(cls):
         cls.api_user.delete()
+        cls.opt_in_user.delete()
+        cls.opt_out_user.delete()
         EmailAddress.objects.all().delete()
         BlacklistedDomain.objects.all().delete()
+        domain_cache.invalidate()
+
+
+class TestGetUnsubscribeLinkView(UnsubscribeLinkTestCase):
 
     def test_ok_for_not_blacklisted_email(self):
         self._assert_not_blacklisted('ok@example.com')
@@ -146,3 +156,100 @@ class TestGetUnsubscribeLinkView(APISimpleTestCase):
             )
 
     # TODO: test format of unsubscribe URL and JWT
+
+
+class TestGetUnsubscribeLinksView(UnsubscribeLinkTestCase):
+    URL = '/apiv1/blacklist/unsubscribe-links/'
+
+    def test_requires_auth(self):
+        self.client.force_authenticate(None)
+
+        response = self.client.post(
+            self.URL, {'email_addresses': ['ok@example.com']}, format='json'
+        )
+        assert_equal(401, response.status_code)
+
+    def test_matches_single_address_view(self):
+        email_addresses = [
+            'ok@example.com',
+            'unknown@example.com',
+            'unsubscriber@example.com',
+            'complainer@example.com',
+            'bouncer@example.com',
+            'someone@blacklisted.com',
+            'opt+in@example.com',
+            'opt+out@example.com',
+        ]
+
+        results = self._post(email_addresses)
+
+        assert_equal(set(email_addresses), set(results.keys()))
+
+        for email_address in email_addresses:
+            single = self.client.get(
+                '/apiv1/blacklist/unsubscribe-link/',
+                {'email_address': email_address},
+            ).data
+
+            assert_equal(single['allow_email'],
+                         results[email_address]['allow_email'])
+
+            assert_equal(
+                single.get('unsubscribe_link', '')[0:30],
+                results[email_address].get('unsubscribe_link', '')[0:30]
+            )
+
+    def test_addresses_are_case_insensitive(self):
+        results = self._post(['OPT+OUT@example.com', 'Opt+In@Example.com'])
+
+        assert_equal({'allow_email': False}, results['OPT+OUT@example.com'])
+        assert_equal(
+            'http://testserver/u/login/?next=/u/settings/'
+            '&email=Opt+In@Example.com',
+            results['Opt+In@Example.com']['unsubscribe_link']
+        )
+
+    def test_invalid_address_doesnt_fail_batch(self):
+        results = self._post(['ok@example.com', 'not-an-email'])
+
+        assert_equal(True, results['ok@example.com']['allow_email'])
+        assert_equal(False, results['not-an-email']['allow_email'])
+        assert_equal('Invalid email address', results['not-an-email']['error'])
+
+    def test_missing_email_addresses_is_bad_request(self):
+        self.client.force_authenticate(self.api_user)
+
+        for data in ({}, {'email_addresses': 'ok@example.com'}):
+            response = self.client.post(self.URL, data, format='json')
+            assert_equal(400, response.status_code)
+
+    def test_body_which_isnt_an_object_is_bad_request(self):
+        self.client.force_authenticate(self.api_user)
+
+        for data in (['ok@example.com'], 'ok@example.com'):
+            response = self.client.post(self.URL, data, format='json')
+            assert_equal(400, response.status_code)
+
+    def test_queries_dont_grow_with_addresses(self):
+        self._post(['ok@example.com'])  # warm the domain and permission caches
+
+        with CaptureQueriesContext(connection) as few:
+            self._post(['ok@example.com', 'opt+in@example.com'])
+
+        with CaptureQueriesContext(connection) as many:
+            self._post([
+                'ok@example.com', 'opt+in@example.com', 'opt+out@example.com',
+                'bouncer@example.com', 'someone@blacklisted.com',
+                'unknown-1@example.com', 'unknown-2@example.com',
+            ])
+
+        assert_equal(len(few), len(many))
+
+    def _post(self, email_addresses):
+        self.client.force_authenticate(self.api_user)
+
+        response = self.client.post(
+            self.URL, {'email_addresses': email_addresses}, format='json'
+        )
+        assert_equal(200, response.status_code)
+        return response.data['results']
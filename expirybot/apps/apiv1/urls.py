@@ -1,7 +1,8 @@
 from django.conf.urls import url
 
 from .views import (
-    GetUnsubscribeLinkView, UpsertKeyUpdateView, MailgunWebhookBounce
+    GetUnsubscribeLinkView, GetUnsubscribeLinksView, UpsertKeyUpdateView,
+    MailgunWebhookBounce
 )
 
 urlpatterns = [
@@ -12,6 +13,12 @@ urlpatterns = [
         name='apiv1.blacklist.unsubscribe-link'
     ),
 
+    url(
+        r'blacklist/unsubscribe-links/$',
+        GetUnsubscribeLinksView.as_view(),
+        name='apiv1.blacklist.unsubscribe-links'
+    ),
+
     url(
         r'key-update-messages/$',
         UpsertKeyUpdateView.as_view(),
@@ -1,3 +1,4 @@
 from .get_unsubscribe_link_view import GetUnsubscribeLinkView
+from .get_unsubscribe_links_view import GetUnsubscribeLinksView
 from .mailgun_webhook_bounce import MailgunWebhookBounce
 from .upsert_key_update_view import UpsertKeyUpdateView
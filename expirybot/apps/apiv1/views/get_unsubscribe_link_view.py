@@ -9,7 +9,7 @@ from expirybot.apps.blacklist.models import EmailAddress
 from expirybot.libs.uid_parser import roughly_validate_email
 
 from expirybot.apps.blacklist.utils import (
-    allow_send_email, make_authenticated_unsubscribe_url
+    allow_send_email_for_object, make_authenticated_unsubscribe_url
 )
 from expirybot.apps.status.models import EventLatestOccurrence
 
@@ -66,45 +66,59 @@ class GetUnsubscribeLinkView(APIView):
 
         EventLatestOccurrence.record_event('api-call-unsubscribe-url')
 
-        if not allow_send_email(email_address):
-            return Response({'allow_email': False})
+        try:
+            email_address_obj = EmailAddress.objects.select_related(
+                'owner_proof__profile'
+            ).get(email_address=email_address)
 
-        profile = self._get_profile(email_address)
+        except EmailAddress.DoesNotExist:
+            email_address_obj = None
 
-        if not profile:
-            unsubscribe_all_link = request.build_absolute_uri(
-                make_authenticated_unsubscribe_url(email_address)
+        return Response(
+            make_unsubscribe_link_response(
+                request, email_address, email_address_obj
             )
+        )
 
-            return Response({
-                'allow_email': True,
-                'unsubscribe_link': unsubscribe_all_link
-            })
-
-        if profile.notify_expiry:
-            settings_link = request.build_absolute_uri(
-                reverse('users.login') + '?next={}&email={}'.format(
-                    reverse('users.settings'), email_address)
-            )
 
-            return Response({
-                'allow_email': True,
-                'unsubscribe_link': settings_link,
-                'unsubscribe_text': (
-                    "You're receiving this because you opted in to PGP expiry "
-                    "alerts at www.expirybot.com. Adjust your notification "
-                    "settings:"
-                )
-            })
-        else:
-            return Response({
-                'allow_email': False,
-            })
+def make_unsubscribe_link_response(request, email_address, email_address_obj):
+    """
+    The response data for `email_address` (see GetUnsubscribeLinkView) given
+    its EmailAddress, or None if there isn't one. Needs no queries if the
+    EmailAddress was fetched with select_related('owner_proof__profile')
+    """
 
-    def _get_profile(self, email_address):
-        try:
-            ob = EmailAddress.objects.get(email_address=email_address)
-        except EmailAddress.DoesNotExist:
-            return None
-        else:
-            return ob.owner_profile
+    if not allow_send_email_for_object(email_address, email_address_obj):
+        return {'allow_email': False}
+
+    profile = email_address_obj.owner_profile if email_address_obj else None
+
+    if not profile:
+        unsubscribe_all_link = request.build_absolute_uri(
+            make_authenticated_unsubscribe_url(email_address)
+        )
+
+        return {
+            'allow_email': True,
+            'unsubscribe_link': unsubscribe_all_link
+        }
+
+    if profile.notify_expiry:
+        settings_link = request.build_absolute_uri(
+            reverse('users.login') + '?next={}&email={}'.format(
+                reverse('users.settings'), email_address)
+        )
+
+        return {
+            'allow_email': True,
+            'unsubscribe_link': settings_link,
+            'unsubscribe_text': (
+                "You're receiving this because you opted in to PGP expiry "
+                "alerts at www.expirybot.com. Adjust your notification "
+                "settings:"
+            )
+        }
+    else:
+        return {
+            'allow_email': False,
+        }
@@ -0,0 +1,95 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from expirybot.apps.blacklist.models import EmailAddress
+from expirybot.libs.uid_parser import roughly_validate_email
+
+from expirybot.apps.status.models import EventLatestOccurrence
+
+from .get_unsubscribe_link_view import (
+    GetUnsubscribeLinkPermission, InvalidQueryError,
+    make_unsubscribe_link_response
+)
+
+import logging
+LOG = logging.getLogger(__name__)
+
+MAX_EMAIL_ADDRESSES = 1000
+
+
+class GetUnsubscribeLinksView(APIView):
+    """
+    The batch version of GetUnsubscribeLinkView, for Expirybot 'classic' to
+    ask about up to MAX_EMAIL_ADDRESSES addresses in one call:
+
+    POST {"email_addresses": ["a@example.com", "b@example.com"]}
+
+    -> {"results": {"a@example.com": {"allow_email": False}, ...}}
+
+    where each result is what GetUnsubscribeLinkView returns for that address.
+    Invalid addresses get {"allow_email": False, "error": "..."} rather than
+    failing the whole batch.
+
+    However many addresses there are, this takes one query for the addresses
+    and their profiles, plus one event write (the blacklisted domains come
+    from `domain_cache`).
+    """
+    permission_classes = (GetUnsubscribeLinkPermission,)
+
+    def post(self, request, *args, **kwargs):
+        email_addresses = self._get_email_addresses(request)
+
+        EventLatestOccurrence.record_event('api-call-unsubscribe-url')
+
+        valid = [e for e in email_addresses if roughly_validate_email(e)]
+
+        email_address_objs = {
+            obj.email_address.lower(): obj for obj in
+            EmailAddress.objects.filter(
+                email_address__in=valid
+            ).select_related('owner_proof__profile')
+        } if valid else {}
+
+        results = {}
+
+        for email_address in email_addresses:
+            if not roughly_validate_email(email_address):
+                LOG.warning('unsubscribe link for bad email `{}`'.format(
+                    email_address))
+
+                results[email_address] = {
+                    'allow_email': False,
+                    'error': 'Invalid email address',
+                }
+                continue
+
+            results[email_address] = make_unsubscribe_link_response(
+                request,
+                email_address,
+                email_address_objs.get(email_address.lower())
+            )
+
+        return Response({'results': results})
+
+    @staticmethod
+    def _get_email_addresses(request):
+        if not isinstance(request.data, dict):  # eg a JSON list or string
+            email_addresses = None
+        else:
+            email_addresses = request.data.get('email_addresses')
+
+        if not isinstance(email_addresses, list) or not all(
+                isinstance(e, str) for e in email_addresses):
+            LOG.warning('Got batch query with no email_addresses list')
+            raise InvalidQueryError(
+                'Missing email addresses, try '
+                '{"email_addresses": ["<...>", ...]}'
+            )
+
+        if len(email_addresses) > MAX_EMAIL_ADDRESSES:
+            raise InvalidQueryError(
+                'Too many email addresses, the maximum is {}'.format(
+                    MAX_EMAIL_ADDRESSES)
+            )
+
+        return email_addresses
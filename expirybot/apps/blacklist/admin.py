@@ -42,9 +42,12 @@ class EmailAddressAdmin(admin.ModelAdmin):
 class BlacklistedDomainAdmin(admin.ModelAdmin):
     list_display = (
         '__str__',
+        'match_type',
         'comment',
     )
 
+    list_filter = ('match_type',)
+
     search_fields = (
         'domain',
         'comment',
@@ -0,0 +1,76 @@
+"""
+An in-process copy of the BlacklistedDomain table, as a DomainTrie, so that
+checking an email address normally costs no domain queries.
+
+The copy is stamped with a version kept in Django's cache. Saving or deleting
+a BlacklistedDomain sets a new version (see the receivers in models.py), and
+a process reloads its copy when it sees the version change.
+
+So a change is seen straight away by the process which made it, eg the
+admin, but other processes only see the new version if they share the cache
+(see CACHE_DIR in settings). With the default per-process cache they don't,
+and see the change when their copy is next reloaded: within MAX_AGE_SECONDS.
+"""
+
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from expirybot.libs.domain_trie import DomainTrie
+
+VERSION_KEY = 'blacklisted-domains-version'
+
+MAX_AGE_SECONDS = 60
+
+_DOMAINS = None
+_VERSION = None
+_LOADED_AT = None
+_LOCK = threading.Lock()
+
+
+def get_blacklisted_domains():
+    """
+    Return a DomainTrie of the blacklisted domains: test a domain with `in`.
+    """
+    from .models import BlacklistedDomain
+
+    global _DOMAINS, _VERSION, _LOADED_AT
+
+    version = cache.get_or_set(VERSION_KEY, _new_version, None)
+
+    with _LOCK:
+        if _DOMAINS is not None and _VERSION == version and \
+                time.monotonic() - _LOADED_AT < MAX_AGE_SECONDS:
+            return _DOMAINS
+
+    domains = DomainTrie(
+        BlacklistedDomain.objects.values_list('domain', 'match_type')
+    )
+
+    with _LOCK:
+        _DOMAINS = domains
+        _VERSION = version
+        _LOADED_AT = time.monotonic()
+
+    return domains
+
+
+def invalidate(**kwargs):
+    """
+    post_save & post_delete receiver for BlacklistedDomain.
+    """
+    cache.set(VERSION_KEY, _new_version(), None)
+    clear_cache()
+
+
+def clear_cache():
+    global _DOMAINS
+
+    with _LOCK:
+        _DOMAINS = None
+
+
+def _new_version():
+    return uuid.uuid4().hex
@@ -9,8 +9,10 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.utils import timezone
 
+from expirybot.apps.blacklist.domain_cache import get_blacklisted_domains
 from expirybot.apps.blacklist.models import BlacklistedDomain
 from expirybot.apps.status.models import EventLatestOccurrence
+from expirybot.libs.domain_trie import SUBDOMAINS, WILDCARD
 
 LOG = logging.getLogger(__name__)
 
@@ -35,7 +37,16 @@ class Command(BaseCommand):
 
 
 def sync_mailgun_suppressions():
+    blacklisted = get_blacklisted_domains()
+
     for domain, reason_text in get_no_mx_domains():
+        covering_rule = blacklisted.match(domain)
+
+        if covering_rule is not None and covering_rule[0] != domain:
+            LOG.info('{} already blacklisted by {}'.format(
+                domain, covering_rule))
+            continue
+
         blacklist_domain(domain, reason_text)
 
     EventLatestOccurrence.record_event('sync-mailgun-no-mx-domains-succeeded')
@@ -97,9 +108,19 @@ def parse_mailgun_date(string):
 
 
 def blacklist_domain(domain, reason_text):
-    obj, new = BlacklistedDomain.objects.get_or_create(domain=domain)
+    obj, new = BlacklistedDomain.objects.get_or_create(
+        domain=domain,
+        defaults={'match_type': SUBDOMAINS}
+    )
     LOG.info("blacklist {}".format(domain))
 
-    if obj.comment is None:
+    if obj.match_type == WILDCARD:
+        # The row only blocked its subdomains, but the domain itself is dead
+        LOG.warning('Upgrading {} to block {} itself'.format(obj, domain))
+        obj.match_type = SUBDOMAINS
+        obj.comment = '\n\n'.join(c for c in (obj.comment, reason_text) if c)
+        obj.save()
+
+    elif obj.comment is None:
         obj.comment = reason_text
         obj.save()
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 16:40
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blacklist', '0005_make_email_address_case_insensitive'),
+    ]
+
+    operations = [
+        # Existing rows only ever blocked exactly their domain, so keep that
+        migrations.AddField(
+            model_name='blacklisteddomain',
+            name='match_type',
+            field=models.CharField(choices=[('subdomains', 'This domain and its subdomains'), ('exact', 'Only this domain'), ('wildcard', 'Only its subdomains, like *.example.com')], default='exact', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='blacklisteddomain',
+            name='match_type',
+            field=models.CharField(choices=[('subdomains', 'This domain and its subdomains'), ('exact', 'Only this domain'), ('wildcard', 'Only its subdomains, like *.example.com')], default='subdomains', max_length=10),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
 from django.contrib.postgres.fields import CIEmailField
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import post_delete, post_save
+
+from expirybot.libs.domain_trie import EXACT, SUBDOMAINS, WILDCARD
+
+from . import domain_cache
 
 
 class EmailAddress(models.Model):
@@ -53,11 +58,23 @@ class EmailAddress(models.Model):
 
 
 class BlacklistedDomain(models.Model):
+    MATCH_TYPE_CHOICES = (
+        (SUBDOMAINS, 'This domain and its subdomains'),
+        (EXACT, 'Only this domain'),
+        (WILDCARD, 'Only its subdomains, like *.example.com'),
+    )
+
     domain = models.CharField(
         primary_key=True,
         max_length=200
     )
 
+    match_type = models.CharField(
+        max_length=10,
+        choices=MATCH_TYPE_CHOICES,
+        default=SUBDOMAINS,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     updated_at = models.DateTimeField(auto_now=True)
@@ -65,4 +82,11 @@ class BlacklistedDomain(models.Model):
     comment = models.TextField(blank=True, null=True)
 
     def __str__(self):
+        if self.match_type == WILDCARD:
+            return '*.{}'.format(self.domain)
+
         return self.domain
+
+
+post_save.connect(domain_cache.invalidate, sender=BlacklistedDomain)
+post_delete.connect(domain_cache.invalidate, sender=BlacklistedDomain)
@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from nose.tools import assert_equal, assert_false
+
+from expirybot.apps.blacklist import domain_cache
+from expirybot.apps.blacklist.management.commands.sync_mailgun_no_mx_domains \
+    import blacklist_domain
+from expirybot.apps.blacklist.models import BlacklistedDomain
+from expirybot.apps.blacklist.utils import allow_send_email
+
+
+class TestBlacklistDomain(TestCase):
+    def tearDown(self):
+        domain_cache.invalidate()  # forget domains rolled back
+
+    def test_new_domain_blocks_subdomains(self):
+        blacklist_domain('dead.invalid', 'No MX')
+
+        obj = BlacklistedDomain.objects.get(domain='dead.invalid')
+        assert_equal('subdomains', obj.match_type)
+        assert_equal('No MX', obj.comment)
+
+    def test_dead_wildcard_domain_is_upgraded_to_subdomains(self):
+        BlacklistedDomain.objects.create(
+            domain='example.invalid', match_type='wildcard', comment='Old'
+        )
+
+        blacklist_domain('example.invalid', 'No MX')
+
+        obj = BlacklistedDomain.objects.get(domain='example.invalid')
+        assert_equal('subdomains', obj.match_type)
+        assert_equal('Old\n\nNo MX', obj.comment)
+        assert_false(allow_send_email('someone@example.invalid'))
+
+    def test_exact_rule_is_left_alone(self):
+        BlacklistedDomain.objects.create(
+            domain='exact.invalid', match_type='exact'
+        )
+
+        blacklist_domain('exact.invalid', 'No MX')
+
+        obj = BlacklistedDomain.objects.get(domain='exact.invalid')
+        assert_equal('exact', obj.match_type)
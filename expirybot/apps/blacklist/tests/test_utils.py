@@ -0,0 +1,98 @@
+import time
+
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal, assert_false, assert_true
+
+from expirybot.apps.blacklist import domain_cache
+from expirybot.apps.blacklist.models import BlacklistedDomain, EmailAddress
+from expirybot.apps.blacklist.utils import (
+    allow_send_email, allow_send_email_many
+)
+
+
+class TestAllowSendEmail(TestCase):
+    def setUp(self):
+        BlacklistedDomain.objects.create(domain='blacklisted.com')
+        EmailAddress.objects.create(
+            email_address='Bouncer@example.com',
+            last_bounce_datetime=timezone.now(),
+        )
+        EmailAddress.objects.create(email_address='ok@example.com')
+
+    def tearDown(self):
+        domain_cache.invalidate()  # forget domains rolled back
+
+    def test_allow_send_email_many(self):
+        assert_equal(
+            {
+                'ok@example.com': True,
+                'new@example.com': True,
+                'bouncer@example.com': False,
+                'someone@blacklisted.com': False,
+            },
+            allow_send_email_many([
+                'ok@example.com',
+                'new@example.com',
+                'bouncer@example.com',
+                'someone@blacklisted.com',
+            ])
+        )
+
+    def test_allow_send_email_many_makes_one_query(self):
+        allow_send_email('ok@example.com')  # load the domains
+
+        with self.assertNumQueries(1):
+            allow_send_email_many(
+                ['user-{}@example.com'.format(i) for i in range(100)]
+            )
+
+    def test_domains_are_not_queried_for_each_address(self):
+        allow_send_email('ok@example.com')  # load the domains
+
+        with self.assertNumQueries(1):
+            assert_false(allow_send_email('someone@blacklisted.com'))
+
+    def test_this_process_sees_new_domain_straight_away(self):
+        assert_true(allow_send_email('someone@newly-blacklisted.com'))
+
+        BlacklistedDomain.objects.create(domain='newly-blacklisted.com')
+
+        assert_false(allow_send_email('someone@newly-blacklisted.com'))
+
+    def test_other_processes_see_new_domain_within_max_age(self):
+        assert_true(allow_send_email('someone@newly-blacklisted.com'))
+
+        # bulk_create sends no post_save, like a save in another process
+        # with its own cache
+        BlacklistedDomain.objects.bulk_create([
+            BlacklistedDomain(domain='newly-blacklisted.com')
+        ])
+        assert_true(allow_send_email('someone@newly-blacklisted.com'))
+
+        later = time.monotonic() + domain_cache.MAX_AGE_SECONDS
+
+        with patch('time.monotonic', return_value=later):
+            assert_false(allow_send_email('someone@newly-blacklisted.com'))
+
+    def test_subdomains_of_blacklisted_domain_are_blocked(self):
+        assert_false(allow_send_email('someone@mail.blacklisted.com'))
+
+    def test_exact_rule_allows_subdomains(self):
+        BlacklistedDomain.objects.create(
+            domain='exact.com', match_type='exact'
+        )
+
+        assert_false(allow_send_email('someone@exact.com'))
+        assert_true(allow_send_email('someone@mail.exact.com'))
+
+    def test_wildcard_rule_blocks_only_subdomains(self):
+        BlacklistedDomain.objects.create(
+            domain='example.invalid', match_type='wildcard'
+        )
+
+        assert_true(allow_send_email('someone@example.invalid'))
+        assert_false(allow_send_email('someone@dead.example.invalid'))
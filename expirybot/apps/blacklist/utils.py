@@ -5,18 +5,60 @@ import datetime
 import logging
 import requests
 
+from django.db.models import Q
 from django.urls import reverse
 from django.conf import settings
 from django.utils import timezone
 
-from expirybot.apps.blacklist.models import EmailAddress, BlacklistedDomain
+from expirybot.apps.blacklist.domain_cache import get_blacklisted_domains
+from expirybot.apps.blacklist.models import EmailAddress
 
 LOG = logging.getLogger(__name__)
 
 
 def allow_send_email(email_address):
     return _allow_email_address(email_address) \
-            and _allow_domain(_get_domain(email_address))
+        and _allow_domain(_get_domain(email_address))
+
+
+def allow_send_email_many(email_addresses):
+    """
+    Like `allow_send_email` for many addresses at once, with one query for
+    the addresses (and the domains come from `domain_cache`).
+    Return {email_address: allowed}
+    """
+
+    email_addresses = list(email_addresses)
+
+    blocked_addresses = set(
+        email_address.lower() for email_address in
+        EmailAddress.objects.filter(
+            email_address__in=email_addresses
+        ).filter(
+            Q(unsubscribe_datetime__isnull=False)
+            | Q(complain_datetime__isnull=False)
+            | Q(last_bounce_datetime__isnull=False)
+        ).values_list('email_address', flat=True)
+    )
+
+    blocked_domains = get_blacklisted_domains()
+
+    return {
+        email_address: (
+            email_address.lower() not in blocked_addresses
+            and _get_domain(email_address) not in blocked_domains
+        )
+        for email_address in email_addresses
+    }
+
+
+def allow_send_email_for_object(email_address, obj):
+    """
+    Like `allow_send_email` for an EmailAddress the caller has already
+    fetched (or None if there isn't one), so needs no queries.
+    """
+    return (obj is None or _allow_email_address_obj(obj)) \
+        and _allow_domain(_get_domain(email_address))
 
 
 def make_authenticated_unsubscribe_url(email_address):
@@ -79,6 +121,10 @@ def _allow_email_address(email_address):
     except EmailAddress.DoesNotExist:
         return True
 
+    return _allow_email_address_obj(obj)
+
+
+def _allow_email_address_obj(obj):
     return all(
         x is None for x in (
             obj.unsubscribe_datetime,
@@ -93,9 +139,4 @@ def _get_domain(email):
 
 
 def _allow_domain(domain):
-    try:
-        BlacklistedDomain.objects.get(domain=domain)
-    except BlacklistedDomain.DoesNotExist:
-        return True
-    else:
-        return False
+    return domain not in get_blacklisted_domains()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.shortcuts import reverse
 
+from .helpers import broken_keys
 from .models import BrokenKey, KeyUpdate, PGPKey, Subkey, UID
 
 
@@ -21,6 +22,7 @@ class UIDInline(admin.TabularInline):
 
     fields = (
         'uid_string',
+        'email_address',
     )
 
     readonly_fields = fields
@@ -89,6 +91,9 @@ class PGPKeyAdmin(ReadonlyFieldsOnChangeMixin, admin.ModelAdmin):
         'revoked',
         'creation_date',
         'expiry_date',
+        'key_digest',
+        'sync_priority',
+        'sync_failures',
     )
     readonly_fields_on_change = ('fingerprint',)
 
@@ -96,7 +101,7 @@ class PGPKeyAdmin(ReadonlyFieldsOnChangeMixin, admin.ModelAdmin):
         return (
             '<a href="https://keyserver.paulfurley.com'
             '/pks/lookup?op=vindex&search={}">[keyserver]</a>').format(
-                    instance.zero_x_fingerprint
+                instance.zero_x_fingerprint
         )
 
     keyserver.allow_tags = True
@@ -119,14 +124,45 @@ class PGPKeyAdmin(ReadonlyFieldsOnChangeMixin, admin.ModelAdmin):
 class BrokenKeyAdmin(ReadonlyFieldsOnChangeMixin, admin.ModelAdmin):
     list_display = (
         '__str__',
-        'error_message',
+        'error_class',
+        'failure_count',
+        'last_failed_at',
         'next_retry_sync',
+        'error_message',
     )
 
-    readonly_fields = ('error_message',)
+    list_filter = (
+        'error_class',
+        'last_failed_at',
+    )
+
+    search_fields = (
+        'fingerprint',
+    )
+
+    readonly_fields = (
+        'error_message',
+        'error_class',
+        'failure_count',
+        'last_failed_at',
+    )
 
     readonly_fields_on_change = ('fingerprint',)
 
+    actions = ('retry_now',)
+
+    def retry_now(self, request, queryset):
+        fingerprints = list(queryset.values_list('fingerprint', flat=True))
+        broken_keys.retry_now(fingerprints)
+
+        self.message_user(
+            request,
+            '{} keys will be retried on the next sync'.format(
+                len(fingerprints))
+        )
+
+    retry_now.short_description = 'Retry now'
+
 
 @admin.register(KeyUpdate)
 class KeyUpdateAdmin(admin.ModelAdmin):
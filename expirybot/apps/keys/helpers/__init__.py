@@ -1,5 +1,8 @@
 from .exceptions import *
-from .get_key import get_key
-from .sync_key import sync_key, parse_ascii_armored_key
+from .get_key import get_key, get_key_stale_while_revalidate
+from .sync_key import (
+    sync_key, sync_many_keys, parse_ascii_armored_key,
+    parse_ascii_armored_keys, get_sync_stats
+)
 
 from .alerts import make_alerts, run_tests_task
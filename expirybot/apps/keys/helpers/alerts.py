@@ -251,9 +251,10 @@ def strong_cipher_prefs(parsed):
     return prefs[0] in [9, 8, 7]  # TODO: more sophisticated?
 
 
-def make_alerts(pgp_key):
+def make_alerts(pgp_key, today=None):
     """
-    Return a list of Alert objects for the given PGPKey
+    Return a list of Alert objects for the given PGPKey, as of `today`
+    (default: the real date)
     """
     alerts = []
 
@@ -261,16 +262,19 @@ def make_alerts(pgp_key):
         alerts.append(make_primary_key_revoked_alert(pgp_key))
 
     else:
-        alerts.append(make_primary_key_expiry_alert(pgp_key))
+        alerts.append(make_primary_key_expiry_alert(pgp_key, today))
 
     return list(filter(None, alerts))
 
 
-def make_primary_key_expiry_alert(pgp_key):
+def make_primary_key_expiry_alert(pgp_key, today=None):
     if pgp_key.expiry_date is None:
         return Alert('warning', "Primary key doesn't have an expiry date set")
 
-    days_till_expiry = pgp_key.days_till_expiry
+    if today is None:
+        days_till_expiry = pgp_key.days_till_expiry
+    else:
+        days_till_expiry = (pgp_key.expiry_date - today).days
     friendly_date = defaultfilters.date(pgp_key.expiry_date, 'DATE_FORMAT')
 
     if 3 < days_till_expiry <= 30:
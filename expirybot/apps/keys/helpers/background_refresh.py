@@ -0,0 +1,78 @@
+"""
+Re-sync stale keys in a background thread, so a page showing a key doesn't
+have to wait for the keyserver and gpg (stale-while-revalidate).
+
+Each process has a small thread pool, and a key already being refreshed by
+this process isn't queued again.
+"""
+
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.conf import settings
+from django.db import connection
+
+from .exceptions import NoSuchKeyError, KeyParsingError
+
+LOG = logging.getLogger(__name__)
+
+_EXECUTOR = None
+_REFRESHING = set()
+_LOCK = threading.Lock()
+
+
+def refresh_in_background(fingerprint, max_staleness=None):
+    """
+    Queue a re-sync of the key, unless one is already queued or running. By
+    the time it runs, another process may have synced the key, in which case
+    it's left alone unless it's older than max_staleness again.
+    """
+
+    with _LOCK:
+        if fingerprint in _REFRESHING:
+            return
+
+        _REFRESHING.add(fingerprint)
+        executor = _get_executor()
+
+    executor.submit(_refresh, fingerprint, max_staleness)
+
+
+def is_refreshing(fingerprint):
+    with _LOCK:
+        return fingerprint in _REFRESHING
+
+
+def _refresh(fingerprint, max_staleness):
+    from .get_key import get_key
+
+    try:
+        get_key(fingerprint, max_staleness)
+
+    except (NoSuchKeyError, KeyParsingError, requests.RequestException) as e:
+        LOG.warning('Background refresh of {} failed: {}'.format(
+            fingerprint, repr(e)))
+
+    except Exception as e:
+        LOG.exception(e)
+
+    finally:
+        with _LOCK:
+            _REFRESHING.discard(fingerprint)
+
+        connection.close()  # this thread's connection, see sync_keys
+
+
+def _get_executor():
+    global _EXECUTOR
+
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_REFRESH_WORKERS
+        )
+
+    return _EXECUTOR
@@ -0,0 +1,257 @@
+"""
+Remember keys which failed to sync, so they aren't retried on every pass (or,
+for keys which aren't on the keyserver, on every page view).
+
+Each class of failure backs off exponentially from its own base delay, with
+jitter so that keys which failed together aren't all retried together.
+
+`ignored_key_error` is called for every key synced, so each process caches
+what it has looked up (including that a key has no failures) for
+CACHE_SECONDS, in an LRU of CACHE_MAX_ENTRIES fingerprints. Failures and
+successes in this process update it immediately.
+
+Rows which haven't failed again for PURGE_AFTER are deleted, so fingerprints
+looked up once (eg a random key page) don't accumulate.
+"""
+
+import collections
+import datetime
+import logging
+import random
+import threading
+import time
+
+from django.utils import timezone
+
+from .exceptions import NoSuchKeyError, KeyParsingError
+
+LOG = logging.getLogger(__name__)
+
+# error class -> (first retry delay, maximum delay)
+BACKOFF = {
+    'broken': (datetime.timedelta(days=7), datetime.timedelta(days=28)),
+    'not-found': (datetime.timedelta(hours=1), datetime.timedelta(days=7)),
+    'keyserver-error': (
+        datetime.timedelta(minutes=5), datetime.timedelta(hours=6)
+    ),
+    'gpg-error': (datetime.timedelta(hours=1), datetime.timedelta(days=7)),
+}
+
+CACHE_SECONDS = 60
+
+CACHE_MAX_ENTRIES = 10000
+
+# Longer than any maximum delay in BACKOFF
+PURGE_AFTER = datetime.timedelta(days=56)
+
+PURGE_EVERY_N_WRITES = 100
+
+# fingerprint -> (expires at, (next_retry_sync, error_class) or None)
+_CACHE = collections.OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_MISSING = object()
+_WRITES_SINCE_PURGE = 0
+
+
+def ignored_key_error(fingerprint, now=None, use_cache=True):
+    """
+    If the key failed to sync and isn't due a retry yet, return the exception
+    to raise instead of trying again, otherwise None.
+
+    With `use_cache=False`, read the key's latest state from the database, eg
+    to see whether another process has just failed to sync it.
+    """
+
+    now = now or timezone.now()
+
+    entry = _cache_get(fingerprint) if use_cache else _MISSING
+
+    if entry is _MISSING:
+        entry = _load_entry(fingerprint)
+
+    if entry is None:
+        return None
+
+    next_retry_sync, error_class = entry
+
+    if now >= next_retry_sync:
+        return None
+
+    LOG.info('Key {} failed to sync ({}), ignoring until {}'.format(
+        fingerprint, error_class, next_retry_sync))
+
+    if error_class == 'not-found':
+        return NoSuchKeyError('Key not on keyserver, not retrying until '
+                              '{}'.format(next_retry_sync))
+
+    return KeyParsingError('Key marked as broken, not syncing.')
+
+
+def record_broken_key(fingerprint, error_message, error_class='broken',
+                      now=None):
+    from expirybot.apps.keys.models import BrokenKey
+
+    now = now or timezone.now()
+
+    try:
+        broken_key = BrokenKey.objects.get(fingerprint=fingerprint)
+
+    except BrokenKey.DoesNotExist:
+        broken_key = BrokenKey(fingerprint=fingerprint, failure_count=0)
+
+    if broken_key.error_class != error_class:
+        broken_key.failure_count = 0  # back off from scratch
+
+    broken_key.error_class = error_class
+    broken_key.error_message = error_message
+    broken_key.failure_count += 1
+    broken_key.last_failed_at = now
+    broken_key.next_retry_sync = now + calculate_retry_delay(
+        error_class, broken_key.failure_count
+    )
+    broken_key.save()
+
+    _cache_put(fingerprint, (broken_key.next_retry_sync, error_class))
+    _maybe_purge(now)
+
+
+def clear_broken_key(fingerprint):
+    """
+    Forget any failures once the key has synced.
+    """
+    from expirybot.apps.keys.models import BrokenKey
+
+    BrokenKey.objects.filter(fingerprint=fingerprint).delete()
+    _cache_put(fingerprint, None)
+
+
+def load_into_cache(fingerprints):
+    """
+    Look up many keys with one query, eg before syncing a batch of them.
+    """
+    from expirybot.apps.keys.models import BrokenKey
+
+    entries = {
+        fingerprint: (next_retry_sync, error_class)
+        for fingerprint, next_retry_sync, error_class
+        in BrokenKey.objects.filter(fingerprint__in=fingerprints).values_list(
+            'fingerprint', 'next_retry_sync', 'error_class'
+        )
+    }
+
+    for fingerprint in fingerprints:
+        _cache_put(fingerprint, entries.get(fingerprint))
+
+
+def purge_broken_keys(now=None):
+    """
+    Delete rows which haven't been retried for PURGE_AFTER.
+    """
+    from expirybot.apps.keys.models import BrokenKey
+
+    now = now or timezone.now()
+
+    num_deleted, _ = BrokenKey.objects.filter(
+        next_retry_sync__lt=now - PURGE_AFTER
+    ).delete()
+
+    if num_deleted:
+        LOG.info('Purged {} old broken keys'.format(num_deleted))
+
+    return num_deleted
+
+
+def retry_now(fingerprints, now=None):
+    """
+    Make the keys due a retry immediately, eg from the admin.
+    """
+    from expirybot.apps.keys.models import BrokenKey, PGPKey
+
+    now = now or timezone.now()
+
+    BrokenKey.objects.filter(fingerprint__in=fingerprints).update(
+        next_retry_sync=now
+    )
+    PGPKey.objects.filter(fingerprint__in=fingerprints).update(
+        next_sync_at=now
+    )
+
+    for fingerprint in fingerprints:
+        _cache_remove(fingerprint)
+
+
+def calculate_retry_delay(error_class, failure_count):
+    """
+    Double the delay with each failure, up to the maximum, then pick a random
+    delay between half that and all of it.
+    """
+
+    first_delay, max_delay = BACKOFF[error_class]
+    delay = min(first_delay * 2 ** min(failure_count - 1, 20), max_delay)
+
+    return delay / 2 + delay / 2 * random.random()
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def _cache_get(fingerprint):
+    with _CACHE_LOCK:
+        cached = _CACHE.get(fingerprint)
+
+        if cached is None:
+            return _MISSING
+
+        expires_at, entry = cached
+
+        if time.monotonic() >= expires_at:
+            del _CACHE[fingerprint]
+            return _MISSING
+
+        _CACHE.move_to_end(fingerprint)
+        return entry
+
+
+def _cache_put(fingerprint, entry):
+    with _CACHE_LOCK:
+        _CACHE[fingerprint] = (time.monotonic() + CACHE_SECONDS, entry)
+        _CACHE.move_to_end(fingerprint)
+
+        while len(_CACHE) > CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+
+
+def _cache_remove(fingerprint):
+    with _CACHE_LOCK:
+        _CACHE.pop(fingerprint, None)
+
+
+def _load_entry(fingerprint):
+    from expirybot.apps.keys.models import BrokenKey
+
+    try:
+        entry = BrokenKey.objects.values_list(
+            'next_retry_sync', 'error_class'
+        ).get(fingerprint=fingerprint)
+
+    except BrokenKey.DoesNotExist:
+        entry = None
+
+    _cache_put(fingerprint, entry)
+    return entry
+
+
+def _maybe_purge(now):
+    global _WRITES_SINCE_PURGE
+
+    with _CACHE_LOCK:
+        _WRITES_SINCE_PURGE += 1
+
+        if _WRITES_SINCE_PURGE < PURGE_EVERY_N_WRITES:
+            return
+
+        _WRITES_SINCE_PURGE = 0
+
+    purge_broken_keys(now)
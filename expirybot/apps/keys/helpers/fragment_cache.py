@@ -0,0 +1,74 @@
+"""
+Cache the rendered parts of the key page which only change when the key is
+synced: the alerts and the key itself, with its UIDs and subkeys.
+
+Fragments are keyed on the fingerprint, `last_synced` and the alerts, so a
+sync or a daily alert update (see `manage.py recompute_alerts`) makes a new
+entry, and there's nothing to invalidate: the old entry is never read again
+and expires (see settings.KEY_FRAGMENT_CACHE_SECONDS).
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+
+LOG = logging.getLogger(__name__)
+
+
+def render_key_fragments(key):
+    """
+    Return a dict of `alerts_html` and `key_html` for the key page.
+    """
+
+    cache_key = key_fragment_cache_key(key)
+    fragments = cache.get(cache_key)
+
+    if fragments is None:
+        fragments = _render_key_fragments(key)
+        cache.set(cache_key, fragments, settings.KEY_FRAGMENT_CACHE_SECONDS)
+
+    return fragments
+
+
+def key_fragment_cache_key(key):
+    return 'key-fragments:{}:{}:{}'.format(
+        key.fingerprint,
+        key.last_synced.isoformat() if key.last_synced else 'never',
+        alerts_digest(key.alerts_json)
+    )
+
+
+def alerts_digest(alerts_json):
+    """
+    The same whether alerts_json holds Alerts (just synced) or dicts (loaded
+    from the database).
+    """
+    from expirybot.apps.keys.models import CustomJSONEncoder
+
+    return hashlib.sha256(
+        json.dumps(
+            alerts_json, sort_keys=True, cls=CustomJSONEncoder
+        ).encode('utf-8')
+    ).hexdigest()[:16]
+
+
+def _render_key_fragments(key):
+    # One query each however many UIDs & subkeys the key has
+    prefetch_related_objects([key], 'uids_set__email_address', 'subkeys_set')
+
+    alerts = key.alerts
+
+    return {
+        'alerts_html': render_to_string('keys/partials/key_alerts.html', {
+            'danger_alerts': [a for a in alerts if a.severity == 'danger'],
+            'warning_alerts': [a for a in alerts if a.severity == 'warning'],
+        }),
+        'key_html': render_to_string('keys/partials/key_panel.html', {
+            'key': key,
+        }),
+    }
@@ -2,6 +2,9 @@ import datetime
 
 from django.utils import timezone
 
+from .background_refresh import is_refreshing, refresh_in_background
+from .broken_keys import ignored_key_error
+from .single_flight import single_flight
 from .sync_key import sync_key
 
 
@@ -10,32 +13,74 @@ def get_key(fingerprint, max_staleness=None):
     Return a reasonably up-to-date key, where max_staleness is a timedelta.
     If the fingerprint was invalid, the key won't be saved.
 
+    Only one caller at a time, across threads and processes, syncs a given
+    key: the others wait for it, then use the key it saved (or give up if it
+    failed) rather than downloading and parsing the key again.
+
     This can raise NoSuchKeyError and KeyParsingError
     """
 
-    from expirybot.apps.keys.models import PGPKey
-
     max_staleness = max_staleness or datetime.timedelta(hours=24)
 
-    def never_synced(key):
-        return key.last_synced is None
+    def needs_sync(key):
+        return key is None or key.last_synced is None or \
+            (timezone.now() - key.last_synced) > max_staleness
 
-    def is_stale(key):
-        return (timezone.now() - key.last_synced) > max_staleness
+    key = _get_saved_key(fingerprint)
 
-    try:
-        key = PGPKey.objects.get(fingerprint=fingerprint)
+    if not needs_sync(key):
+        return key
 
-    except PGPKey.DoesNotExist:
-        key = _create_key(fingerprint)
+    with single_flight('sync-key:{}'.format(fingerprint)) as waited:
+        if waited:  # someone else has probably just synced it
+            error = ignored_key_error(fingerprint, use_cache=False)
+            if error is not None:
+                raise error
+
+            key = _get_saved_key(fingerprint)
 
-    else:
-        if never_synced(key) or is_stale(key):
+            if not needs_sync(key):
+                return key
+
+        if key is None:
+            key = _create_key(fingerprint)
+
+        else:
             sync_key(key)
 
     return key
 
 
+def get_key_stale_while_revalidate(fingerprint, max_staleness):
+    """
+    Like `get_key`, except that a stale key is returned straight away and
+    re-synced in the background. Only a key we've never synced is fetched
+    while you wait.
+
+    Return (key, whether the key is being refreshed)
+    """
+
+    key = _get_saved_key(fingerprint)
+
+    if key is None or key.last_synced is None:
+        return get_key(fingerprint, max_staleness), False
+
+    if (timezone.now() - key.last_synced) > max_staleness:
+        refresh_in_background(fingerprint, max_staleness)
+
+    return key, is_refreshing(fingerprint)
+
+
+def _get_saved_key(fingerprint):
+    from expirybot.apps.keys.models import PGPKey
+
+    try:
+        return PGPKey.objects.get(fingerprint=fingerprint)
+
+    except PGPKey.DoesNotExist:
+        return None
+
+
 def _create_key(fingerprint):
     from expirybot.apps.keys.models import PGPKey
 
@@ -0,0 +1,199 @@
+"""
+A cache of parsed keys, keyed on the SHA-256 digest of the ASCII-armored key.
+
+Most keys downloaded by sync_keys haven't changed since last time, so there's
+no need to parse them again. There are two tiers:
+
+- an in-process LRU of `settings.PARSE_CACHE_LRU_SIZE` entries
+- the ParsedKeyCache table, trimmed to `settings.PARSE_CACHE_MAX_ROWS` rows,
+  least recently used first
+
+Parsing depends on the current time (an expired key has no valid UIDs) so an
+entry expires no later than the key does, and after MAX_AGE regardless.
+"""
+
+import collections
+import copy
+import datetime
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.utils import dateparse, timezone
+
+LOG = logging.getLogger(__name__)
+
+MAX_AGE = datetime.timedelta(days=30)
+
+# Don't write to the database every time an entry is used
+TOUCH_LAST_USED_EVERY = datetime.timedelta(days=1)
+
+EVICT_EVERY_N_WRITES = 100
+
+DATE_FIELDS = ('created_date', 'expiry_date')
+DATETIME_FIELDS = ('created_timestamp', 'expiry_timestamp')
+
+_LRU = collections.OrderedDict()  # digest -> (expires_at, parsed)
+_LRU_LOCK = threading.Lock()
+_WRITES_SINCE_EVICT = 0
+
+
+def key_digest(ascii_key_binary):
+    return hashlib.sha256(ascii_key_binary).hexdigest()
+
+
+def get_cached_parse(digest, now=None):
+    """
+    Return a copy of the cached parsed key, or None.
+    """
+    from expirybot.apps.keys.models import ParsedKeyCache
+
+    now = now or timezone.now()
+
+    with _LRU_LOCK:
+        entry = _LRU.get(digest)
+
+        if entry is not None:
+            _LRU.move_to_end(digest)
+
+    if entry is not None:
+        expires_at, parsed = entry
+
+        if now < expires_at:
+            return copy.deepcopy(parsed)
+
+        _lru_remove(digest)
+        return None
+
+    try:
+        row = ParsedKeyCache.objects.get(digest=digest, expires_at__gt=now)
+
+    except ParsedKeyCache.DoesNotExist:
+        return None
+
+    if row.last_used_at < now - TOUCH_LAST_USED_EVERY:
+        ParsedKeyCache.objects.filter(digest=digest).update(last_used_at=now)
+
+    parsed = _from_json(row.parsed_json)
+    _lru_put(digest, row.expires_at, parsed)
+
+    return copy.deepcopy(parsed)
+
+
+def cache_parse(digest, parsed, now=None):
+    from expirybot.apps.keys.models import ParsedKeyCache
+
+    global _WRITES_SINCE_EVICT
+
+    now = now or timezone.now()
+    expires_at = _calculate_expires_at(parsed, now)
+
+    _lru_put(digest, expires_at, copy.deepcopy(parsed))
+
+    ParsedKeyCache.objects.update_or_create(
+        digest=digest,
+        defaults={
+            'parsed_json': parsed,
+            'expires_at': expires_at,
+            'last_used_at': now,
+        }
+    )
+
+    with _LRU_LOCK:
+        _WRITES_SINCE_EVICT += 1
+        should_evict = _WRITES_SINCE_EVICT >= EVICT_EVERY_N_WRITES
+
+        if should_evict:
+            _WRITES_SINCE_EVICT = 0
+
+    if should_evict:
+        evict_parse_cache(now)
+
+
+def evict_parse_cache(now=None, max_rows=None):
+    """
+    Delete expired rows, then the least recently used rows beyond
+    `max_rows`. Return the number of rows deleted.
+    """
+    from expirybot.apps.keys.models import ParsedKeyCache
+
+    now = now or timezone.now()
+    max_rows = max_rows if max_rows is not None \
+        else settings.PARSE_CACHE_MAX_ROWS
+
+    num_deleted, _ = ParsedKeyCache.objects.filter(
+        expires_at__lte=now
+    ).delete()
+
+    cutoff = ParsedKeyCache.objects.order_by(
+        '-last_used_at'
+    ).values_list('last_used_at', flat=True)[max_rows:max_rows + 1]
+
+    if cutoff:
+        num_lru_deleted, _ = ParsedKeyCache.objects.filter(
+            last_used_at__lte=cutoff[0]
+        ).delete()
+
+        num_deleted += num_lru_deleted
+
+    if num_deleted:
+        LOG.info('Evicted {} rows from the parse cache'.format(num_deleted))
+
+    return num_deleted
+
+
+def clear_lru():
+    with _LRU_LOCK:
+        _LRU.clear()
+
+
+def _lru_put(digest, expires_at, parsed):
+    with _LRU_LOCK:
+        _LRU[digest] = (expires_at, parsed)
+        _LRU.move_to_end(digest)
+
+        while len(_LRU) > settings.PARSE_CACHE_LRU_SIZE:
+            _LRU.popitem(last=False)
+
+
+def _lru_remove(digest):
+    with _LRU_LOCK:
+        _LRU.pop(digest, None)
+
+
+def _calculate_expires_at(parsed, now):
+    expires_at = now + MAX_AGE
+    expiry_date = parsed.get('expiry_date')
+
+    if expiry_date is not None:
+        key_expires = datetime.datetime.combine(
+            expiry_date, datetime.time.min
+        ).replace(tzinfo=datetime.timezone.utc)
+
+        if now < key_expires:  # once expired, it can't expire again
+            expires_at = min(expires_at, key_expires)
+
+    return expires_at
+
+
+def _from_json(parsed_json):
+    """
+    JSON stores dates as strings: turn them back into dates and datetimes.
+    """
+
+    def convert(d):
+        for field in DATE_FIELDS:
+            if d.get(field):
+                d[field] = dateparse.parse_date(d[field])
+
+        for field in DATETIME_FIELDS:
+            if d.get(field):
+                d[field] = dateparse.parse_datetime(d[field])
+
+        return d
+
+    parsed = convert(dict(parsed_json))
+    parsed['subkeys'] = [convert(dict(s)) for s in parsed['subkeys']]
+
+    return parsed
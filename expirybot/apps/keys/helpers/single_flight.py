@@ -0,0 +1,66 @@
+"""
+Make sure only one thread, in any process, does a piece of work at a time,
+using a Postgres advisory lock. Eg when a link to a key is shared, many
+requests for the same stale key arrive together: one syncs it and the rest
+wait, then use what it wrote.
+"""
+
+import contextlib
+import hashlib
+import logging
+import time
+
+from django.db import connection
+
+LOG = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.1
+
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+@contextlib.contextmanager
+def single_flight(name, timeout=DEFAULT_TIMEOUT_SECONDS):
+    """
+    Hold the advisory lock for `name` while the block runs, waiting up to
+    `timeout` seconds for whoever has it. Yields True if we had to wait, in
+    which case the work has probably just been done.
+
+    If the lock can't be had in time, the block runs anyway.
+    """
+
+    lock_id = _lock_id(name)
+    deadline = time.monotonic() + timeout
+    waited = False
+
+    while not _try_lock(lock_id):
+        waited = True
+
+        if time.monotonic() >= deadline:
+            LOG.warning('Timed out waiting for lock on {}'.format(name))
+            yield waited
+            return
+
+        time.sleep(POLL_SECONDS)
+
+    try:
+        yield waited
+
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [lock_id])
+
+
+def _try_lock(lock_id):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [lock_id])
+        return cursor.fetchone()[0]
+
+
+def _lock_id(name):
+    """
+    Advisory locks are identified by a signed 64-bit integer.
+    """
+    return int.from_bytes(
+        hashlib.sha256(name.encode('utf-8')).digest()[:8], 'big', signed=True
+    )
@@ -1,22 +1,36 @@
-import datetime
+import collections
+import copy
 import logging
-import tempfile
+import threading
+import time
 
 import requests
 
-from django.db import transaction
-from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
 from expirybot.libs.gpg_wrapper import (
-    parse_public_key, GPGError, GPGFatalProblemWithKey
+    parse_public_key_binary, parse_public_keys, GPGError,
+    GPGFatalProblemWithKey
 )
+from expirybot.libs.keyserver_client import get_keyserver_client
+from expirybot.libs.uid_parser import parse_email_from_uid
 
 from .alerts import make_alerts
+from .broken_keys import (
+    clear_broken_key, ignored_key_error, load_into_cache, record_broken_key
+)
+from .parse_cache import key_digest, get_cached_parse, cache_parse
+from .sync_schedule import (
+    load_schedule_inputs, record_sync_failure, record_sync_success
+)
 from .exceptions import NoSuchKeyError, KeyParsingError
 
 LOG = logging.getLogger(__name__)
 
+_SYNC_STATS = collections.Counter()
+_SYNC_STATS_LOCK = threading.Lock()
+
 
 def sync_key(key, ascii_key=None):
     """
@@ -26,65 +40,215 @@ def sync_key(key, ascii_key=None):
     - `ascii_key` should be the OpenPGP ascii armored key, in binary. If not
                   given, the latest key is fetched from the keyserver
     """
-    if should_ignore_broken_key(key.fingerprint):
-        raise KeyParsingError('Key marked as broken, not syncing.')
+    error = ignored_key_error(key.fingerprint)
+
+    if error is not None:
+        raise error
 
     LOG.info('syncing {}'.format(key))
 
-    ascii_key_binary = ascii_key or download_ascii_armored_key(key.key_id)
+    try:
+        ascii_key_binary = ascii_key or download_ascii_armored_key(key.key_id)
+
+    except (NoSuchKeyError, requests.RequestException) as e:
+        record_failure(key, e, download_error_class(e))
+        raise
 
     assert isinstance(ascii_key_binary, bytes), type(ascii_key_binary)
 
+    digest = key_digest(ascii_key_binary)
+
+    if is_unchanged_since_last_sync(key, digest):
+        sync_unchanged_key(key)
+        return
+
     try:
         parsed = parse_ascii_armored_key(ascii_key_binary)
 
     except GPGError as e:
         LOG.exception(e)
+        record_failure(key, e, 'gpg-error')
         raise KeyParsingError
 
     except GPGFatalProblemWithKey as e:
         LOG.exception(e)
-        record_broken_key(key.fingerprint, repr(e))
+        record_failure(key, e, 'broken')
         raise KeyParsingError
 
     with transaction.atomic():
-        sync_key_from_parsed(key, parsed)
-        key.save()
+        original = snapshot_fields(key)
+        rows_written = sync_key_from_parsed(key, parsed)
+        key.key_digest = digest
+        rows_written += save_changed_fields(key, original)
 
+    clear_broken_key(key.fingerprint)
+    record_rows_written(rows_written)
 
-def should_ignore_broken_key(fingerprint):
-    from expirybot.apps.keys.models import BrokenKey
 
-    try:
-        key = BrokenKey.objects.get(fingerprint=fingerprint)
+def is_unchanged_since_last_sync(key, digest):
+    """
+    If the key is byte-for-byte identical to last time there's nothing to
+    parse, unless it has expired since (which invalidates its UIDs).
+    """
 
-    except BrokenKey.DoesNotExist:
-        result = False
+    if key.last_synced is None or key.key_digest != digest:
+        return False
 
-    else:
-        now = timezone.now()
-        result = now < key.next_retry_sync
+    today = timezone.now().date()
+    return key.expiry_date is None or key.expiry_date > today
+
+
+def sync_unchanged_key(key, schedule_inputs=None):
+    LOG.info('{} unchanged since last sync'.format(key))
+
+    sync_alerts(key, make_alerts(key))  # these depend on today's date
+    update_last_synced(key)
+    record_sync_success(key, inputs=schedule_inputs)
+    key.save(update_fields=[
+        'alerts_json', 'last_synced',
+        'sync_failures', 'sync_priority', 'next_sync_at',
+    ])
+
+    clear_broken_key(key.fingerprint)
+
+    record_rows_written(1)
 
-        if result:
-            LOG.info('Key {} marked as broken, ignoring until {}'.format(
-                fingerprint, key.next_retry_sync)
+
+def sync_many_keys(keys, deadline=None):
+    """
+    Like `sync_key` for many keys at once, parsing them together (see
+    `parse_ascii_armored_keys`). One bad key doesn't stop the others syncing.
+    Keys not started by the `deadline` (see `time.monotonic`) are left alone.
+
+    Return (number of keys attempted, dict of fingerprint -> exception for the
+    keys which failed).
+    """
+
+    failures = {}
+    keys_by_fingerprint = {}
+    ascii_keys = {}
+    num_attempted = 0
+
+    keys = list(keys)
+    load_into_cache([key.fingerprint for key in keys])
+    schedule_inputs = load_schedule_inputs([key.fingerprint for key in keys])
+
+    for key in keys:
+        if deadline is not None and time.monotonic() >= deadline:
+            LOG.info('Out of time, leaving {} keys'.format(
+                len(keys) - num_attempted))
+            break
+
+        num_attempted += 1
+        error = ignored_key_error(key.fingerprint)
+
+        if error is not None:
+            failures[key.fingerprint] = error
+            continue
+
+        try:
+            ascii_key_binary = download_ascii_armored_key(key.key_id)
+
+        except (NoSuchKeyError, requests.RequestException) as e:
+            failures[key.fingerprint] = e
+            record_failure(
+                key, e, download_error_class(e),
+                schedule_inputs[key.fingerprint]
+            )
+            continue
+
+        if is_unchanged_since_last_sync(key, key_digest(ascii_key_binary)):
+            sync_unchanged_key(key, schedule_inputs[key.fingerprint])
+            continue
+
+        ascii_keys[key.fingerprint] = ascii_key_binary
+        keys_by_fingerprint[key.fingerprint] = key
+
+    for fingerprint, parsed in parse_ascii_armored_keys(ascii_keys).items():
+        if isinstance(parsed, Exception):
+            failures[fingerprint] = KeyParsingError(repr(parsed))
+            record_failure(
+                keys_by_fingerprint[fingerprint], parsed,
+                'broken' if isinstance(parsed, GPGFatalProblemWithKey)
+                else 'gpg-error',
+                schedule_inputs[fingerprint]
             )
+            continue
 
-    return result
+        key = keys_by_fingerprint[fingerprint]
+        LOG.info('syncing {}'.format(key))
 
+        with transaction.atomic():
+            original = snapshot_fields(key)
+            rows_written = sync_key_from_parsed(
+                key, parsed, schedule_inputs[fingerprint]
+            )
+            key.key_digest = key_digest(ascii_keys[fingerprint])
+            rows_written += save_changed_fields(key, original)
 
-def record_broken_key(fingerprint, error_message):
-    from expirybot.apps.keys.models import BrokenKey
+        clear_broken_key(fingerprint)
+        record_rows_written(rows_written)
 
-    one_week = timezone.now() + datetime.timedelta(days=7)
+    return num_attempted, failures
 
-    BrokenKey.objects.update_or_create(
-        fingerprint=fingerprint,
-        defaults={
-            'next_retry_sync': one_week,
-            'error_message': error_message,
-        }
-    )
+
+def snapshot_fields(key):
+    return {
+        field.attname: copy.deepcopy(getattr(key, field.attname))
+        for field in key._meta.concrete_fields
+    }
+
+
+def save_changed_fields(key, original):
+    """
+    Save only the fields which differ from `original` (see `snapshot_fields`)
+    or the whole key if it's new. Return the number of rows written: 0 or 1.
+    """
+
+    if key._state.adding:
+        key.save()
+        return 1
+
+    changed = [
+        attname for attname, value in original.items()
+        if getattr(key, attname) != value
+    ]
+
+    if not changed:
+        return 0
+
+    key.save(update_fields=changed)
+    return 1
+
+
+def record_rows_written(rows_written):
+    with _SYNC_STATS_LOCK:
+        _SYNC_STATS['keys_synced'] += 1
+        _SYNC_STATS['rows_written'] += rows_written
+
+
+def get_sync_stats():
+    """
+    Keys synced and database rows (keys, UIDs, subkeys) written to sync them,
+    since the process started.
+    """
+    with _SYNC_STATS_LOCK:
+        return dict(_SYNC_STATS)
+
+
+def record_failure(key, error, error_class, schedule_inputs=None):
+    """
+    See broken_keys.py and sync_schedule.py
+    """
+    record_broken_key(key.fingerprint, repr(error), error_class)
+    record_sync_failure(key, inputs=schedule_inputs)
+
+
+def download_error_class(error):
+    if isinstance(error, NoSuchKeyError):
+        return 'not-found'
+
+    return 'keyserver-error'
 
 
 def download_ascii_armored_key(key_id):
@@ -92,11 +256,9 @@ def download_ascii_armored_key(key_id):
     Fetch the ASCII-armored key from the keyserver and return it as bytes.
     """
 
-    url = '{keyserver}/pks/lookup?op=get&options=mr&search={key_id}'.format(
-        keyserver=settings.KEYSERVER_URL, key_id=key_id)
+    response = get_keyserver_client().get_key(key_id)
 
     try:
-        response = requests.get(url, timeout=5)
         response.raise_for_status()
     except requests.HTTPError:
         if response.status_code == 404:
@@ -108,25 +270,119 @@ def download_ascii_armored_key(key_id):
 
 
 def parse_ascii_armored_key(ascii_key_binary):
-    with tempfile.NamedTemporaryFile('wb') as f:
-        f.write(ascii_key_binary)
-        f.flush()
+    """
+    Parse the key, or return the cached result if exactly the same key was
+    parsed recently. See parse_cache.py
+    """
+
+    digest = key_digest(ascii_key_binary)
+    parsed = get_cached_parse(digest)
+
+    if parsed is None:
+        parsed = parse_ascii_armored_key_uncached(ascii_key_binary)
+        cache_parse(digest, parsed)
+
+    return parsed
+
+
+def parse_ascii_armored_key_uncached(ascii_key_binary):
+    """
+    Parse the key with gpg, which verifies the self-signatures.
+    """
+    return parse_ascii_armored_key_with_gpg(ascii_key_binary)
+
+
+def parse_ascii_armored_keys(ascii_keys):
+    """
+    Parse a dict of fingerprint -> ASCII-armored key (bytes), as
+    `parse_ascii_armored_key` does for one key, except that every key needing
+    gpg is parsed in a single batch.
+
+    Return a dict of fingerprint -> parsed key, or the GPGError /
+    GPGFatalProblemWithKey for that key alone.
+    """
+
+    cached = {}
+    needs_gpg = {}
 
-        return parse_public_key(f.name)
+    for fingerprint, ascii_key_binary in ascii_keys.items():
+        parsed = get_cached_parse(key_digest(ascii_key_binary))
 
+        if parsed is not None:
+            cached[fingerprint] = parsed
+        else:
+            needs_gpg[fingerprint] = ascii_key_binary
+
+    results = parse_ascii_armored_keys_with_gpg(needs_gpg)
+
+    for fingerprint, parsed in results.items():
+        if isinstance(parsed, Exception):
+            continue
+
+        cache_parse(key_digest(ascii_keys[fingerprint]), parsed)
+
+    results.update(cached)
+    return results
+
+
+def parse_ascii_armored_keys_with_gpg(ascii_keys):
+    """
+    Parse many keys with one gpg import. If gpg fails for the whole batch,
+    for example refusing the import because one of the keys has no valid
+    user IDs, fall back to parsing the keys one at a time.
+    """
+
+    if not ascii_keys:
+        return {}
+
+    try:
+        return parse_public_keys(ascii_keys)
+
+    except (GPGError, GPGFatalProblemWithKey) as e:
+        LOG.exception(e)
+        LOG.warning('Batch parse failed, parsing {} keys one by one'.format(
+            len(ascii_keys)))
+
+    results = {}
+
+    for fingerprint, ascii_key_binary in ascii_keys.items():
+        try:
+            results[fingerprint] = parse_ascii_armored_key_with_gpg(
+                ascii_key_binary
+            )
+
+        except (GPGError, GPGFatalProblemWithKey) as e:
+            results[fingerprint] = e
+
+    return results
 
-def sync_key_from_parsed(key, parsed):
+
+def parse_ascii_armored_key_with_gpg(ascii_key_binary):
+    return parse_public_key_binary(ascii_key_binary)
+
+
+def sync_key_from_parsed(key, parsed, schedule_inputs=None):
+    """
+    Update `key` from the parsed key, writing any changed UIDs and subkeys.
+    The key itself isn't saved. Return the number of UID & subkey rows
+    written.
+
+    - `schedule_inputs`: see `sync_schedule.schedule_next_sync`
+    """
     sync_key_algorithm(key, parsed['algorithm'])
     sync_key_length_bits(key, parsed['length_bits'])
     sync_key_ecc_curve(key, parsed['ecc_curve'])
-    sync_key_uids(key, parsed['uids'])
-    sync_subkeys(key, translate_subkeys(parsed['subkeys']))
+    rows_written = sync_key_uids(key, parsed['uids'])
+    rows_written += sync_subkeys(key, translate_subkeys(parsed['subkeys']))
     sync_created_date(key, parsed['created_date'])
     sync_expiry_date(key, parsed['expiry_date'])
     sync_capabilities(key, parsed['capabilities'])
     sync_revoked(key, parsed['revoked'])
     sync_alerts(key, make_alerts(key))
     update_last_synced(key)
+    record_sync_success(key, inputs=schedule_inputs)
+
+    return rows_written
 
 
 def translate_subkeys(parser_subkeys):
@@ -174,39 +430,169 @@ def sync_key_ecc_curve(key, ecc_curve):
 
 
 def sync_key_uids(key, expected_uids):
+    """
+    Insert missing UIDs and delete those no longer on the key, leaving the
+    rest alone. Each UID is linked to the EmailAddress it contains. Return the
+    number of rows written.
+    """
     from expirybot.apps.keys.models import UID
 
-    current_uids = [u.uid_string for u in key.uids.all()]
+    matched, to_delete, to_create = match_rows(
+        key.uids.all(), expected_uids, lambda u: u.uid_string, lambda u: u
+    )
 
-    if current_uids != expected_uids:
-        LOG.info('Updating UIDs for {}'.format(key))
+    # eg UIDs synced before the email_address link was populated
+    to_link = [
+        uid for uid, _ in matched
+        if uid.email_address_id is None and parse_email_from_uid(
+            uid.uid_string)
+    ]
 
-        with transaction.atomic():
-            key.uids.all().delete()
+    if not (to_delete or to_create or to_link):
+        return 0
+
+    LOG.info('Updating UIDs for {}: +{} -{}'.format(
+        key, len(to_create), len(to_delete)))
+
+    with transaction.atomic():
+        email_addresses = get_or_create_email_addresses_for_uids(
+            to_create + [uid.uid_string for uid in to_link]
+        )
 
-            for uid_string in expected_uids:
-                LOG.debug(uid_string)
-                UID.objects.create(key=key, uid_string=uid_string)
+        delete_rows(UID, to_delete)
+
+        for uid in to_link:
+            uid.email_address_id = email_addresses[uid.uid_string]
+            uid.save(update_fields=['email_address'])
+
+        UID.objects.bulk_create([
+            UID(
+                key=key,
+                uid_string=uid_string,
+                email_address_id=email_addresses[uid_string]
+            ) for uid_string in to_create
+        ])
+
+    return len(to_delete) + len(to_create) + len(to_link)
+
+
+def get_or_create_email_addresses_for_uids(uid_strings):
+    """
+    Return a dict of UID string -> EmailAddress primary key (or None if the
+    UID has no email address), creating any missing EmailAddress rows in one
+    query.
+    """
+    from expirybot.apps.blacklist.models import EmailAddress
+
+    emails = {uid: parse_email_from_uid(uid) for uid in uid_strings}
+
+    # EmailAddress is case-insensitive, so match on lowercase
+    wanted = {e.lower(): e for e in emails.values() if e}
+
+    existing = {
+        e.lower(): e for e in EmailAddress.objects.filter(
+            email_address__in=list(wanted.values())
+        ).values_list('email_address', flat=True)
+    }
+
+    missing = [e for lower, e in wanted.items() if lower not in existing]
+
+    if missing:
+        try:
+            with transaction.atomic():
+                EmailAddress.objects.bulk_create(
+                    [EmailAddress(email_address=e) for e in missing]
+                )
+
+        except IntegrityError:  # someone else created one meanwhile
+            for e in missing:
+                obj, _ = EmailAddress.objects.get_or_create(email_address=e)
+                existing[e.lower()] = obj.email_address
+
+        else:
+            existing.update({e.lower(): e for e in missing})
+
+    return {
+        uid: existing[email.lower()] if email else None
+        for uid, email in emails.items()
+    }
 
 
 def sync_subkeys(key, expected_subkeys):
+    """
+    Reconcile subkeys by long ID: insert new subkeys, update those which have
+    changed and delete those which have gone. Return the number of rows
+    written.
+    """
     from expirybot.apps.keys.models import Subkey
 
-    current_subkeys = [s.to_dict() for s in key.subkeys.all()]
+    matched, to_delete, to_create = match_rows(
+        key.subkeys.all(), expected_subkeys,
+        lambda s: s.long_id, lambda s: s['long_id']
+    )
+
+    to_update = []
+
+    for subkey, subkey_data in matched:
+        changed = [
+            field for field, value in subkey_data.items()
+            if getattr(subkey, field) != value
+        ]
+
+        if changed:
+            for field in changed:
+                setattr(subkey, field, subkey_data[field])
 
-    if current_subkeys != expected_subkeys:
-        if len(current_subkeys):
-            LOG.info('Deleting & re-creating subkeys for {}: '
-                     'current: {} expected: {}'.format(
-                         key, current_subkeys, expected_subkeys))
+            to_update.append((subkey, changed))
+
+    if not (to_delete or to_create or to_update):
+        return 0
+
+    LOG.info('Updating subkeys for {}: +{} -{} ~{}'.format(
+        key, len(to_create), len(to_delete), len(to_update)))
+
+    with transaction.atomic():
+        delete_rows(Subkey, to_delete)
+
+        for subkey, changed in to_update:  # no bulk_update in Django 1.11
+            subkey.save(update_fields=changed)
+
+        Subkey.objects.bulk_create(
+            [Subkey(key=key, **subkey_data) for subkey_data in to_create]
+        )
+
+    return len(to_delete) + len(to_create) + len(to_update)
+
+
+def match_rows(rows, expected, row_id, expected_id):
+    """
+    Pair existing rows with expected items by ID, ignoring order. Return
+    ([(row, expected item)], rows to delete, expected items to create).
+    """
+
+    rows_by_id = collections.defaultdict(list)
+
+    for row in rows:
+        rows_by_id[row_id(row)].append(row)
+
+    matched = []
+    to_create = []
+
+    for item in expected:
+        matching_rows = rows_by_id.get(expected_id(item))
+
+        if matching_rows:
+            matched.append((matching_rows.pop(0), item))
         else:
-            LOG.info('Setting key.subkeys: {}'.format(expected_subkeys))
+            to_create.append(item)
+
+    to_delete = [row for rows in rows_by_id.values() for row in rows]
+    return matched, to_delete, to_create
 
-        with transaction.atomic():
-            key.subkeys.all().delete()
 
-            for subkey_data in expected_subkeys:
-                Subkey.objects.create(key=key, **subkey_data)
+def delete_rows(model, rows):
+    if rows:
+        model.objects.filter(pk__in=[row.pk for row in rows]).delete()
 
 
 def sync_created_date(key, date):
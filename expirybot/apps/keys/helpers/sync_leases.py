@@ -0,0 +1,97 @@
+"""
+Let any number of sync_keys processes, on any number of hosts, share the keys
+to sync without syncing the same key twice.
+
+Before syncing a batch, a process leases the keys by setting
+`lease_expires_at` and `leased_by`, using SELECT ... FOR UPDATE SKIP LOCKED so
+it never waits on another process claiming the same rows. Keys leased by
+someone else are skipped, as are keys synced by someone else since the list
+of keys to sync was loaded. If a process dies, its leases expire after
+LEASE_DURATION and the keys can be claimed again.
+"""
+
+import datetime
+import functools
+import logging
+import operator
+import os
+import socket
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+LOG = logging.getLogger(__name__)
+
+# Longer than script/sync_keys may run for
+LEASE_DURATION = datetime.timedelta(minutes=10)
+
+
+def worker_id():
+    return '{}:{}'.format(socket.gethostname(), os.getpid())[:100]
+
+
+def claim_keys(keys, now=None):
+    """
+    Lease whichever of `keys` aren't leased by another process and haven't
+    been synced since they were loaded. Return those keys, in order.
+    """
+    from expirybot.apps.keys.models import PGPKey
+
+    if not keys:
+        return []
+
+    now = now or timezone.now()
+    lease_expires_at = now + LEASE_DURATION
+    leased_by = worker_id()
+
+    unchanged_since_loaded = functools.reduce(operator.or_, (
+        Q(fingerprint=key.fingerprint, last_synced=key.last_synced)
+        if key.last_synced is not None
+        else Q(fingerprint=key.fingerprint, last_synced__isnull=True)
+        for key in keys
+    ))
+
+    with transaction.atomic():
+        fingerprints = set(
+            PGPKey.objects.filter(
+                unchanged_since_loaded
+            ).filter(
+                Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now)
+            ).select_for_update(
+                skip_locked=True
+            ).values_list('fingerprint', flat=True)
+        )
+
+        PGPKey.objects.filter(fingerprint__in=fingerprints).update(
+            lease_expires_at=lease_expires_at,
+            leased_by=leased_by,
+        )
+
+    claimed = [key for key in keys if key.fingerprint in fingerprints]
+
+    for key in claimed:
+        key.lease_expires_at = lease_expires_at
+        key.leased_by = leased_by
+
+    if len(claimed) < len(keys):
+        LOG.info('Skipping {} keys claimed or synced by another '
+                 'process'.format(len(keys) - len(claimed)))
+
+    return claimed
+
+
+def release_keys(keys):
+    from expirybot.apps.keys.models import PGPKey
+
+    PGPKey.objects.filter(
+        fingerprint__in=[key.fingerprint for key in keys],
+        leased_by=worker_id(),
+    ).update(
+        lease_expires_at=None,
+        leased_by='',
+    )
+
+    for key in keys:
+        key.lease_expires_at = None
+        key.leased_by = ''
@@ -0,0 +1,178 @@
+"""
+Decide how urgently each key needs re-syncing, and when.
+
+A key's priority comes from:
+
+- whether someone has proved they own it (KeyOwnershipProof)
+- how soon it expires, or how recently it expired
+- how often the keyserver reports it changing (KeyUpdate)
+- consecutive failed syncs
+
+Higher priority keys are re-synced more often, and sync_keys takes due keys
+in priority order. A key which fails to sync is retried with exponential
+backoff instead.
+"""
+
+import datetime
+
+from django.db.models import Count
+from django.utils import timezone
+
+OWNED_PRIORITY = 100
+
+# (expires within this many days, priority): the first that applies
+EXPIRY_PRIORITIES = (
+    (7, 50),
+    (30, 20),
+    (90, 5),
+)
+
+# Expired keys are still worth checking for a while, in case they're extended
+RECENTLY_EXPIRED_DAYS = 30
+
+UPDATES_WINDOW = datetime.timedelta(days=30)
+PRIORITY_PER_UPDATE = 2
+MAX_UPDATES_COUNTED = 10
+
+PRIORITY_PER_FAILURE = -10
+
+# (minimum priority, sync interval): the first that applies
+SYNC_INTERVALS = (
+    (100, datetime.timedelta(days=1)),
+    (50, datetime.timedelta(days=2)),
+    (20, datetime.timedelta(days=7)),
+)
+
+DEFAULT_SYNC_INTERVAL = datetime.timedelta(days=30)
+
+FAILURE_BACKOFF = datetime.timedelta(hours=1)  # doubles with each failure
+MAX_FAILURE_BACKOFF = datetime.timedelta(days=30)
+
+
+def schedule_next_sync(key, now=None, inputs=None):
+    """
+    Set `key.sync_priority` and `key.next_sync_at`. Doesn't save the key.
+
+    - `inputs` is (owned, number of recent updates) for the key, see
+      `load_schedule_inputs`. If not given they're queried for this key.
+    """
+
+    now = now or timezone.now()
+
+    if inputs is None:
+        inputs = (is_owned(key), count_recent_updates(key, now))
+
+    owned, num_recent_updates = inputs
+
+    key.sync_priority = calculate_priority(
+        key, now, owned, num_recent_updates
+    )
+    key.next_sync_at = now + calculate_sync_interval(
+        key.sync_priority, key.sync_failures
+    )
+
+
+def record_sync_success(key, now=None, inputs=None):
+    key.sync_failures = 0
+    schedule_next_sync(key, now, inputs)
+
+
+def record_sync_failure(key, now=None, inputs=None):
+    """
+    Count the failure and back off. Saves the key, unless it's new.
+    """
+
+    if key._state.adding:
+        return
+
+    key.sync_failures += 1
+    schedule_next_sync(key, now, inputs)
+    key.save(update_fields=['sync_failures', 'sync_priority', 'next_sync_at'])
+
+
+def load_schedule_inputs(fingerprints, now=None):
+    """
+    Return {fingerprint: (owned, number of recent updates)} for `inputs` of
+    `schedule_next_sync`, with two queries however many keys there are.
+    """
+    from expirybot.apps.keys.models import KeyUpdate
+    from expirybot.apps.users.models import KeyOwnershipProof
+
+    now = now or timezone.now()
+    fingerprints = list(fingerprints)
+
+    owned = set(
+        KeyOwnershipProof.objects.filter(
+            pgp_key_id__in=fingerprints
+        ).values_list('pgp_key_id', flat=True)
+    )
+
+    num_recent_updates = dict(
+        KeyUpdate.objects.filter(
+            fingerprint__in=fingerprints,
+            updated_at__gte=now - UPDATES_WINDOW
+        ).order_by().values('fingerprint').annotate(
+            num_updates=Count('sks_hash')
+        ).values_list('fingerprint', 'num_updates')
+    )
+
+    return {
+        fingerprint: (
+            fingerprint in owned, num_recent_updates.get(fingerprint, 0)
+        )
+        for fingerprint in fingerprints
+    }
+
+
+def calculate_priority(key, now, owned, num_recent_updates):
+    priority = 0
+
+    if owned:
+        priority += OWNED_PRIORITY
+
+    if key.expiry_date is not None:
+        days_till_expiry = (key.expiry_date - now.date()).days
+
+        if days_till_expiry >= -RECENTLY_EXPIRED_DAYS:
+            for max_days, expiry_priority in EXPIRY_PRIORITIES:
+                if days_till_expiry <= max_days:
+                    priority += expiry_priority
+                    break
+
+    priority += PRIORITY_PER_UPDATE * min(
+        num_recent_updates, MAX_UPDATES_COUNTED
+    )
+    priority += PRIORITY_PER_FAILURE * key.sync_failures
+
+    return priority
+
+
+def calculate_sync_interval(priority, sync_failures):
+    if sync_failures:
+        return min(
+            FAILURE_BACKOFF * 2 ** min(sync_failures - 1, 20),
+            MAX_FAILURE_BACKOFF
+        )
+
+    for min_priority, interval in SYNC_INTERVALS:
+        if priority >= min_priority:
+            return interval
+
+    return DEFAULT_SYNC_INTERVAL
+
+
+def is_owned(key):
+    from expirybot.apps.users.models import KeyOwnershipProof
+
+    return KeyOwnershipProof.objects.filter(
+        pgp_key_id=key.fingerprint
+    ).exists()
+
+
+def count_recent_updates(key, now):
+    from expirybot.apps.keys.models import KeyUpdate
+
+    return KeyUpdate.objects.filter(
+        fingerprint=key.fingerprint,
+        updated_at__gte=now - UPDATES_WINDOW
+    ).count()
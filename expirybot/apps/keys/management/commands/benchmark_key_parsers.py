@@ -0,0 +1,60 @@
+import io
+import timeit
+
+from os.path import dirname, join as pjoin
+
+from django.core.management.base import BaseCommand
+
+from expirybot.libs import gpg_wrapper
+from expirybot.libs.gpg_wrapper.gpg_wrapper import parse_list_keys
+from expirybot.libs.gpg_wrapper.colon_parser import parse_colon_key
+
+TEST_DATA_DIR = pjoin(dirname(gpg_wrapper.__file__), 'test_data')
+
+FIXTURES = [
+    # (human-readable output, the same key with --with-colons)
+    ('list_keys_01.txt', 'list_keys_01_colons.txt'),
+]
+
+
+class Command(BaseCommand):
+    help = ('Compares the speed of the human-readable and --with-colons '
+            'gpg --list-keys parsers on the gpg_wrapper test data')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            dest='iterations',
+            type=int,
+            default=10000,
+        )
+
+    def handle(self, *args, **options):
+        for line in benchmark_key_parsers(options['iterations']):
+            self.stdout.write(line)
+
+
+def benchmark_key_parsers(iterations):
+    for human_filename, colons_filename in FIXTURES:
+        human = _load(human_filename)
+        colons = _load(colons_filename)
+
+        human_seconds = _best_of_3(lambda: parse_list_keys(human), iterations)
+        colons_seconds = _best_of_3(lambda: parse_colon_key(colons),
+                                    iterations)
+
+        yield ('{}: human-readable {:.1f}us/key, --with-colons {:.1f}us/key '
+               '({:.1f}x faster)'.format(
+                   human_filename,
+                   human_seconds / iterations * 1e6,
+                   colons_seconds / iterations * 1e6,
+                   human_seconds / colons_seconds))
+
+
+def _load(filename):
+    with io.open(pjoin(TEST_DATA_DIR, filename), 'r') as f:
+        return f.read()
+
+
+def _best_of_3(func, iterations):
+    return min(timeit.repeat(func, number=iterations, repeat=3))
@@ -0,0 +1,123 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from expirybot.apps.keys.models import PGPKey
+from expirybot.apps.users.models import SearchResultForKeysByEmail
+
+from .sync_keys import get_new_fingerprints_from_search_results
+
+FINGERPRINTS_PER_SEARCH_RESULT = 10
+MISSING_EVERY = 100  # 1 in 100 fingerprints has no PGPKey
+INSERT_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = ('Compares finding new fingerprints from search results in '
+            'Python (the old way) and in the database. Creates --keys PGPKey '
+            'rows inside a transaction which is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keys',
+            dest='num_keys',
+            type=int,
+            default=1000000,
+        )
+
+    def handle(self, *args, **options):
+        for line in benchmark_new_fingerprints(options['num_keys']):
+            self.stdout.write(line)
+
+
+def benchmark_new_fingerprints(num_keys):
+    with transaction.atomic():
+        yield 'Creating {} keys...'.format(num_keys)
+        num_missing = _create_fixture(num_keys)
+
+        for name, func in [
+                ('python', _get_new_fingerprints_in_python),
+                ('database', get_new_fingerprints_from_search_results)]:
+
+            seconds, peak_bytes, result = _measure(func)
+            assert len(result) == num_missing, (len(result), num_missing)
+
+            yield '{}: {:.2f}s, peak Python memory {:.1f}MB'.format(
+                name, seconds, peak_bytes / 1e6)
+
+        transaction.set_rollback(True)
+
+
+def _create_fixture(num_keys):
+    """
+    Create `num_keys` PGPKeys, and search results listing those fingerprints
+    plus one missing fingerprint per MISSING_EVERY. Return the number missing.
+    """
+
+    for start in range(0, num_keys, INSERT_BATCH_SIZE):
+        PGPKey.objects.bulk_create([
+            PGPKey(fingerprint=_fingerprint(i))
+            for i in range(start, min(num_keys, start + INSERT_BATCH_SIZE))
+        ])
+
+    now = timezone.now()
+    fingerprints = (
+        _fingerprint(i if i % MISSING_EVERY else num_keys + i)
+        for i in range(num_keys)
+    )
+
+    search_results = []
+    num_missing = 0
+
+    for i in range(0, num_keys, FINGERPRINTS_PER_SEARCH_RESULT):
+        chunk = [
+            next(fingerprints)
+            for _ in range(min(FINGERPRINTS_PER_SEARCH_RESULT, num_keys - i))
+        ]
+        num_missing += sum(1 for f in chunk if int(f, 16) >= num_keys)
+
+        search_results.append(
+            SearchResultForKeysByEmail(datetime=now, key_fingerprints=chunk)
+        )
+
+        if len(search_results) == INSERT_BATCH_SIZE:
+            SearchResultForKeysByEmail.objects.bulk_create(search_results)
+            search_results = []
+
+    SearchResultForKeysByEmail.objects.bulk_create(search_results)
+
+    return num_missing
+
+
+def _get_new_fingerprints_in_python():
+    already_got_fingerprints = set(
+        p.fingerprint for p in PGPKey.objects.all()
+    )
+    found_fingerprints = set()
+
+    for search_result in SearchResultForKeysByEmail.objects.all():
+        found_fingerprints.update(search_result.key_fingerprints)
+
+    return found_fingerprints - already_got_fingerprints
+
+
+def _measure(func):
+    tracemalloc.start()
+    started = time.monotonic()
+
+    try:
+        result = func()
+        seconds = time.monotonic() - started
+        _, peak_bytes = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    return seconds, peak_bytes, result
+
+
+def _fingerprint(i):
+    return '{:040X}'.format(i)
@@ -0,0 +1,93 @@
+import datetime
+import json
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from expirybot.apps.keys.helpers import make_alerts
+from expirybot.apps.keys.models import CustomJSONEncoder, PGPKey
+from expirybot.apps.status.models import EventLatestOccurrence
+
+LOG = logging.getLogger(__name__)
+
+# Expiry alerts start this many days before expiry (see make_alerts) and
+# change every day after that, so only these keys need checking.
+ALERTS_START_DAYS_BEFORE_EXPIRY = 30
+
+BATCH_SIZE = 1000
+
+UPDATE_ALERTS_SQL = """
+UPDATE keys_pgpkey
+SET alerts_json = new_alerts.alerts_json::jsonb
+FROM (VALUES {values}) AS new_alerts (fingerprint, alerts_json)
+WHERE keys_pgpkey.fingerprint = new_alerts.fingerprint
+"""
+
+
+class Command(BaseCommand):
+    help = ("Updates keys' alerts for today's date, eg 'expires in 3 days', "
+            "without re-syncing them from the keyserver")
+
+    def handle(self, *args, **options):
+        recompute_alerts()
+
+
+def recompute_alerts(today=None):
+    """
+    Work out the alerts for every key which could have them change with the
+    date, and write those which have, a batch at a time. Return the number
+    of keys updated.
+    """
+
+    today = today or datetime.date.today()
+
+    keys = PGPKey.objects.filter(
+        revoked=False,
+        expiry_date__lte=today + datetime.timedelta(
+            days=ALERTS_START_DAYS_BEFORE_EXPIRY + 1
+        ),
+    ).only(
+        'fingerprint', 'expiry_date', 'revoked', 'alerts_json'
+    ).order_by()
+
+    changed = []
+    num_updated = 0
+
+    for key in keys.iterator():
+        alerts_json = [alert._json() for alert in make_alerts(key, today)]
+
+        if alerts_json != key.alerts_json:
+            changed.append((key.fingerprint, alerts_json))
+
+        if len(changed) >= BATCH_SIZE:
+            num_updated += update_alerts(changed)
+            changed = []
+
+    num_updated += update_alerts(changed)
+
+    LOG.info('Updated alerts for {} keys'.format(num_updated))
+    EventLatestOccurrence.record_event('recompute-alerts-succeeded')
+
+    return num_updated
+
+
+def update_alerts(changed):
+    """
+    Set alerts_json for many keys in one UPDATE ... FROM (VALUES ...)
+    """
+
+    if not changed:
+        return 0
+
+    values = ', '.join(['(%s, %s)'] * len(changed))
+    params = []
+
+    for fingerprint, alerts_json in changed:
+        params.extend([
+            fingerprint, json.dumps(alerts_json, cls=CustomJSONEncoder)
+        ])
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(UPDATE_ALERTS_SQL.format(values=values), params)
+        return cursor.rowcount
@@ -1,11 +1,26 @@
 import datetime
 import logging
+import math
+import time
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection, IntegrityError
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 
-from expirybot.apps.keys.helpers import get_key, sync_key
-from expirybot.apps.keys.models import PGPKey
+from expirybot.apps.keys.helpers import (
+    get_key, get_sync_stats, sync_many_keys, NoSuchKeyError, KeyParsingError
+)
+from expirybot.apps.keys.helpers.sync_leases import claim_keys, release_keys
+from expirybot.apps.keys.helpers.sync_schedule import DEFAULT_SYNC_INTERVAL
+from expirybot.libs.gpg_wrapper import get_worker_pool, configure_worker_pool
+from expirybot.libs.keyserver_client import get_keyserver_client
+from expirybot.apps.keys.models import KeyUpdate, PGPKey
 
 from expirybot.apps.users.models import SearchResultForKeysByEmail
 from expirybot.apps.status.models import EventLatestOccurrence
@@ -22,8 +37,24 @@ ALGOS = {
     19: 'ECDSA',
 }
 
+# With --full-sweep every key not synced for this long is re-synced, as all
+# keys were before they were scheduled. Otherwise each key is re-synced on
+# its own schedule (see helpers/sync_schedule.py), and a key which hasn't been
+# scheduled yet is treated as the lowest priority: due after
+# DEFAULT_SYNC_INTERVAL.
 SYNC_EVERY = datetime.timedelta(days=7)
 
+SYNC_BATCH_SIZE = 100  # keys parsed per gpg invocation
+
+NEW_FINGERPRINTS_SQL = """
+SELECT DISTINCT f.fingerprint
+FROM {search_results} r
+CROSS JOIN LATERAL unnest(r.key_fingerprints) AS f(fingerprint)
+WHERE NOT EXISTS (
+    SELECT 1 FROM {pgp_keys} k WHERE k.fingerprint = f.fingerprint
+)
+"""
+
 
 class Command(BaseCommand):
     help = ('Updates keys from the keyserver')
@@ -36,51 +67,232 @@ class Command(BaseCommand):
             action='store_true',
         )
 
+        parser.add_argument(
+            '--full-sweep',
+            dest='full_sweep',
+            default=False,
+            action='store_true',
+            help=('Re-sync every key not synced in the last {} days, not '
+                  'just those with a KeyUpdate'.format(SYNC_EVERY.days)),
+        )
+
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=settings.SYNC_KEYS_WORKERS,
+            help='Number of keys to download & parse concurrently',
+        )
+
+        parser.add_argument(
+            '--time-budget',
+            dest='time_budget',
+            type=int,
+            default=settings.SYNC_KEYS_TIME_BUDGET_SECONDS,
+            help=('Stop starting new work after this many seconds, leaving '
+                  'the least urgent keys for the next run. 0 means no limit'),
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(str(options))
-        sync_keys(options['force'])
+        sync_keys(
+            options['force'], options['workers'], options['full_sweep'],
+            options['time_budget']
+        )
+
 
+def sync_keys(force, workers=1, full_sweep=False, time_budget=None):
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget else None
+    now = timezone.now()
 
-def sync_keys(force):
     new_fingerprints = get_new_fingerprints_from_search_results()
     keys_never_synced = get_keys_never_synced()
 
     if force:
-        stale_keys = get_stale_keys(timezone.now())
+        stale_keys = get_stale_keys(now)
+    elif full_sweep:
+        stale_keys = get_stale_keys(now - SYNC_EVERY)
     else:
-        stale_keys = get_stale_keys(timezone.now() - SYNC_EVERY)
+        stale_keys = get_keys_due_for_sync(now, now - DEFAULT_SYNC_INTERVAL)
 
     LOG.info("{} new fingerprints, {} keys never synced, {} stale keys".format(
         len(new_fingerprints), len(keys_never_synced), len(stale_keys)))
 
-    for fingerprint in new_fingerprints:
-        get_key(fingerprint)
+    keys_to_sync = list(keys_never_synced) + list(stale_keys)
+
+    if workers > 1:
+        tasks = make_tasks(new_fingerprints, keys_to_sync, max(1, min(
+            SYNC_BATCH_SIZE, math.ceil(len(keys_to_sync) / workers)
+        )))
+        num_keys, num_failed, num_left = sync_concurrently(
+            tasks, workers, deadline
+        )
+    else:
+        tasks = make_tasks(new_fingerprints, keys_to_sync, SYNC_BATCH_SIZE)
+        num_keys, num_failed, num_left = sync_sequentially(tasks, deadline)
+
+    pool = get_worker_pool()
+    if pool is not None:
+        LOG.info("gpg worker pool stats: {}".format(pool.stats))
 
-    for key in keys_never_synced:
-        sync_key(key)
+    LOG.info("keyserver client stats: {}".format(
+        get_keyserver_client().stats))
 
-    for key in stale_keys:
-        sync_key(key)
+    LOG.info("database writes: {}".format(get_sync_stats()))
+
+    if num_left:
+        LOG.warning("Out of time: left {} keys for the next run".format(
+            num_left))
+
+    num_claimed_elsewhere = \
+        len(new_fingerprints) + len(keys_to_sync) - num_keys - num_left
+
+    if num_claimed_elsewhere:
+        LOG.info("{} keys were synced by another process".format(
+            num_claimed_elsewhere))
+
+    seconds = time.monotonic() - started
+
+    LOG.info("Synced {} keys ({} failed) in {:.1f}s with {} worker(s): "
+             "{:.1f} keys/second".format(
+                 num_keys, num_failed, seconds, workers,
+                 num_keys / seconds if seconds else 0))
 
     EventLatestOccurrence.record_event('sync-keys-succeeded')
     LOG.info("sync_keys finished.")
 
 
+def make_tasks(new_fingerprints, keys_to_sync, batch_size):
+    """
+    Return a list of (function, argument, number of keys), most urgent first.
+    """
+
+    return [
+        (get_new_key, fingerprint, 1) for fingerprint in new_fingerprints
+    ] + [
+        (sync_batch, keys, len(keys))
+        for keys in chunks(keys_to_sync, batch_size)
+    ]
+
+
+def run_task(task, deadline):
+    """
+    Return (number of keys attempted, number failed, number left because the
+    `deadline` passed, see `time.monotonic`). Keys another process claimed
+    are none of these.
+    """
+
+    func, argument, num_keys = task
+
+    if deadline is not None and time.monotonic() >= deadline:
+        return 0, 0, num_keys
+
+    return func(argument, deadline)
+
+
+def sync_sequentially(tasks, deadline):
+    return sum_results(run_task(task, deadline) for task in tasks)
+
+
+def sync_concurrently(tasks, workers, deadline):
+    """
+    Download & parse keys in `workers` threads. Each thread has its own
+    database connection and each key is saved in its own transaction.
+    Concurrent keyserver requests are capped separately by the shared
+    keyserver client, see `settings.KEYSERVER_MAX_CONCURRENT_REQUESTS`.
+    """
+
+    if settings.GPG_WORKER_POOL_SIZE > 0:
+        configure_worker_pool(max(workers, settings.GPG_WORKER_POOL_SIZE))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(in_own_db_connection(run_task), task, deadline)
+            for task in tasks
+        ]
+
+        results = [future.result() for future in as_completed(futures)]
+
+    return sum_results(results)
+
+
+def sum_results(results):
+    """
+    Add up (attempted, failed, left) tuples from `run_task`.
+    """
+    return tuple(sum(column) for column in zip((0, 0, 0), *results))
+
+
+def in_own_db_connection(func):
+    """
+    Django opens a connection per thread but only closes them at the end of
+    a request, so close it when the task finishes.
+    """
+
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connection.close()
+
+    return wrapper
+
+
+def get_new_key(fingerprint, deadline=None):
+    """
+    Return (attempted, failed, left) as for `run_task`: 1 key attempted, and
+    1 or 0 failures.
+    """
+    try:
+        get_key(fingerprint)
+
+    except (NoSuchKeyError, KeyParsingError, requests.RequestException) as e:
+        LOG.warning('Failed to get {}: {}'.format(fingerprint, repr(e)))
+        return 1, 1, 0
+
+    except IntegrityError:
+        LOG.info('{} was created by another process'.format(fingerprint))
+
+    return 1, 0, 0
+
+
+def sync_batch(keys, deadline=None):
+    """
+    Sync whichever of the keys another sync_keys process isn't already
+    syncing (see helpers/sync_leases.py), checking the `deadline` before each
+    key. Return (attempted, failed, left) as for `run_task`.
+    """
+    keys = claim_keys(keys)
+
+    try:
+        num_attempted, failures = sync_many_keys(keys, deadline)
+    finally:
+        release_keys(keys)
+
+    for fingerprint, e in failures.items():
+        LOG.warning('Failed to sync {}: {}'.format(fingerprint, repr(e)))
+
+    return num_attempted, len(failures), len(keys) - num_attempted
+
+
 def get_new_fingerprints_from_search_results():
     """
     Find key fingerprints from SearchResultForKeysByEmail which haven't yet
-    been added as PGPKey objects, and add them.
+    been added as PGPKey objects.
+
+    This is an anti-join in the database rather than a set difference in
+    Python, so only the missing fingerprints are loaded.
     """
 
-    already_got_fingerprints = set(
-        p.fingerprint for p in PGPKey.objects.all()
+    sql = NEW_FINGERPRINTS_SQL.format(
+        search_results=SearchResultForKeysByEmail._meta.db_table,
+        pgp_keys=PGPKey._meta.db_table,
     )
-    found_fingerprints = set()
-
-    for search_result in SearchResultForKeysByEmail.objects.all():
-        found_fingerprints.update(search_result.key_fingerprints)
 
-    return found_fingerprints - already_got_fingerprints
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return set(fingerprint for (fingerprint,) in cursor.fetchall())
 
 
 def get_keys_never_synced():
@@ -93,3 +305,32 @@ def get_stale_keys(keys_older_than):
         last_synced__isnull=False,
         last_synced__lt=keys_older_than
     ).order_by('last_synced')  # ascending: oldest first
+
+
+def get_keys_due_for_sync(now, keys_older_than):
+    """
+    Keys which the keyserver has reported changing (see KeyUpdate) since we
+    last synced them, or which are due according to their schedule (see
+    helpers/sync_schedule.py), most urgent first. Keys which haven't been
+    scheduled yet are due if not synced since `keys_older_than`.
+    """
+
+    updated_since_last_sync = KeyUpdate.objects.filter(
+        fingerprint=OuterRef('fingerprint'),
+        updated_at__gt=OuterRef('last_synced'),
+    )
+
+    return PGPKey.objects.annotate(
+        updated_on_keyserver=Exists(updated_since_last_sync)
+    ).filter(
+        # a key which keeps failing waits for its backed-off next_sync_at
+        Q(updated_on_keyserver=True, sync_failures=0)
+        | Q(next_sync_at__lte=now)
+        | Q(next_sync_at__isnull=True, last_synced__lt=keys_older_than),
+        last_synced__isnull=False,
+    ).order_by('-updated_on_keyserver', '-sync_priority', 'next_sync_at')
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
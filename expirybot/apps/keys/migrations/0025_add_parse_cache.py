@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 09:00
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import expirybot.apps.keys.models.custom_json_encoder
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0024_order_key_update_by_most_recent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedKeyCache',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('parsed_json', django.contrib.postgres.fields.jsonb.JSONField(encoder=expirybot.apps.keys.models.custom_json_encoder.CustomJSONEncoder)),
+                ('expires_at', models.DateTimeField(help_text='After this the key is parsed again, eg because the key has since expired, which changes which UIDs are valid.')),
+                ('last_used_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pgpkey',
+            name='key_digest',
+            field=models.CharField(blank=True, default='', help_text="SHA-256 of the ASCII-armored key at the last sync, used to skip re-syncing a key which hasn't changed.", max_length=64),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 10:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0025_add_parse_cache'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='keyupdate',
+            index=models.Index(fields=['fingerprint', 'updated_at'], name='keys_keyupdate_fpr_updated_idx'),
+        ),
+    ]
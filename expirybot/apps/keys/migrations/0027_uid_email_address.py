@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 11:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blacklist', '0005_make_email_address_case_insensitive'),
+        ('keys', '0026_keyupdate_fingerprint_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uid',
+            name='email_address',
+            field=models.ForeignKey(blank=True, help_text='The email address in the UID, if any. Set when the key is synced.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uids', to='blacklist.EmailAddress'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 11:05
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from expirybot.libs.uid_parser import parse_email_from_uid
+
+BATCH_SIZE = 1000
+
+
+def forwards_func(apps, schema_editor):
+    # We get the model from the versioned app registry;
+    # if we directly import it, it'll be the wrong version
+    UID = apps.get_model("keys", "UID")
+    EmailAddress = apps.get_model("blacklist", "EmailAddress")
+    db_alias = schema_editor.connection.alias
+
+    uids = UID.objects.using(db_alias).filter(
+        email_address__isnull=True
+    ).order_by('id')
+
+    last_id = 0
+
+    while True:
+        batch = list(uids.filter(id__gt=last_id)[:BATCH_SIZE])
+
+        if not batch:
+            break
+
+        last_id = batch[-1].id
+
+        emails = {
+            uid.id: parse_email_from_uid(uid.uid_string) for uid in batch
+        }
+        wanted = {e.lower(): e for e in emails.values() if e}
+
+        existing = {
+            e.lower(): e for e in EmailAddress.objects.using(db_alias).filter(
+                email_address__in=list(wanted.values())
+            ).values_list('email_address', flat=True)
+        }
+
+        missing = [e for lower, e in wanted.items() if lower not in existing]
+
+        EmailAddress.objects.using(db_alias).bulk_create(
+            [EmailAddress(email_address=e) for e in missing]
+        )
+        existing.update({e.lower(): e for e in missing})
+
+        for uid in batch:
+            if emails[uid.id]:
+                uid.email_address_id = existing[emails[uid.id].lower()]
+                uid.save(update_fields=['email_address'])
+
+
+def reverse_func(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0027_uid_email_address'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards_func, reverse_func),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 12:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0028_populate_uid_email_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pgpkey',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, help_text='When sync_keys should next re-sync this key.', null=True),
+        ),
+        migrations.AddField(
+            model_name='pgpkey',
+            name='sync_failures',
+            field=models.PositiveIntegerField(default=0, help_text='Consecutive failed syncs.'),
+        ),
+        migrations.AddField(
+            model_name='pgpkey',
+            name='sync_priority',
+            field=models.IntegerField(default=0, help_text='Due keys with a higher priority are synced first, see helpers/sync_schedule.py'),
+        ),
+        migrations.AddIndex(
+            model_name='pgpkey',
+            index=models.Index(fields=['next_sync_at', '-sync_priority'], name='keys_pgpkey_sync_queue_idx'),
+        ),
+    ]
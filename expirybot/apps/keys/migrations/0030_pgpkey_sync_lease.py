@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 13:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0029_pgpkey_sync_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pgpkey',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='While this is in the future, the sync_keys process `leased_by` is syncing the key and others skip it.', null=True),
+        ),
+        migrations.AddField(
+            model_name='pgpkey',
+            name='leased_by',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 14:00
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0030_pgpkey_sync_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='brokenkey',
+            name='error_class',
+            field=models.CharField(choices=[('broken', 'Key rejected by gpg'), ('not-found', 'Not on the keyserver'), ('keyserver-error', 'Keyserver error or timeout'), ('gpg-error', 'gpg failed')], default='broken', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='brokenkey',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=1, help_text='Consecutive failures, used to back off retries.'),
+        ),
+        migrations.AddField(
+            model_name='brokenkey',
+            name='last_failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -4,6 +4,7 @@ from .custom_json_encoder import CustomJSONEncoder
 from .key_test_result import KeyTestResult
 from .key_update import KeyUpdate
 from .mixins import ExpiryCalculationMixin, FriendlyCapabilitiesMixin
+from .parsed_key_cache import ParsedKeyCache
 from .pgp_key import PGPKey, validate_fingerprint
 from .subkey import Subkey
 from .uid import UID
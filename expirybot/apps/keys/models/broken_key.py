@@ -4,6 +4,23 @@ from .mixins import FingerprintFormatMixin
 
 
 class BrokenKey(models.Model, FingerprintFormatMixin):
+    """
+    A key which failed to sync, and when to next try again. Despite the name
+    this covers every kind of failure, including keys which aren't on the
+    keyserver at all.
+    """
+
+    BROKEN = 'broken'
+    NOT_FOUND = 'not-found'
+    KEYSERVER_ERROR = 'keyserver-error'
+    GPG_ERROR = 'gpg-error'
+
+    ERROR_CLASS_CHOICES = (
+        (BROKEN, 'Key rejected by gpg'),
+        (NOT_FOUND, 'Not on the keyserver'),
+        (KEYSERVER_ERROR, 'Keyserver error or timeout'),
+        (GPG_ERROR, 'gpg failed'),
+    )
 
     fingerprint = models.CharField(
         help_text=(
@@ -21,5 +38,18 @@ class BrokenKey(models.Model, FingerprintFormatMixin):
         default=''
     )
 
+    error_class = models.CharField(
+        max_length=20,
+        choices=ERROR_CLASS_CHOICES,
+        default=BROKEN,
+    )
+
+    failure_count = models.PositiveIntegerField(
+        help_text="Consecutive failures, used to back off retries.",
+        default=1,
+    )
+
+    last_failed_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return self.zero_x_fingerprint
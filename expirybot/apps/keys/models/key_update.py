@@ -17,6 +17,14 @@ class KeyUpdate(models.Model, FingerprintFormatMixin):
 
         ordering = ('-updated_at',)
 
+        indexes = [
+            # For sync_keys: has this key been updated since its last sync?
+            models.Index(
+                fields=['fingerprint', 'updated_at'],
+                name='keys_keyupdate_fpr_updated_idx'
+            ),
+        ]
+
     sks_hash = models.CharField(
         primary_key=True,
         max_length=32
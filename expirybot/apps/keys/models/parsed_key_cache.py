@@ -0,0 +1,32 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+
+from .custom_json_encoder import CustomJSONEncoder
+
+
+class ParsedKeyCache(models.Model):
+    """
+    The result of parsing an ASCII-armored key, keyed on the SHA-256 digest
+    of the armored bytes. See helpers/parse_cache.py
+    """
+
+    digest = models.CharField(
+        primary_key=True,
+        max_length=64
+    )
+
+    parsed_json = JSONField(encoder=CustomJSONEncoder)
+
+    expires_at = models.DateTimeField(
+        help_text=(
+            "After this the key is parsed again, eg because the key has since "
+            "expired, which changes which UIDs are valid."
+        ),
+    )
+
+    last_used_at = models.DateTimeField(
+        db_index=True
+    )
+
+    def __str__(self):
+        return 'ParsedKeyCache(digest={})'.format(self.digest)
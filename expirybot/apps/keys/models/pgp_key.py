@@ -22,6 +22,15 @@ def validate_fingerprint(string):
 
 class PGPKey(CryptographicKey, ExpiryCalculationMixin, FingerprintFormatMixin):
 
+    class Meta:
+        indexes = [
+            # For sync_keys: which keys are due, most important first
+            models.Index(
+                fields=['next_sync_at', '-sync_priority'],
+                name='keys_pgpkey_sync_queue_idx'
+            ),
+        ]
+
     fingerprint = models.CharField(
         help_text=(
             "The 40-character key fingerprint without spaces."
@@ -41,6 +50,50 @@ class PGPKey(CryptographicKey, ExpiryCalculationMixin, FingerprintFormatMixin):
 
     revoked = models.BooleanField(default=False)
 
+    key_digest = models.CharField(
+        help_text=(
+            "SHA-256 of the ASCII-armored key at the last sync, used to skip "
+            "re-syncing a key which hasn't changed."
+        ),
+        max_length=64,
+        blank=True,
+        default='',
+    )
+
+    next_sync_at = models.DateTimeField(
+        help_text="When sync_keys should next re-sync this key.",
+        null=True,
+        blank=True,
+    )
+
+    sync_priority = models.IntegerField(
+        help_text=(
+            "Due keys with a higher priority are synced first, see "
+            "helpers/sync_schedule.py"
+        ),
+        default=0,
+    )
+
+    sync_failures = models.PositiveIntegerField(
+        help_text="Consecutive failed syncs.",
+        default=0,
+    )
+
+    lease_expires_at = models.DateTimeField(
+        help_text=(
+            "While this is in the future, the sync_keys process `leased_by` "
+            "is syncing the key and others skip it."
+        ),
+        null=True,
+        blank=True,
+    )
+
+    leased_by = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+    )
+
     def __str__(self):
         return self.zero_x_fingerprint
 
@@ -54,10 +107,13 @@ class PGPKey(CryptographicKey, ExpiryCalculationMixin, FingerprintFormatMixin):
 
     @property
     def email_addresses(self):
-        return list(filter(
-            None,
-            (uid.email_address for uid in self.uids.all())
-        ))
+        """
+        Prefetch `uids_set__email_address` to avoid a query per UID.
+        """
+        return [
+            uid.email_address for uid in self.uids
+            if uid.email_address_id is not None
+        ]
 
     @property
     def uids(self):
@@ -1,7 +1,6 @@
 from django.db import models
 
 from expirybot.apps.blacklist.models import EmailAddress
-from expirybot.libs.uid_parser import parse_email_from_uid
 
 from .pgp_key import PGPKey
 
@@ -15,17 +14,15 @@ class UID(models.Model):
 
     email_address = models.ForeignKey(
         EmailAddress,
+        help_text=(
+            "The email address in the UID, if any. Set when the key is "
+            "synced."
+        ),
         null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
         related_name='uids'
     )
 
-    @property
-    def email_address(self):
-        email_address = parse_email_from_uid(self.uid_string)
-        obj, _ = EmailAddress.objects.get_or_create(
-            email_address=email_address
-        )
-        return obj
-
     def __str__(self):
         return self.uid_string
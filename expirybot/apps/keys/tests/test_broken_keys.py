@@ -0,0 +1,109 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal, assert_true
+
+from expirybot.apps.keys.models import BrokenKey
+from expirybot.apps.keys.helpers.exceptions import (
+    KeyParsingError, NoSuchKeyError
+)
+from expirybot.apps.keys.helpers.broken_keys import (
+    PURGE_AFTER, calculate_retry_delay, clear_broken_key, clear_cache,
+    ignored_key_error, purge_broken_keys, record_broken_key, retry_now
+)
+
+
+class TestCalculateRetryDelay(TestCase):
+    def test_backs_off_exponentially_with_jitter(self):
+        for failure_count, max_hours in [(1, 1), (2, 2), (3, 4)]:
+            delay = calculate_retry_delay('not-found', failure_count)
+            max_delay = datetime.timedelta(hours=max_hours)
+
+            assert_true(max_delay / 2 <= delay <= max_delay, delay)
+
+    def test_maximum_delay(self):
+        assert_true(
+            calculate_retry_delay('keyserver-error', 100)
+            <= datetime.timedelta(hours=6)
+        )
+
+
+class TestBrokenKeys(TestCase):
+    FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+
+    def setUp(self):
+        clear_cache()
+        self.now = timezone.now()
+
+    def tearDown(self):
+        clear_cache()
+
+    def test_key_without_failures(self):
+        assert_equal(None, ignored_key_error(self.FINGERPRINT, self.now))
+
+    def test_not_found_key_is_negatively_cached(self):
+        record_broken_key(self.FINGERPRINT, 'HTTP 404', 'not-found', self.now)
+
+        assert_true(isinstance(
+            ignored_key_error(self.FINGERPRINT, self.now), NoSuchKeyError
+        ))
+
+    def test_broken_key_is_ignored(self):
+        record_broken_key(self.FINGERPRINT, 'bad key', 'broken', self.now)
+
+        assert_true(isinstance(
+            ignored_key_error(self.FINGERPRINT, self.now), KeyParsingError
+        ))
+
+    def test_failure_count_resets_when_error_class_changes(self):
+        record_broken_key(self.FINGERPRINT, 'timeout', 'keyserver-error')
+        record_broken_key(self.FINGERPRINT, 'timeout', 'keyserver-error')
+        assert_equal(2, BrokenKey.objects.get().failure_count)
+
+        record_broken_key(self.FINGERPRINT, 'HTTP 404', 'not-found')
+        assert_equal(1, BrokenKey.objects.get().failure_count)
+
+    def test_retry_now(self):
+        record_broken_key(self.FINGERPRINT, 'bad key', 'broken', self.now)
+        retry_now([self.FINGERPRINT], self.now)
+
+        clear_cache()
+        assert_equal(None, ignored_key_error(self.FINGERPRINT, self.now))
+
+    def test_cleared_after_successful_sync(self):
+        record_broken_key(self.FINGERPRINT, 'bad key', 'broken', self.now)
+        clear_broken_key(self.FINGERPRINT)
+
+        assert_equal(0, BrokenKey.objects.count())
+        assert_equal(None, ignored_key_error(self.FINGERPRINT, self.now))
+
+    def test_cleared_when_another_process_recorded_the_failure(self):
+        ignored_key_error(self.FINGERPRINT, self.now)  # cached: no failures
+
+        BrokenKey.objects.create(
+            fingerprint=self.FINGERPRINT,
+            next_retry_sync=self.now + datetime.timedelta(days=1),
+        )
+        clear_broken_key(self.FINGERPRINT)
+
+        assert_equal(0, BrokenKey.objects.count())
+
+    def test_lookups_are_cached_per_key(self):
+        with self.assertNumQueries(1):
+            ignored_key_error(self.FINGERPRINT, self.now)
+            ignored_key_error(self.FINGERPRINT, self.now)
+
+    def test_purge_deletes_only_long_expired_rows(self):
+        record_broken_key(self.FINGERPRINT, 'HTTP 404', 'not-found', self.now)
+        BrokenKey.objects.create(
+            fingerprint='5FDFCA89258063B2EB446CFE76027EB8C2DF6381',
+            next_retry_sync=self.now - PURGE_AFTER - datetime.timedelta(1),
+        )
+
+        assert_equal(1, purge_broken_keys(self.now))
+        assert_equal(
+            [self.FINGERPRINT],
+            list(BrokenKey.objects.values_list('fingerprint', flat=True))
+        )
@@ -0,0 +1,97 @@
+import datetime
+import threading
+import time
+
+from importlib import import_module
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal
+
+from expirybot.apps.keys.helpers import broken_keys, get_key
+from expirybot.apps.keys.models import PGPKey
+
+# the helpers package re-exports the function `sync_key`, hiding the module
+sync_key_module = import_module('expirybot.apps.keys.helpers.sync_key')
+
+PARSED_KEY = {
+    'algorithm': 'RSA',
+    'length_bits': 4096,
+    'ecc_curve': None,
+    'uids': ['Paul <paul@example.com>'],
+    'subkeys': [],
+    'created_date': datetime.date(2014, 10, 31),
+    'expiry_date': datetime.date(2018, 5, 15),
+    'capabilities': ['C', 'S'],
+    'revoked': False,
+}
+
+
+class TestGetKeySingleFlight(TransactionTestCase):
+    """
+    Threads have their own database connections, so these need a real
+    transaction rather than TestCase's rollback.
+    """
+
+    FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    NUM_REQUESTS = 8
+
+    def setUp(self):
+        broken_keys.clear_cache()
+        self.downloads = []
+
+    def _slow_download(self, key_id):
+        self.downloads.append(key_id)
+        time.sleep(0.5)  # long enough for every request to arrive
+        return b'-----BEGIN PGP PUBLIC KEY BLOCK-----'
+
+    def _get_key_concurrently(self):
+        errors = []
+
+        def request():
+            try:
+                get_key(self.FINGERPRINT)
+
+            except Exception as e:
+                errors.append(e)
+
+            finally:
+                connection.close()
+
+        with patch.object(sync_key_module, 'download_ascii_armored_key',
+                          side_effect=self._slow_download), \
+                patch.object(sync_key_module, 'parse_ascii_armored_key',
+                             return_value=PARSED_KEY):
+
+            threads = [
+                threading.Thread(target=request)
+                for _ in range(self.NUM_REQUESTS)
+            ]
+
+            for thread in threads:
+                thread.start()
+
+            for thread in threads:
+                thread.join()
+
+        assert_equal([], errors)
+
+    def test_new_key_is_downloaded_once(self):
+        self._get_key_concurrently()
+
+        assert_equal(1, len(self.downloads))
+        assert_equal(1, PGPKey.objects.filter(
+            fingerprint=self.FINGERPRINT).count())
+
+    def test_stale_key_is_downloaded_once(self):
+        PGPKey.objects.create(
+            fingerprint=self.FINGERPRINT,
+            last_synced=timezone.now() - datetime.timedelta(days=2),
+        )
+
+        self._get_key_concurrently()
+
+        assert_equal(1, len(self.downloads))
@@ -0,0 +1,68 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal
+
+from expirybot.apps.keys.models import ParsedKeyCache
+from expirybot.apps.keys.helpers.parse_cache import (
+    cache_parse, clear_lru, evict_parse_cache, get_cached_parse, key_digest
+)
+
+
+def make_parsed(expiry_date=None):
+    return {
+        'fingerprint': 'A999B7498D1A8DC473E53C92309F635DAD1B5517',
+        'created_date': datetime.date(2014, 10, 31),
+        'expiry_date': expiry_date,
+        'uids': ['Paul Michael Furley <paul@paulfurley.com>'],
+        'subkeys': [{
+            'long_id': '627B1B4E8E532C34',
+            'created_date': datetime.date(2014, 10, 31),
+            'expiry_date': datetime.date(2018, 5, 15),
+        }],
+    }
+
+
+class TestParseCache(TestCase):
+    def setUp(self):
+        clear_lru()
+        self.now = timezone.now()
+        self.digest = key_digest(b'some key')
+
+    def tearDown(self):
+        clear_lru()
+
+    def test_miss(self):
+        assert_equal(None, get_cached_parse(self.digest, self.now))
+
+    def test_hit_from_database_restores_dates(self):
+        cache_parse(self.digest, make_parsed(), self.now)
+        clear_lru()
+
+        assert_equal(make_parsed(), get_cached_parse(self.digest, self.now))
+
+    def test_entry_expires_when_the_key_does(self):
+        expiry_date = (self.now + datetime.timedelta(days=3)).date()
+        cache_parse(self.digest, make_parsed(expiry_date), self.now)
+
+        assert_equal(
+            None,
+            get_cached_parse(self.digest, self.now + datetime.timedelta(4))
+        )
+
+    def test_evicts_least_recently_used(self):
+        for i in range(3):
+            cache_parse(
+                key_digest(bytes([i])),
+                make_parsed(),
+                self.now + datetime.timedelta(minutes=i)
+            )
+
+        evict_parse_cache(self.now, max_rows=2)
+
+        assert_equal(
+            set([key_digest(b'\x01'), key_digest(b'\x02')]),
+            set(ParsedKeyCache.objects.values_list('digest', flat=True))
+        )
@@ -0,0 +1,80 @@
+import datetime
+
+from django.test import TestCase
+
+from nose.tools import assert_equal
+
+from expirybot.apps.keys.models import PGPKey
+from expirybot.apps.keys.management.commands.recompute_alerts import (
+    recompute_alerts
+)
+
+
+class TestRecomputeAlerts(TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+
+    def _make_key(self, fingerprint, expiry_date, alerts_json, **kwargs):
+        return PGPKey.objects.create(
+            fingerprint=fingerprint,
+            expiry_date=expiry_date,
+            alerts_json=alerts_json,
+            **kwargs
+        )
+
+    def test_alert_is_updated_for_today(self):
+        key = self._make_key(
+            'A999B7498D1A8DC473E53C92309F635DAD1B5517',
+            self.today + datetime.timedelta(days=5),
+            [{'severity': 'warning', 'text': 'Primary key expires in 6 days'}]
+        )
+
+        assert_equal(1, recompute_alerts(self.today))
+
+        key.refresh_from_db()
+        assert_equal(
+            [{'severity': 'warning', 'text': 'Primary key expires in 5 days'}],
+            key.alerts_json
+        )
+
+    def test_alerts_are_computed_for_the_given_date(self):
+        key = self._make_key(
+            'A999B7498D1A8DC473E53C92309F635DAD1B5517',
+            self.today + datetime.timedelta(days=20),
+            []
+        )
+
+        recompute_alerts(self.today + datetime.timedelta(days=10))
+
+        key.refresh_from_db()
+        assert_equal(
+            'Primary key expires in 10 days', key.alerts_json[0]['text']
+        )
+
+    def test_up_to_date_alerts_are_not_written(self):
+        self._make_key(
+            'A999B7498D1A8DC473E53C92309F635DAD1B5517',
+            self.today + datetime.timedelta(days=5),
+            [{'severity': 'warning', 'text': 'Primary key expires in 5 days'}]
+        )
+
+        assert_equal(0, recompute_alerts(self.today))
+
+    def test_keys_whose_alerts_cant_change_are_skipped(self):
+        far_future = self._make_key(
+            'A999B7498D1A8DC473E53C92309F635DAD1B5517',
+            self.today + datetime.timedelta(days=365),
+            ['stale']
+        )
+        revoked = self._make_key(
+            '5FDFCA89258063B2EB446CFE76027EB8C2DF6381',
+            self.today,
+            ['stale'],
+            revoked=True,
+        )
+
+        assert_equal(0, recompute_alerts(self.today))
+
+        for key in (far_future, revoked):
+            key.refresh_from_db()
+            assert_equal(['stale'], key.alerts_json)
@@ -0,0 +1,197 @@
+import datetime
+
+from importlib import import_module
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from nose.tools import assert_equal, assert_true
+
+from expirybot.apps.blacklist.models import EmailAddress
+from expirybot.apps.keys.models import PGPKey, Subkey, UID
+from expirybot.apps.keys.helpers import broken_keys
+from expirybot.apps.keys.helpers.sync_key import (
+    sync_key_uids, sync_many_keys, sync_subkeys
+)
+from expirybot.libs.gpg_wrapper import GPGFatalProblemWithKey
+
+# the helpers package re-exports the function `sync_key`, hiding the module
+sync_key_module = import_module('expirybot.apps.keys.helpers.sync_key')
+
+PARSED_KEY = {
+    'algorithm': 'RSA',
+    'length_bits': 4096,
+    'ecc_curve': None,
+    'uids': ['Paul <paul@example.com>'],
+    'subkeys': [],
+    'created_date': datetime.date(2014, 10, 31),
+    'expiry_date': datetime.date(2018, 5, 15),
+    'capabilities': ['C', 'S'],
+    'revoked': False,
+}
+
+
+def make_subkey_data(long_id, **kwargs):
+    subkey_data = {
+        'long_id': long_id,
+        'key_algorithm': 'RSA',
+        'key_length_bits': 4096,
+        'ecc_curve': '',
+        'creation_date': datetime.date(2014, 10, 31),
+        'expiry_date': datetime.date(2018, 5, 15),
+        'revoked': False,
+        'capabilities': ['E'],
+    }
+    subkey_data.update(kwargs)
+    return subkey_data
+
+
+class TestSyncKeyUids(TestCase):
+    def setUp(self):
+        self.key = PGPKey.objects.create(
+            fingerprint='A999B7498D1A8DC473E53C92309F635DAD1B5517'
+        )
+
+        for email in ['paul@example.com', 'p@example.com']:
+            UID.objects.create(
+                key=self.key,
+                uid_string='Paul <{}>'.format(email),
+                email_address=EmailAddress.objects.create(email_address=email)
+            )
+
+        self.original_ids = set(u.id for u in self.key.uids.all())
+
+    def test_reordering_writes_nothing(self):
+        assert_equal(
+            0,
+            sync_key_uids(
+                self.key, ['Paul <p@example.com>', 'Paul <paul@example.com>']
+            )
+        )
+        assert_equal(
+            self.original_ids, set(u.id for u in self.key.uids.all())
+        )
+
+    def test_only_changed_uids_are_written(self):
+        assert_equal(
+            2,
+            sync_key_uids(
+                self.key, ['Paul <paul@example.com>', 'New <new@example.com>']
+            )
+        )
+        assert_equal(
+            set(['Paul <paul@example.com>', 'New <new@example.com>']),
+            set(u.uid_string for u in self.key.uids.all())
+        )
+
+    def test_new_uids_are_linked_to_email_addresses(self):
+        sync_key_uids(self.key, [
+            'Paul <paul@example.com>',
+            'New <new@example.com>',
+            'No email address',
+        ])
+
+        assert_equal(
+            {
+                'Paul <paul@example.com>': 'paul@example.com',
+                'New <new@example.com>': 'new@example.com',
+                'No email address': None,
+            },
+            {u.uid_string: u.email_address_id for u in self.key.uids.all()}
+        )
+
+    def test_existing_uids_without_email_address_are_linked(self):
+        UID.objects.filter(key=self.key).update(email_address=None)
+
+        assert_equal(
+            2,
+            sync_key_uids(
+                self.key, ['Paul <paul@example.com>', 'Paul <p@example.com>']
+            )
+        )
+        assert_equal(
+            ['p@example.com', 'paul@example.com'],
+            sorted(e.email_address for e in self.key.email_addresses)
+        )
+
+
+class TestSyncSubkeys(TestCase):
+    def setUp(self):
+        self.key = PGPKey.objects.create(
+            fingerprint='A999B7498D1A8DC473E53C92309F635DAD1B5517'
+        )
+
+        for long_id in ['627B1B4E8E532C34', '0AC6AD63E8E8A9B0']:
+            Subkey.objects.create(key=self.key, **make_subkey_data(long_id))
+
+    def test_unchanged_subkeys_write_nothing(self):
+        assert_equal(
+            0,
+            sync_subkeys(self.key, [
+                make_subkey_data('0AC6AD63E8E8A9B0'),
+                make_subkey_data('627B1B4E8E532C34'),
+            ])
+        )
+
+    def test_changed_subkey_is_updated_in_place(self):
+        subkey_id = Subkey.objects.get(long_id='627B1B4E8E532C34').id
+
+        assert_equal(
+            3,  # 1 updated, 1 created, 1 deleted
+            sync_subkeys(self.key, [
+                make_subkey_data(
+                    '627B1B4E8E532C34', expiry_date=datetime.date(2020, 1, 1)
+                ),
+                make_subkey_data('1111111111111111'),
+            ])
+        )
+
+        subkey = Subkey.objects.get(long_id='627B1B4E8E532C34')
+        assert_equal(subkey_id, subkey.id)
+        assert_equal(datetime.date(2020, 1, 1), subkey.expiry_date)
+        assert_equal(
+            set(['627B1B4E8E532C34', '1111111111111111']),
+            set(s.long_id for s in self.key.subkeys.all())
+        )
+
+
+class TestSyncManyKeys(TestCase):
+    GOOD_FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    NO_UIDS_FINGERPRINT = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+
+    def setUp(self):
+        broken_keys.clear_cache()
+        self.keys = [
+            PGPKey.objects.create(fingerprint=self.GOOD_FINGERPRINT),
+            PGPKey.objects.create(fingerprint=self.NO_UIDS_FINGERPRINT),
+        ]
+
+    def tearDown(self):
+        broken_keys.clear_cache()
+
+    @staticmethod
+    def _download(key_id):
+        return 'key {}'.format(key_id).encode('ascii')
+
+    def _parse_one(self, ascii_key_binary):
+        if self.NO_UIDS_FINGERPRINT[-16:].encode('ascii') in ascii_key_binary:
+            raise GPGFatalProblemWithKey('no valid user IDs')
+
+        return dict(PARSED_KEY)
+
+    def test_key_without_valid_uids_doesnt_fail_its_batch(self):
+        with patch.object(sync_key_module, 'download_ascii_armored_key',
+                          side_effect=self._download), \
+                patch.object(sync_key_module, 'parse_public_keys',
+                             side_effect=GPGFatalProblemWithKey(
+                                 'no valid user IDs')), \
+                patch.object(sync_key_module, 'parse_public_key_binary',
+                             side_effect=self._parse_one):
+
+            num_attempted, failures = sync_many_keys(self.keys)
+
+        assert_equal(2, num_attempted)
+        assert_equal([self.NO_UIDS_FINGERPRINT], list(failures))
+        assert_true(
+            PGPKey.objects.get(fingerprint=self.GOOD_FINGERPRINT).last_synced
+        )
@@ -0,0 +1,166 @@
+import datetime
+
+from importlib import import_module
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal
+
+from expirybot.apps.keys.helpers import NoSuchKeyError, broken_keys
+from expirybot.apps.keys.models import KeyUpdate, PGPKey
+from expirybot.apps.keys.management.commands.sync_keys import (
+    get_new_fingerprints_from_search_results, get_keys_due_for_sync,
+    sync_batch
+)
+from expirybot.apps.users.models import SearchResultForKeysByEmail
+
+# the helpers package re-exports the function `sync_key`, hiding the module
+sync_key_module = import_module('expirybot.apps.keys.helpers.sync_key')
+
+
+class TestGetNewFingerprintsFromSearchResults(TestCase):
+    FINGERPRINT_1 = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    FINGERPRINT_2 = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+    FINGERPRINT_3 = '02DC30BAE0DF578A672C72EDE31F9BFFE9FA1597'
+
+    def test_only_fingerprints_without_a_pgp_key(self):
+        PGPKey.objects.create(fingerprint=self.FINGERPRINT_1)
+
+        for fingerprints in [
+                [self.FINGERPRINT_1, self.FINGERPRINT_2],
+                [self.FINGERPRINT_2, self.FINGERPRINT_3],
+                []]:
+            SearchResultForKeysByEmail.objects.create(
+                datetime=timezone.now(),
+                key_fingerprints=fingerprints
+            )
+
+        assert_equal(
+            set([self.FINGERPRINT_2, self.FINGERPRINT_3]),
+            get_new_fingerprints_from_search_results()
+        )
+
+
+class TestGetKeysDueForSync(TestCase):
+    FINGERPRINT_1 = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    FINGERPRINT_2 = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.last_synced = self.now - datetime.timedelta(days=2)
+
+        for fingerprint in (self.FINGERPRINT_1, self.FINGERPRINT_2):
+            PGPKey.objects.create(
+                fingerprint=fingerprint,
+                last_synced=self.last_synced
+            )
+
+    def _get(self):
+        return [
+            k.fingerprint for k in get_keys_due_for_sync(
+                self.now, self.now - datetime.timedelta(days=30)
+            )
+        ]
+
+    def _add_key_update(self, fingerprint, updated_at):
+        KeyUpdate.objects.create(
+            sks_hash=str(updated_at.timestamp())[:32],
+            fingerprint=fingerprint,
+            updated_at=updated_at
+        )
+
+    def test_unchanged_keys_are_not_synced(self):
+        assert_equal([], self._get())
+
+    def test_key_updated_since_last_sync(self):
+        self._add_key_update(
+            self.FINGERPRINT_1, self.last_synced + datetime.timedelta(hours=1)
+        )
+
+        assert_equal([self.FINGERPRINT_1], self._get())
+
+    def test_key_updated_before_last_sync(self):
+        self._add_key_update(
+            self.FINGERPRINT_1, self.last_synced - datetime.timedelta(hours=1)
+        )
+
+        assert_equal([], self._get())
+
+    def test_full_sweep_of_old_keys(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_2).update(
+            last_synced=self.now - datetime.timedelta(days=31)
+        )
+
+        assert_equal([self.FINGERPRINT_2], self._get())
+
+    def test_scheduled_keys_in_priority_order(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_1).update(
+            next_sync_at=self.now - datetime.timedelta(hours=2),
+            sync_priority=0
+        )
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_2).update(
+            next_sync_at=self.now - datetime.timedelta(hours=1),
+            sync_priority=100
+        )
+
+        assert_equal([self.FINGERPRINT_2, self.FINGERPRINT_1], self._get())
+
+    def test_scheduled_key_not_yet_due(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_2).update(
+            last_synced=self.now - datetime.timedelta(days=31),
+            next_sync_at=self.now + datetime.timedelta(hours=1)
+        )
+
+        assert_equal([], self._get())
+
+    def test_failing_key_waits_for_backoff(self):
+        self._add_key_update(
+            self.FINGERPRINT_1, self.last_synced + datetime.timedelta(hours=1)
+        )
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_1).update(
+            sync_failures=1,
+            next_sync_at=self.now + datetime.timedelta(hours=1)
+        )
+
+        assert_equal([], self._get())
+
+
+class TestSyncBatchDeadline(TestCase):
+    FINGERPRINT_1 = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    FINGERPRINT_2 = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+
+    def setUp(self):
+        broken_keys.clear_cache()
+        self.keys = [
+            PGPKey.objects.create(fingerprint=self.FINGERPRINT_1),
+            PGPKey.objects.create(fingerprint=self.FINGERPRINT_2),
+        ]
+
+    def tearDown(self):
+        broken_keys.clear_cache()
+
+    def test_deadline_is_checked_before_each_key(self):
+        clock = [0]
+
+        def slow_download(key_id):
+            clock[0] = 100
+            raise NoSuchKeyError('HTTP 404')
+
+        with patch.object(sync_key_module, 'download_ascii_armored_key',
+                          side_effect=slow_download), \
+                patch.object(sync_key_module.time, 'monotonic',
+                             side_effect=lambda: clock[0]):
+
+            assert_equal((1, 1, 1), sync_batch(self.keys, deadline=50))
+
+    def test_keys_claimed_elsewhere_are_not_counted_as_left(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_2).update(
+            lease_expires_at=timezone.now() + datetime.timedelta(minutes=5)
+        )
+
+        with patch.object(sync_key_module, 'download_ascii_armored_key',
+                          side_effect=NoSuchKeyError('HTTP 404')):
+
+            assert_equal((1, 1, 0), sync_batch(self.keys, deadline=None))
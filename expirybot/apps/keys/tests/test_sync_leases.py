@@ -0,0 +1,80 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal
+
+from expirybot.apps.keys.models import PGPKey
+from expirybot.apps.keys.helpers.sync_leases import (
+    claim_keys, release_keys, worker_id, LEASE_DURATION
+)
+
+
+class TestSyncLeases(TestCase):
+    FINGERPRINT_1 = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    FINGERPRINT_2 = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+
+    def setUp(self):
+        self.now = timezone.now()
+
+        for fingerprint in (self.FINGERPRINT_1, self.FINGERPRINT_2):
+            PGPKey.objects.create(
+                fingerprint=fingerprint,
+                last_synced=self.now - datetime.timedelta(days=8)
+            )
+
+        self.keys = list(PGPKey.objects.order_by('fingerprint'))
+
+    def _fingerprints(self, keys):
+        return [k.fingerprint for k in keys]
+
+    def test_claim_sets_lease(self):
+        claim_keys(self.keys, self.now)
+
+        key = PGPKey.objects.get(fingerprint=self.FINGERPRINT_1)
+        assert_equal(self.now + LEASE_DURATION, key.lease_expires_at)
+        assert_equal(worker_id(), key.leased_by)
+
+    def test_leased_keys_are_skipped(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_1).update(
+            lease_expires_at=self.now + datetime.timedelta(minutes=5),
+            leased_by='otherhost:123'
+        )
+
+        assert_equal(
+            [self.FINGERPRINT_2],
+            self._fingerprints(claim_keys(self.keys, self.now))
+        )
+
+    def test_expired_lease_can_be_claimed(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_1).update(
+            lease_expires_at=self.now - datetime.timedelta(minutes=1),
+            leased_by='otherhost:123'
+        )
+
+        assert_equal(
+            self._fingerprints(self.keys),
+            self._fingerprints(claim_keys(self.keys, self.now))
+        )
+
+    def test_keys_synced_by_another_process_are_skipped(self):
+        PGPKey.objects.filter(fingerprint=self.FINGERPRINT_2).update(
+            last_synced=self.now
+        )
+
+        assert_equal(
+            [self.FINGERPRINT_1],
+            self._fingerprints(claim_keys(self.keys, self.now))
+        )
+
+    def test_release(self):
+        claimed = claim_keys(self.keys, self.now)
+        release_keys(claimed)
+
+        assert_equal(
+            2,
+            PGPKey.objects.filter(
+                lease_expires_at__isnull=True, leased_by=''
+            ).count()
+        )
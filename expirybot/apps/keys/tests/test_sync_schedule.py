@@ -0,0 +1,117 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal
+
+from expirybot.apps.keys.models import KeyUpdate, PGPKey
+from expirybot.apps.keys.helpers.sync_schedule import (
+    calculate_priority, calculate_sync_interval, load_schedule_inputs,
+    DEFAULT_SYNC_INTERVAL, MAX_FAILURE_BACKOFF, UPDATES_WINDOW
+)
+from expirybot.apps.users.models import KeyOwnershipProof
+
+
+class TestCalculatePriority(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def _make_key(self, days_till_expiry=None, sync_failures=0):
+        expiry_date = None
+
+        if days_till_expiry is not None:
+            expiry_date = (
+                self.now + datetime.timedelta(days=days_till_expiry)
+            ).date()
+
+        return PGPKey(
+            fingerprint='A999B7498D1A8DC473E53C92309F635DAD1B5517',
+            expiry_date=expiry_date,
+            sync_failures=sync_failures
+        )
+
+    def test_orphaned_key_which_never_expires(self):
+        assert_equal(
+            0, calculate_priority(self._make_key(), self.now, False, 0)
+        )
+
+    def test_owned_key_expiring_soon_comes_first(self):
+        assert_equal(
+            150, calculate_priority(self._make_key(3), self.now, True, 0)
+        )
+
+    def test_long_expired_key(self):
+        assert_equal(
+            0, calculate_priority(self._make_key(-365), self.now, False, 0)
+        )
+
+    def test_frequently_updated_key(self):
+        assert_equal(
+            20, calculate_priority(self._make_key(), self.now, False, 50)
+        )
+
+    def test_failures_lower_priority(self):
+        assert_equal(
+            -20,
+            calculate_priority(
+                self._make_key(sync_failures=2), self.now, False, 0
+            )
+        )
+
+
+class TestCalculateSyncInterval(TestCase):
+    def test_high_priority(self):
+        assert_equal(
+            datetime.timedelta(days=1), calculate_sync_interval(150, 0)
+        )
+
+    def test_low_priority(self):
+        assert_equal(DEFAULT_SYNC_INTERVAL, calculate_sync_interval(0, 0))
+
+    def test_failures_back_off_exponentially(self):
+        assert_equal(
+            [datetime.timedelta(hours=h) for h in (1, 2, 4)],
+            [calculate_sync_interval(0, failures) for failures in (1, 2, 3)]
+        )
+        assert_equal(MAX_FAILURE_BACKOFF, calculate_sync_interval(0, 1000))
+
+
+class TestLoadScheduleInputs(TestCase):
+    OWNED = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    UPDATED = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+    NEITHER = 'F4B7D3F4E7A3B1C2D5E6F7A8B9C0D1E2F3A4B5C6'
+
+    def setUp(self):
+        self.now = timezone.now()
+
+        for fingerprint in (self.OWNED, self.UPDATED, self.NEITHER):
+            PGPKey.objects.create(fingerprint=fingerprint)
+
+        KeyOwnershipProof.objects.create(
+            pgp_key_id=self.OWNED,
+            profile=User.objects.create(username='paul').profile
+        )
+
+        for i, days_ago in enumerate([1, 2, UPDATES_WINDOW.days + 1]):
+            KeyUpdate.objects.create(
+                sks_hash='hash-{}'.format(i),
+                fingerprint=self.UPDATED,
+                updated_at=self.now - datetime.timedelta(days=days_ago)
+            )
+
+    def test_inputs_for_many_keys_take_two_queries(self):
+        with self.assertNumQueries(2):
+            inputs = load_schedule_inputs(
+                [self.OWNED, self.UPDATED, self.NEITHER], self.now
+            )
+
+        assert_equal(
+            {
+                self.OWNED: (True, 0),
+                self.UPDATED: (False, 2),
+                self.NEITHER: (False, 0),
+            },
+            inputs
+        )
@@ -0,0 +1,170 @@
+import datetime
+import json
+
+from importlib import import_module
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from nose.tools import assert_equal, assert_true
+
+from expirybot.apps.blacklist.models import EmailAddress
+from expirybot.apps.keys.models import PGPKey, UID
+
+# the helpers package re-exports the function `get_key`, hiding the module
+get_key_module = import_module('expirybot.apps.keys.helpers.get_key')
+
+
+class TestPGPKeyDetailView(TestCase):
+    def _make_key(self, fingerprint, num_uids):
+        key = PGPKey.objects.create(
+            fingerprint=fingerprint,
+            last_synced=timezone.now(),
+            creation_date=datetime.date(2014, 10, 31),
+        )
+
+        for i in range(num_uids):
+            email_address = EmailAddress.objects.create(
+                email_address='{}-{}@example.com'.format(fingerprint[:4], i)
+            )
+            UID.objects.create(
+                key=key,
+                uid_string='Paul <{}>'.format(email_address.email_address),
+                email_address=email_address
+            )
+
+        return key
+
+    def _count_queries(self, key):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/key/{}/'.format(key.zero_x_fingerprint)
+            )
+
+        assert_equal(200, response.status_code)
+        return len(queries)
+
+    def test_number_of_queries_does_not_depend_on_uids(self):
+        one_uid = self._make_key(
+            'A999B7498D1A8DC473E53C92309F635DAD1B5517', 1
+        )
+        ten_uids = self._make_key(
+            '5FDFCA89258063B2EB446CFE76027EB8C2DF6381', 10
+        )
+
+        assert_equal(
+            self._count_queries(one_uid), self._count_queries(ten_uids)
+        )
+
+
+class TestStaleWhileRevalidate(TestCase):
+    FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+
+    def setUp(self):
+        self.last_synced = timezone.now() - datetime.timedelta(days=1)
+
+        PGPKey.objects.create(
+            fingerprint=self.FINGERPRINT,
+            last_synced=self.last_synced,
+            creation_date=datetime.date(2014, 10, 31),
+        )
+
+    @patch('expirybot.apps.keys.views.refresh_in_background')
+    @patch.object(get_key_module, 'sync_key')
+    @patch.object(get_key_module, 'refresh_in_background')
+    def test_stale_key_is_served_and_refreshed_in_background(
+            self, refresh_in_background, sync_key, _):
+
+        response = self.client.get('/key/0x{}/'.format(self.FINGERPRINT))
+
+        assert_equal(200, response.status_code)
+        refresh_in_background.assert_called_once_with(
+            self.FINGERPRINT, datetime.timedelta(minutes=2)
+        )
+        assert_equal(0, sync_key.call_count)
+
+    def test_status(self):
+        response = self.client.get(
+            '/key/0x{}/status.json'.format(self.FINGERPRINT)
+        )
+
+        assert_equal(200, response.status_code)
+        assert_equal(
+            {
+                'fingerprint': self.FINGERPRINT,
+                'last_synced': self.last_synced.isoformat(),
+                'refreshing': False,
+            },
+            json.loads(response.content.decode('utf-8'))
+        )
+
+
+class TestKeyFragmentCache(TestCase):
+    FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+
+    def setUp(self):
+        cache.clear()
+
+        self.key = PGPKey.objects.create(
+            fingerprint=self.FINGERPRINT,
+            last_synced=timezone.now(),
+            creation_date=datetime.date(2014, 10, 31),
+        )
+        UID.objects.create(key=self.key, uid_string='Paul <p@example.com>')
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/key/0x{}/'.format(self.FINGERPRINT))
+
+        assert_equal(200, response.status_code)
+        return response.content.decode('utf-8'), len(queries)
+
+    def test_second_view_does_not_query_uids_and_subkeys(self):
+        _, first_queries = self._get()
+        _, second_queries = self._get()
+
+        assert_true(second_queries < first_queries)
+
+    def test_sync_replaces_cached_fragment(self):
+        self._get()
+
+        UID.objects.create(key=self.key, uid_string='New <new@example.com>')
+        self.key.last_synced = timezone.now()
+        self.key.save()
+
+        content, _ = self._get()
+        assert_true('New &lt;new@example.com&gt;' in content)
+
+
+class TestConditionalGet(TestCase):
+    FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+    URL = '/key/0x{}/'.format(FINGERPRINT)
+
+    def setUp(self):
+        self.key = PGPKey.objects.create(
+            fingerprint=self.FINGERPRINT,
+            last_synced=timezone.now(),
+            creation_date=datetime.date(2014, 10, 31),
+        )
+
+    def test_unchanged_key_is_not_modified(self):
+        etag = self.client.get(self.URL)['ETag']
+
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert_equal(304, response.status_code)
+
+    def test_synced_key_is_rendered(self):
+        etag = self.client.get(self.URL)['ETag']
+
+        self.key.last_synced = timezone.now()
+        self.key.save()
+
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert_equal(200, response.status_code)
+        assert_true(response['ETag'] != etag)
@@ -1,6 +1,8 @@
 from django.conf.urls import url
 
-from .views import PGPKeyDetailView, KeyTestResultView, TestPGPKeyView
+from .views import (
+    PGPKeyDetailView, PGPKeyStatusView, KeyTestResultView, TestPGPKeyView
+)
 
 V4_FINGERPRINT_PATTERN = "[A-Z0-9]{40}"
 V3_FINGERPRINT_PATTERN = "[A-Z0-9]{16}"
@@ -27,6 +29,18 @@ urlpatterns = [
         name='keys.key-detail'
     ),
 
+    url(
+        r'^key/0x(?P<pk>' + V4_FINGERPRINT_PATTERN + ')/status.json$',
+        PGPKeyStatusView.as_view(),
+        name='keys.key-status'
+    ),
+
+    url(
+        r'^key/0x(?P<pk>' + V3_FINGERPRINT_PATTERN + ')/status.json$',
+        PGPKeyStatusView.as_view(),
+        name='keys.key-status'
+    ),
+
     url(
         r'^test-pgp-key/$',
         TestPGPKeyView.as_view(),
@@ -1,53 +1,141 @@
 import datetime
 import logging
 
-from django.views.generic import TemplateView
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.generic import TemplateView, View
 from django.views.generic import DetailView
 from django.views.generic.edit import FormView
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse
 
 from expirybot.apps.keys.helpers import (
-    get_key, NoSuchKeyError, KeyParsingError
+    get_key_stale_while_revalidate, NoSuchKeyError, KeyParsingError
+)
+from expirybot.apps.keys.helpers.background_refresh import (
+    is_refreshing, refresh_in_background
+)
+from expirybot.apps.keys.helpers.fragment_cache import (
+    alerts_digest, render_key_fragments
 )
 from expirybot.apps.users.forms import MonitorEmailAddressForm
 
-from .models import KeyTestResult
+from .models import KeyTestResult, PGPKey
 from .forms import PublicKeyForm
 
 
 LOG = logging.getLogger(__name__)
 
+KEY_PAGE_MAX_STALENESS = datetime.timedelta(minutes=2)
+
+
+def key_page_validators(request, pk):
+    """
+    Return (ETag, Last-Modified) for an anonymous visitor's key page, from
+    `last_synced` and the alerts, so an unchanged page gets a 304 without
+    being rendered. A stale key is refreshed in the background, just as if
+    the page had been rendered.
+
+    Logged-in users see their email address on the page, and new keys have
+    to be fetched, so for those return (None, None): no conditional GET.
+    """
+
+    if hasattr(request, '_key_page_validators'):  # etag & last_modified
+        return request._key_page_validators
+
+    validators = (None, None)
+
+    if request.user.is_anonymous():
+        try:
+            last_synced, alerts_json = PGPKey.objects.values_list(
+                'last_synced', 'alerts_json'
+            ).get(fingerprint=pk)
+
+        except PGPKey.DoesNotExist:
+            last_synced = None
+
+        if last_synced is not None:
+            if timezone.now() - last_synced > KEY_PAGE_MAX_STALENESS:
+                refresh_in_background(pk, KEY_PAGE_MAX_STALENESS)
+
+            validators = (
+                '{}-{}-{}'.format(
+                    pk, last_synced.isoformat(), alerts_digest(alerts_json)
+                ),
+                last_synced,
+            )
+
+    request._key_page_validators = validators
+    return validators
+
 
+def key_page_etag(request, pk):
+    return key_page_validators(request, pk)[0]
+
+
+def key_page_last_modified(request, pk):
+    return key_page_validators(request, pk)[1]
+
+
+@method_decorator(
+    condition(
+        etag_func=key_page_etag, last_modified_func=key_page_last_modified
+    ),
+    name='get'
+)
 class PGPKeyDetailView(TemplateView):
     template_name = 'keys/pgp_key_detail.html'
 
     def get(self, *args, **kwargs):
 
         fingerprint = self.kwargs['pk']
-        two_minutes = datetime.timedelta(minutes=2)
 
         try:
-            pgp_key = get_key(fingerprint, max_staleness=two_minutes)
+            pgp_key, refreshing = get_key_stale_while_revalidate(
+                fingerprint, max_staleness=KEY_PAGE_MAX_STALENESS
+            )
 
         except (NoSuchKeyError, KeyParsingError):
             return HttpResponse(status=404)  # TODO - improve this UX
 
-        alerts = pgp_key.alerts
-
-        danger = list(filter(lambda a: a.severity == 'danger', alerts))
-        warning = list(filter(lambda a: a.severity == 'warning', alerts))
+        fragments = render_key_fragments(pgp_key)
 
         return self.render_to_response(
             {
                 'key': pgp_key,
-                'danger_alerts': danger,
-                'warning_alerts': warning,
+                'alerts_html': fragments['alerts_html'],
+                'key_html': fragments['key_html'],
                 'form': MonitorEmailAddressForm(),
+                'refreshing': refreshing,
             }
         )
 
 
+class PGPKeyStatusView(View):
+    """
+    Lets the key page poll for the end of a background refresh: when
+    `last_synced` changes, the page reloads.
+    """
+
+    def get(self, *args, **kwargs):
+        fingerprint = self.kwargs['pk']
+
+        try:
+            last_synced = PGPKey.objects.values_list(
+                'last_synced', flat=True
+            ).get(fingerprint=fingerprint)
+
+        except PGPKey.DoesNotExist:
+            return JsonResponse({'error': 'not found'}, status=404)
+
+        return JsonResponse({
+            'fingerprint': fingerprint,
+            'last_synced': last_synced.isoformat() if last_synced else None,
+            'refreshing': is_refreshing(fingerprint),
+        })
+
+
 class TestPGPKeyView(FormView):
     template_name = 'keys/test_pgp_key.html'
     form_class = PublicKeyForm
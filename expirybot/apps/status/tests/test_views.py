@@ -0,0 +1,49 @@
+from django.test import TestCase
+
+from nose.tools import assert_equal, assert_false
+
+from expirybot.apps.status.models import EventLatestOccurrence
+from expirybot.apps.status.views import run_tests
+
+EVENT_SLUGS = (
+    'api-call-unsubscribe-url',
+    'monitor-email-addresses-succeeded',
+    'sync-mailgun-suppressions-succeeded',
+    'sync-mailgun-no-mx-domains-succeeded',
+    'delete-old-test-results-succeeded',
+    'recompute-alerts-succeeded',
+    'send-expiry-reminders-succeeded',
+    'drain-outbox-succeeded',
+    'delete-unconfirmed-users-succeeded',
+)
+
+
+class TestStatusView(TestCase):
+    URL = '/_status/'
+
+    def _record_all_events(self):
+        for event_slug in EVENT_SLUGS:
+            EventLatestOccurrence.record_event(event_slug)
+
+    def test_every_check_has_an_event(self):
+        self._record_all_events()
+
+        assert_equal(
+            [], [test['slug'] for test in run_tests() if not test['pass']]
+        )
+
+    def test_unchanged_passing_status_is_not_modified(self):
+        self._record_all_events()
+        etag = self.client.get(self.URL)['ETag']
+
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert_equal(304, response.status_code)
+
+    def test_failing_status_is_never_not_modified(self):
+        response = self.client.get(
+            self.URL, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        assert_equal(500, response.status_code)
+        assert_false(response.has_header('ETag'))
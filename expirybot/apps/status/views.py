@@ -1,13 +1,57 @@
 import datetime
 from datetime import timedelta
 
-from django.views.generic import TemplateView
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.generic import TemplateView
 
 from expirybot.apps.keys.models import BrokenKey, KeyUpdate, PGPKey
 from .models import EventLatestOccurrence
 
 
+def status_validators(request):
+    """
+    Return (ETag, Last-Modified) for the status page, computed once per
+    request from one query for the events.
+
+    Last-Modified is the latest of the newest event and the start of this
+    minute: checks can start failing just because time has passed, so the
+    page is considered to change at least once a minute. A 304 skips the
+    counts. While any check fails return (None, None), so a poller always
+    sees the 500 rather than a 304.
+    """
+
+    if hasattr(request, '_status_validators'):
+        return request._status_validators
+
+    events = load_events()
+    validators = (None, None)
+
+    if all(test['pass'] for test in run_tests(events)):
+        this_minute = timezone.now().replace(second=0, microsecond=0)
+        last_modified = max([this_minute] + list(events.values()))
+
+        validators = (
+            'status-{}'.format(last_modified.isoformat()), last_modified
+        )
+
+    request._status_validators = validators
+    return validators
+
+
+def status_etag(request):
+    return status_validators(request)[0]
+
+
+def status_last_modified(request):
+    return status_validators(request)[1]
+
+
+@method_decorator(
+    condition(etag_func=status_etag, last_modified_func=status_last_modified),
+    name='get'
+)
 class StatusView(TemplateView):
     template_name = 'status/status.html'
 
@@ -23,7 +67,7 @@ class StatusView(TemplateView):
         return self.render_to_response({
             'num_keys': num_keys,
             'num_broken_keys': num_broken_keys,
-            'tests': run_tests(),
+            'tests': test_results,
             # 'daily_histogram': make_daily_histogram(),
             'daily_histogram': [],
         }, status=status)
@@ -63,53 +107,86 @@ def last_30_days():
         yield day
 
 
-def run_tests():
+def load_events():
+    """
+    Return {event slug: last occurred datetime} for every event.
+    """
+    return dict(EventLatestOccurrence.objects.values_list(
+        'event_slug', 'last_occurred_datetime'
+    ))
+
+
+def run_tests(events=None):
+    events = load_events() if events is None else events
+
     return [
         {
             'slug': 'expirybot-requested-unsubscribe-urls-recently',
             'pass': _check_event_occurred_within(
-                'api-call-unsubscribe-url', timedelta(hours=24)
+                events, 'api-call-unsubscribe-url', timedelta(hours=24)
             ),
         },
         {
             'slug': 'monitor-email-addresses-ran-recently',
             'pass': _check_event_occurred_within(
-                'monitor-email-addresses-succeeded', timedelta(minutes=5)
+                events, 'monitor-email-addresses-succeeded',
+                timedelta(minutes=5)
             ),
         },
         {
             'slug': 'sync-mailgun-suppressions-ran-recently',
             'pass': _check_event_occurred_within(
-                'sync-mailgun-suppressions-succeeded', timedelta(hours=2)
+                events, 'sync-mailgun-suppressions-succeeded',
+                timedelta(hours=2)
             ),
         },
         {
             'slug': 'sync-mailgun-no-mx-domains-ran-recently',
             'pass': _check_event_occurred_within(
-                'sync-mailgun-no-mx-domains-succeeded', timedelta(hours=26)
+                events, 'sync-mailgun-no-mx-domains-succeeded',
+                timedelta(hours=26)
             ),
         },
         {
             'slug': 'delete-old-test-results-ran-recently',
             'pass': _check_event_occurred_within(
-                'delete-old-test-results-succeeded', timedelta(hours=2)
+                events, 'delete-old-test-results-succeeded', timedelta(hours=2)
+            ),
+        },
+        {
+            'slug': 'recompute-alerts-ran-recently',
+            'pass': _check_event_occurred_within(
+                events, 'recompute-alerts-succeeded', timedelta(hours=26)
+            ),
+        },
+        {
+            'slug': 'send-expiry-reminders-ran-recently',
+            'pass': _check_event_occurred_within(
+                events, 'send-expiry-reminders-succeeded', timedelta(hours=26)
+            ),
+        },
+        {
+            'slug': 'drain-outbox-ran-recently',
+            'pass': _check_event_occurred_within(
+                events, 'drain-outbox-succeeded', timedelta(minutes=10)
             ),
         },
         {
             'slug': 'delete-unconfirmed-users-succeeded-recently',
             'pass': _check_event_occurred_within(
-                'delete-unconfirmed-users-succeeded', timedelta(hours=26)
+                events, 'delete-unconfirmed-users-succeeded',
+                timedelta(hours=26)
             ),
         },
     ]
 
 
-def _check_event_occurred_within(event_slug, max_delta):
+def _check_event_occurred_within(events, event_slug, max_delta):
     try:
-        occurrence = EventLatestOccurrence.objects.get(event_slug=event_slug)
-    except EventLatestOccurrence.DoesNotExist:
+        last_occurred_datetime = events[event_slug]
+    except KeyError:
         return False
 
     now = timezone.now()
-    delta = now - occurrence.last_occurred_datetime
+    delta = now - last_occurred_datetime
     return delta < max_delta
@@ -4,10 +4,26 @@ from django.contrib.auth.models import User
 
 from .models import (
     UserProfile, EmailAddressOwnershipProof, KeyOwnershipProof,
-    SearchResultForKeysByEmail
+    SearchResultForKeysByEmail, OutboxEmail
 )
 
 
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at',
+        'template_fn',
+        'to_address',
+        'status',
+        'attempts',
+        'sent_at',
+    )
+
+    list_filter = ('status', 'template_fn')
+
+    search_fields = ('to_address',)
+
+
 @admin.register(SearchResultForKeysByEmail)
 class SearchResultForKeysByEmailAdmin(admin.ModelAdmin):
     list_display = (
@@ -9,6 +9,8 @@ from expirybot.apps.blacklist.utils import (
     allow_send_email, make_authenticated_unsubscribe_url
 )
 
+from . import outbox
+
 LOG = logging.getLogger(__name__)
 
 
@@ -64,7 +66,28 @@ def send_login_email(email_address, login_url):
     )
 
 
-def send_email(email_address, template_fn, context, cc_admin=False):
+def queue_expiry_reminder_email(email_address, keys, idempotency_key):
+    """
+    The caller must have checked the address isn't blacklisted. The email is
+    sent by the next `drain_outbox`.
+    """
+    queue_email(
+        email_address,
+        'expiry_reminder',
+        {
+            'keys': keys,
+        },
+        idempotency_key=idempotency_key,
+        send_on_commit=False,
+    )
+
+
+def send_email(email_address, template_fn, context, cc_admin=False,
+               idempotency_key=None):
+    """
+    Queue the email in the outbox, to be sent once the current transaction
+    (if any) commits. See expirybot.apps.users.outbox
+    """
     assert isinstance(email_address, str), type(email_address)
     LOG.info('Sending email {} : {} context={}'.format(
         email_address, template_fn, context
@@ -76,6 +99,30 @@ def send_email(email_address, template_fn, context, cc_admin=False):
                 email_address)
         )
 
+    queue_email(
+        email_address, template_fn, context, cc_admin,
+        idempotency_key=idempotency_key,
+    )
+
+
+def queue_email(email_address, template_fn, context, cc_admin=False,
+                idempotency_key=None, send_on_commit=True):
+    """
+    Like `send_email` without checking the blacklist.
+    """
+    return outbox.enqueue(
+        make_email(email_address, template_fn, context, cc_admin),
+        template_fn,
+        idempotency_key=idempotency_key,
+        send_on_commit=send_on_commit,
+    )
+
+
+def make_email(email_address, template_fn, context, cc_admin=False):
+    """
+    Render the email without sending it, or checking the blacklist.
+    """
+
     body_template = loader.get_template(
         'email/{}_body.txt'.format(template_fn)
     )
@@ -108,9 +155,8 @@ def send_email(email_address, template_fn, context, cc_admin=False):
     else:
         bcc_list = []
 
-    email = EmailMessage(
+    return EmailMessage(
         subject, body, from_address, recipient_list,
         bcc_list,
         reply_to=['paul@paulfurley.com'],
     )
-    email.send()
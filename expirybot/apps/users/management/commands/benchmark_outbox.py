@@ -0,0 +1,75 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expirybot.apps.users.email_helpers import make_email
+from expirybot.apps.users.outbox import drain_outbox, enqueue
+from expirybot.libs.smtp_sink import SMTPSink
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+class Command(BaseCommand):
+    help = ('Compares sending --emails emails with a connection each (the '
+            'old way) against draining them from the outbox, to a local SMTP '
+            'sink. Outbox rows are created inside a transaction which is '
+            'rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--emails',
+            dest='num_emails',
+            type=int,
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        for line in benchmark_outbox(options['num_emails']):
+            self.stdout.write(line)
+
+
+def benchmark_outbox(num_emails):
+    messages = [
+        make_email(
+            'user-{}@example.com'.format(i),
+            'login',
+            {'login_url': 'https://www.expirybot.com/login/{}/'.format(i)}
+        )
+        for i in range(num_emails)
+    ]
+
+    with SMTPSink(keep_messages=False) as sink:
+        def connection():
+            return get_connection(SMTP_BACKEND, host=sink.host, port=sink.port)
+
+        started = time.monotonic()
+
+        for message in messages:
+            message.connection = connection()
+            message.send()
+
+        yield _report('connection per email', started, sink, num_emails)
+
+        with transaction.atomic():
+            for message in messages:
+                enqueue(message, 'login', send_on_commit=False)
+
+            started = time.monotonic()
+            num_sent, _ = drain_outbox(connection=connection())
+            assert num_sent == num_emails, (num_sent, num_emails)
+
+            yield _report('outbox', started, sink, num_emails)
+
+            transaction.set_rollback(True)
+
+
+def _report(name, started, sink, num_emails):
+    seconds = time.monotonic() - started
+    report = '{}: {:.0f} emails/s, {} connections'.format(
+        name, num_emails / seconds, sink.num_connections
+    )
+
+    sink.num_connections = 0
+    return report
@@ -0,0 +1,27 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from expirybot.apps.status.models import EventLatestOccurrence
+from expirybot.apps.users.outbox import BATCH_SIZE, drain_outbox
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Sends queued emails which are due, including retries of any '
+            'which failed')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        num_sent, num_failed = drain_outbox(options['batch_size'])
+
+        LOG.info('Sent {} emails, {} failed'.format(num_sent, num_failed))
+        EventLatestOccurrence.record_event('drain-outbox-succeeded')
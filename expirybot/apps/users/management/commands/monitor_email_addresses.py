@@ -5,7 +5,6 @@ import requests
 
 
 from django.core.management.base import BaseCommand
-from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
@@ -18,6 +17,8 @@ from expirybot.apps.users.email_helpers import (
 from expirybot.apps.blacklist.models import EmailAddress
 from expirybot.apps.status.models import EventLatestOccurrence
 
+from expirybot.libs.keyserver_client import get_keyserver_client
+
 
 LOG = logging.getLogger(__name__)
 
@@ -133,7 +134,7 @@ def compare_and_save_search_result(email_address, fingerprints_before,
         latest_search_result.save()
 
         if keys_added:
-            # Do this last to rollback transaction on fail
+            # Queued in this transaction, sent once it commits
             send_new_key_email_monitoring_email(
                 email_address.email_address,
                 keys_added
@@ -144,15 +145,7 @@ def get_set_of_fingerprints(email_address):
     assert isinstance(email_address, str)
 
     try:
-        response = requests.get(
-            '{}/pks/lookup'.format(settings.KEYSERVER_URL),
-            params={
-                'op': 'vindex',
-                'option': 'json',
-                'search': email_address,
-            },
-            timeout=30
-        )
+        response = get_keyserver_client().vindex(email_address, option='json')
     except requests.ReadTimeout:
         raise FailedToGetFingerprintsError(
             "timeout requesting keys for {}".format(email_address)
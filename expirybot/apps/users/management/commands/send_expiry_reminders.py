@@ -0,0 +1,163 @@
+import datetime
+import hashlib
+import logging
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from expirybot.apps.blacklist.utils import allow_send_email_many
+from expirybot.apps.status.models import EventLatestOccurrence
+from expirybot.apps.users.email_helpers import queue_expiry_reminder_email
+from expirybot.apps.users.models import ExpiryReminderSent, KeyOwnershipProof
+from expirybot.apps.users.outbox import drain_outbox
+
+LOG = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Emails users whose keys expire soon, if they asked to be '
+            'reminded')
+
+    def handle(self, *args, **options):
+        send_expiry_reminders()
+
+
+def send_expiry_reminders(today=None):
+    """
+    Send each user one email listing their keys which have entered a
+    reminder window (see settings.EXPIRY_REMINDER_DAYS) and haven't been
+    reminded about in that window. Return the number of emails queued.
+    """
+
+    today = today or timezone.now().date()
+    windows = sorted(settings.EXPIRY_REMINDER_DAYS)
+
+    reminders = get_due_reminders(today, windows)
+
+    allowed = allow_send_email_many(
+        set(profile.user.email for profile in reminders)
+    )
+
+    num_queued = 0
+
+    for profile, key_windows in reminders.items():
+        if not allowed[profile.user.email]:
+            LOG.info('Not reminding blacklisted {}'.format(
+                profile.user.email))
+            continue
+
+        if queue_reminder(profile, key_windows):
+            num_queued += 1
+
+    drain_outbox()  # send them over one connection
+
+    LOG.info('Queued {} expiry reminders'.format(num_queued))
+    EventLatestOccurrence.record_event('send-expiry-reminders-succeeded')
+
+    return num_queued
+
+
+def get_due_reminders(today, windows):
+    """
+    Return {profile: [(key, window_days), ...]} for reminders not yet sent.
+    """
+
+    proofs = KeyOwnershipProof.objects.filter(
+        profile__notify_expiry=True,
+        profile__user__email__gt='',
+        pgp_key__revoked=False,
+        pgp_key__expiry_date__gte=today,
+        pgp_key__expiry_date__lte=today + datetime.timedelta(
+            days=max(windows)
+        ),
+    ).select_related(
+        'pgp_key', 'profile__user'
+    ).order_by('profile_id', 'pgp_key__expiry_date')
+
+    proofs = list(proofs)
+
+    already_sent = set(
+        ExpiryReminderSent.objects.filter(
+            pgp_key_id__in=[proof.pgp_key_id for proof in proofs]
+        ).values_list('pgp_key_id', 'expiry_date', 'window_days')
+    )
+
+    reminders = OrderedDict()
+
+    for proof in proofs:
+        key = proof.pgp_key
+        window_days = reminder_window(
+            (key.expiry_date - today).days, windows
+        )
+
+        if (key.fingerprint, key.expiry_date, window_days) in already_sent:
+            continue
+
+        reminders.setdefault(proof.profile, []).append((key, window_days))
+
+    return reminders
+
+
+def reminder_window(days_left, windows):
+    """
+    The smallest window the key is in, so that if a run is missed the
+    reminder is sent late rather than not at all.
+
+    >>> reminder_window(5, [1, 7, 30])
+    7
+    """
+    return min(window for window in windows if days_left <= window)
+
+
+def queue_reminder(profile, key_windows):
+    """
+    Record the reminders as sent and queue the email in one transaction.
+    Return whether the email was queued.
+    """
+
+    try:
+        with transaction.atomic():
+            ExpiryReminderSent.objects.bulk_create([
+                ExpiryReminderSent(
+                    pgp_key=key,
+                    profile=profile,
+                    expiry_date=key.expiry_date,
+                    window_days=window_days,
+                )
+                for key, window_days in key_windows
+            ])
+
+            queue_expiry_reminder_email(
+                profile.user.email,
+                [key for key, _ in key_windows],
+                idempotency_key=reminder_idempotency_key(
+                    profile, key_windows
+                )
+            )
+
+    except IntegrityError:  # another run got there first
+        LOG.warning('Reminders for {} already sent'.format(profile))
+        return False
+
+    return True
+
+
+def reminder_idempotency_key(profile, key_windows):
+    """
+    Identify the email by exactly which reminders it carries, so that a
+    rerun which finds more keys due queues another email rather than
+    matching the one already queued.
+    """
+    reminders = sorted(
+        '{}:{}:{}'.format(key.fingerprint, key.expiry_date, window_days)
+        for key, window_days in key_windows
+    )
+
+    return 'expiry-reminder:{}:{}'.format(
+        profile.id,
+        hashlib.sha256(','.join(reminders).encode('ascii')).hexdigest()
+    )
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11 on 2026-10-18 14:05
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keys', '0031_brokenkey_error_class_backoff'),
+        ('users', '0013_fix_truncated_fingerprints_in_search_results'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpiryReminderSent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('expiry_date', models.DateField()),
+                ('window_days', models.PositiveIntegerField()),
+                ('pgp_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expiry_reminders_sent', to='keys.PGPKey')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expiry_reminders_sent', to='users.UserProfile')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='expiryremindersent',
+            unique_together=set([('pgp_key', 'expiry_date', 'window_days')]),
+        ),
+    ]
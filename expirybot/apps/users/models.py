@@ -4,6 +4,7 @@ import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
+from django.utils import timezone
 
 from django.contrib.postgres.fields import ArrayField
 
@@ -163,3 +164,103 @@ class SearchResultForKeysByEmail(models.Model):
         null=False,
         blank=True,
     )
+
+
+class ExpiryReminderSent(models.Model):
+    """
+    Records that the owner of a key has been reminded about its expiry date
+    in a given window (eg 7 days before), so a reminder is only ever sent
+    once. A key whose expiry date is extended gets reminded again.
+    """
+
+    class Meta:
+        unique_together = ('pgp_key', 'expiry_date', 'window_days')
+
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    pgp_key = models.ForeignKey(
+        PGPKey,
+        related_name='expiry_reminders_sent',
+        on_delete=models.CASCADE
+    )
+
+    profile = models.ForeignKey(
+        UserProfile,
+        related_name='expiry_reminders_sent',
+        on_delete=models.CASCADE
+    )
+
+    expiry_date = models.DateField()
+
+    window_days = models.PositiveIntegerField()
+
+    def __str__(self):
+        return '{} reminded {} days before {}'.format(
+            self.pgp_key_id, self.window_days, self.expiry_date
+        )
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent, or which has been. Emails are written here
+    in the caller's transaction and sent afterwards, see
+    expirybot.apps.users.outbox
+    """
+
+    STATUS_CHOICES = (
+        ('pending', 'pending'),
+        ('sent', 'sent'),
+        ('failed', 'failed'),
+    )
+
+    class Meta:
+        indexes = [
+            # For drain_outbox: which emails are due to be sent
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='users_outbox_due_idx'
+            ),
+        ]
+
+    idempotency_key = models.CharField(
+        max_length=200,
+        unique=True,
+        help_text="Enqueueing the same key again doesn't add another email."
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    template_fn = models.CharField(max_length=100)
+
+    from_address = models.CharField(max_length=200)
+
+    to_address = models.EmailField()
+
+    bcc = ArrayField(base_field=models.EmailField(), blank=True, default=list)
+
+    reply_to = ArrayField(
+        base_field=models.EmailField(), blank=True, default=list
+    )
+
+    subject = models.TextField()
+
+    body = models.TextField()
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return '{} to {} ({})'.format(
+            self.template_fn, self.to_address, self.status
+        )
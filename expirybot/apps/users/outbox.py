@@ -0,0 +1,231 @@
+"""
+Send emails through an outbox table (OutboxEmail).
+
+Callers enqueue an email in their own transaction (see
+email_helpers.send_email), so the email exists if and only if whatever it's
+about was committed, and no transaction waits on the mail server. Once the
+transaction commits the email is sent straight away; any which fail are
+retried, with backoff, by `manage.py drain_outbox`, which sends due emails in
+batches over one connection.
+
+Delivery is at-least-once: if a process dies after the mail server accepts an
+email but before it's marked as sent, it's sent again once its lease expires.
+Each email's Message-ID comes from its outbox row, so those duplicates can be
+recognised.
+"""
+
+import datetime
+import logging
+import uuid
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+LOG = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+MAX_ATTEMPTS = 8
+
+FIRST_RETRY_DELAY = datetime.timedelta(minutes=1)  # doubles every attempt
+
+# Longer than sending a batch could take
+LEASE_DURATION = datetime.timedelta(minutes=10)
+
+
+def enqueue(email_message, template_fn, idempotency_key=None,
+            send_on_commit=True):
+    """
+    Add the EmailMessage to the outbox, unless an email with the same
+    idempotency key is already there. With `send_on_commit`, send it as soon
+    as the current transaction commits.
+    """
+    from .models import OutboxEmail
+
+    outbox_email, created = OutboxEmail.objects.get_or_create(
+        idempotency_key=idempotency_key or str(uuid.uuid4()),
+        defaults={
+            'template_fn': template_fn,
+            'from_address': email_message.from_email,
+            'to_address': email_message.to[0],
+            'bcc': email_message.bcc,
+            'reply_to': email_message.reply_to,
+            'subject': email_message.subject,
+            'body': email_message.body,
+        }
+    )
+
+    if not created:
+        LOG.info('Already queued: {}'.format(outbox_email.idempotency_key))
+
+    elif send_on_commit:
+        transaction.on_commit(lambda: _send_after_commit(outbox_email.id))
+
+    return outbox_email
+
+
+def drain_outbox(batch_size=BATCH_SIZE, connection=None):
+    """
+    Send every email which is due, a batch at a time. Return (number sent,
+    number failed).
+    """
+    from .models import OutboxEmail
+
+    num_sent, num_failed = 0, 0
+
+    while True:
+        emails = claim_emails(OutboxEmail.objects.all(), batch_size)
+
+        if not emails:
+            break
+
+        sent, failed = send_emails(emails, connection)
+        num_sent += sent
+        num_failed += failed
+
+    return num_sent, num_failed
+
+
+def claim_emails(queryset, limit=None):
+    """
+    Lease due emails from the queryset, skipping any another process is
+    claiming, so that only we send them.
+    """
+    from .models import OutboxEmail
+
+    now = timezone.now()
+
+    with transaction.atomic():
+        due = queryset.filter(
+            status='pending',
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at').select_for_update(skip_locked=True)
+
+        emails = list(due[:limit] if limit else due)
+
+        OutboxEmail.objects.filter(id__in=[e.id for e in emails]).update(
+            next_attempt_at=now + LEASE_DURATION,
+            attempts=F('attempts') + 1,
+        )
+
+    for email in emails:
+        email.attempts += 1
+
+    return emails
+
+
+def send_emails(emails, connection=None):
+    """
+    Send the claimed emails over one connection. Return (number sent, number
+    failed).
+    """
+
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection()
+
+    try:
+        opened = connection.open()
+
+    except Exception as e:  # eg the mail server is down: retry them all
+        LOG.exception(e)
+
+        for email in emails:
+            record_failure(email, e)
+
+        return 0, len(emails)
+
+    num_sent, num_failed = 0, 0
+
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([to_email_message(email)])
+
+            except Exception as e:
+                LOG.exception(e)
+                record_failure(email, e)
+                num_failed += 1
+
+                connection.close()  # it may be broken
+                opened = _reopen(connection) or opened
+
+            else:
+                record_sent(email)
+                num_sent += 1
+
+    finally:
+        if opened:
+            connection.close()
+
+    return num_sent, num_failed
+
+
+def to_email_message(email):
+    return EmailMessage(
+        email.subject, email.body, email.from_address, [email.to_address],
+        email.bcc,
+        reply_to=email.reply_to,
+        headers={'Message-ID': message_id(email)},
+    )
+
+
+def message_id(email):
+    return '<outbox-{}.{}@mail.expirybot.com>'.format(
+        email.id, email.created_at.strftime('%Y%m%d%H%M%S')
+    )
+
+
+def record_sent(email):
+    from .models import OutboxEmail
+
+    OutboxEmail.objects.filter(id=email.id).update(
+        status='sent',
+        sent_at=timezone.now(),
+    )
+
+
+def record_failure(email, error):
+    from .models import OutboxEmail
+
+    if email.attempts >= MAX_ATTEMPTS:
+        LOG.error('Giving up on {} after {} attempts'.format(
+            email, email.attempts))
+        status = 'failed'
+
+    else:
+        status = 'pending'
+
+    OutboxEmail.objects.filter(id=email.id).update(
+        status=status,
+        next_attempt_at=timezone.now() + calculate_retry_delay(email.attempts),
+        last_error=repr(error),
+    )
+
+
+def calculate_retry_delay(attempts):
+    return FIRST_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def _reopen(connection):
+    try:
+        return connection.open()
+
+    except Exception as e:  # each send will try again
+        LOG.exception(e)
+        return False
+
+
+def _send_after_commit(outbox_email_id):
+    from .models import OutboxEmail
+
+    try:
+        send_emails(
+            claim_emails(OutboxEmail.objects.filter(id=outbox_email_id))
+        )
+
+    except Exception as e:  # drain_outbox will retry
+        LOG.exception(e)
@@ -0,0 +1,78 @@
+import datetime
+
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+
+from nose.tools import assert_equal, assert_true
+
+from expirybot.apps.users.email_helpers import make_email
+from expirybot.apps.users.models import OutboxEmail
+from expirybot.apps.users.outbox import MAX_ATTEMPTS, drain_outbox, enqueue
+
+
+def make_login_email(email_address='paul@example.com'):
+    return make_email(
+        email_address,
+        'login',
+        {'login_url': 'https://www.expirybot.com/login/abc/'}
+    )
+
+
+class TestOutbox(TestCase):
+    def test_enqueue_is_idempotent(self):
+        enqueue(make_login_email(), 'login', idempotency_key='login:1')
+        enqueue(make_login_email(), 'login', idempotency_key='login:1')
+
+        assert_equal(1, OutboxEmail.objects.count())
+
+    def test_drain_sends_due_emails(self):
+        enqueue(make_login_email('a@example.com'), 'login')
+        enqueue(make_login_email('b@example.com'), 'login')
+
+        assert_equal((2, 0), drain_outbox())
+        assert_equal(
+            [['a@example.com'], ['b@example.com']],
+            sorted(message.to for message in mail.outbox)
+        )
+        assert_equal(2, OutboxEmail.objects.filter(status='sent').count())
+
+        assert_equal((0, 0), drain_outbox())
+
+    def test_failed_email_is_retried_later(self):
+        enqueue(make_login_email(), 'login')
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.'
+                   'send_messages', side_effect=IOError('connection lost')):
+            assert_equal((0, 1), drain_outbox())
+
+        email = OutboxEmail.objects.get()
+        assert_equal('pending', email.status)
+        assert_equal(1, email.attempts)
+        assert_true(email.next_attempt_at > timezone.now())
+        assert_true('connection lost' in email.last_error)
+
+        assert_equal((0, 0), drain_outbox())  # not due yet
+
+        email.next_attempt_at = timezone.now() - datetime.timedelta(seconds=1)
+        email.save()
+
+        assert_equal((1, 0), drain_outbox())
+        assert_equal(1, len(mail.outbox))
+
+    def test_failure_to_connect_is_retried_then_gives_up(self):
+        enqueue(make_login_email(), 'login')
+
+        with patch('django.core.mail.backends.locmem.EmailBackend.open',
+                   side_effect=IOError('connection refused')):
+
+            for attempt in range(MAX_ATTEMPTS):
+                OutboxEmail.objects.update(next_attempt_at=timezone.now())
+                assert_equal((0, 1), drain_outbox())
+
+        email = OutboxEmail.objects.get()
+        assert_equal('failed', email.status)
+        assert_equal(MAX_ATTEMPTS, email.attempts)
+        assert_true('connection refused' in email.last_error)
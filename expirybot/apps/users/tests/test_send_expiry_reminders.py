@@ -0,0 +1,103 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase
+
+from nose.tools import assert_equal, assert_in
+
+from expirybot.apps.blacklist import domain_cache
+from expirybot.apps.blacklist.models import BlacklistedDomain
+from expirybot.apps.keys.models import PGPKey
+from expirybot.apps.users.models import ExpiryReminderSent, KeyOwnershipProof
+from expirybot.apps.users.management.commands.send_expiry_reminders import (
+    send_expiry_reminders
+)
+
+
+class TestSendExpiryReminders(TestCase):
+    def setUp(self):
+        self.today = datetime.date.today()
+
+    def tearDown(self):
+        domain_cache.invalidate()  # forget domains rolled back
+
+    def _own_key(self, email, fingerprint, days_left):
+        user, _ = User.objects.get_or_create(username=email, email=email)
+        key = PGPKey.objects.create(
+            fingerprint=fingerprint,
+            expiry_date=self.today + datetime.timedelta(days=days_left),
+        )
+        KeyOwnershipProof.objects.create(pgp_key=key, profile=user.profile)
+        return key
+
+    def test_one_email_per_user_listing_their_keys(self):
+        self._own_key(
+            'paul@example.com', 'A999B7498D1A8DC473E53C92309F635DAD1B5517', 5
+        )
+        self._own_key(
+            'paul@example.com', '5FDFCA89258063B2EB446CFE76027EB8C2DF6381', 20
+        )
+        self._own_key(
+            'other@example.com', 'F4B7D3F4E7A3B1C2D5E6F7A8B9C0D1E2F3A4B5C6', 2
+        )
+
+        assert_equal(2, send_expiry_reminders(self.today))
+        assert_equal(
+            [['other@example.com'], ['paul@example.com']],
+            sorted(message.to for message in mail.outbox)
+        )
+        assert_equal(
+            set([
+                ('A999B7498D1A8DC473E53C92309F635DAD1B5517', 7),
+                ('5FDFCA89258063B2EB446CFE76027EB8C2DF6381', 30),
+                ('F4B7D3F4E7A3B1C2D5E6F7A8B9C0D1E2F3A4B5C6', 7),
+            ]),
+            set(ExpiryReminderSent.objects.values_list(
+                'pgp_key_id', 'window_days'))
+        )
+
+    def test_rerun_does_not_send_again(self):
+        self._own_key(
+            'paul@example.com', 'A999B7498D1A8DC473E53C92309F635DAD1B5517', 5
+        )
+
+        send_expiry_reminders(self.today)
+        assert_equal(0, send_expiry_reminders(self.today))
+        assert_equal(1, len(mail.outbox))
+
+    def test_rerun_reminds_about_newly_due_keys(self):
+        self._own_key(
+            'paul@example.com', 'A999B7498D1A8DC473E53C92309F635DAD1B5517', 5
+        )
+        send_expiry_reminders(self.today)
+
+        self._own_key(
+            'paul@example.com', '5FDFCA89258063B2EB446CFE76027EB8C2DF6381', 20
+        )
+
+        assert_equal(1, send_expiry_reminders(self.today))
+        assert_equal(2, len(mail.outbox))
+        assert_in(
+            '5FDFCA89258063B2EB446CFE76027EB8C2DF6381',
+            mail.outbox[1].body.replace(' ', '')
+        )
+
+    def test_next_window_is_reminded(self):
+        self._own_key(
+            'paul@example.com', 'A999B7498D1A8DC473E53C92309F635DAD1B5517', 5
+        )
+
+        send_expiry_reminders(self.today)
+        send_expiry_reminders(self.today + datetime.timedelta(days=4))
+
+        assert_equal(2, len(mail.outbox))
+
+    def test_blacklisted_domain_is_skipped(self):
+        BlacklistedDomain.objects.create(domain='example.com')
+        self._own_key(
+            'paul@example.com', 'A999B7498D1A8DC473E53C92309F635DAD1B5517', 5
+        )
+
+        assert_equal(0, send_expiry_reminders(self.today))
+        assert_equal(0, ExpiryReminderSent.objects.count())
@@ -0,0 +1 @@
+from .domain_trie import DomainTrie, EXACT, SUBDOMAINS, WILDCARD
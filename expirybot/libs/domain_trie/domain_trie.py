@@ -0,0 +1,101 @@
+"""
+Match domains against rules for a domain, its subdomains, or both, using a
+trie of labels read right to left: `mail.example.com` is stored under
+com -> example -> mail. A lookup walks the domain's labels once, so it takes
+O(labels) however many rules there are.
+
+    >>> trie = DomainTrie([('example.com', SUBDOMAINS)])
+    >>> 'mail.example.com' in trie
+    True
+"""
+
+EXACT = 'exact'            # example.com only
+SUBDOMAINS = 'subdomains'  # example.com and *.example.com
+WILDCARD = 'wildcard'      # *.example.com only
+
+MATCH_TYPES = (EXACT, SUBDOMAINS, WILDCARD)
+
+_RULES = object()  # the key for a node's rules, which no label can clash with
+
+
+class DomainTrie():
+    def __init__(self, rules=()):
+        """
+        - `rules`: (domain, match type) pairs
+        """
+        self._root = {}
+        self._len = 0
+
+        for domain, match_type in rules:
+            self.add(domain, match_type)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, domain):
+        return self.match(domain) is not None
+
+    def add(self, domain, match_type=SUBDOMAINS):
+        """
+        A domain written as `*.example.com` is a WILDCARD rule whatever the
+        match type.
+        """
+
+        if domain.startswith('*.'):
+            domain, match_type = domain[2:], WILDCARD
+
+        assert match_type in MATCH_TYPES, match_type
+
+        node = self._root
+
+        for label in _labels(domain):
+            node = node.setdefault(label, {})
+
+        rules = node.setdefault(_RULES, set())
+
+        if match_type not in rules:
+            rules.add(match_type)
+            self._len += 1
+
+    def match(self, domain):
+        """
+        Return the (domain, match type) of the broadest rule matching the
+        domain, or None. A malformed domain with an empty label (eg
+        `a..example.com`) matches nothing.
+        """
+
+        labels = _labels(domain)
+
+        if not all(labels):
+            return None
+
+        node = self._root
+
+        for depth, label in enumerate(labels, 1):
+            node = node.get(label)
+
+            if node is None:
+                return None
+
+            rules = node.get(_RULES, ())
+            is_domain_itself = depth == len(labels)
+
+            for match_type in _matching_types(is_domain_itself):
+                if match_type in rules:
+                    return '.'.join(reversed(labels[:depth])), match_type
+
+        return None
+
+
+def _matching_types(is_domain_itself):
+    if is_domain_itself:
+        return (EXACT, SUBDOMAINS)
+    else:
+        return (SUBDOMAINS, WILDCARD)
+
+
+def _labels(domain):
+    """
+    'Mail.Example.com.' -> ['com', 'example', 'mail']
+    """
+    return domain.lower().rstrip('.').split('.')[::-1]
@@ -0,0 +1,65 @@
+from nose.tools import assert_equal, assert_false, assert_true
+
+from .domain_trie import DomainTrie, EXACT, SUBDOMAINS, WILDCARD
+
+
+def test_exact_matches_only_the_domain():
+    trie = DomainTrie([('example.com', EXACT)])
+
+    assert_true('example.com' in trie)
+    assert_false('mail.example.com' in trie)
+    assert_false('com' in trie)
+
+
+def test_subdomains_matches_domain_and_subdomains():
+    trie = DomainTrie([('example.com', SUBDOMAINS)])
+
+    assert_true('example.com' in trie)
+    assert_true('mail.example.com' in trie)
+    assert_true('a.b.example.com' in trie)
+    assert_false('notexample.com' in trie)
+
+
+def test_wildcard_matches_only_subdomains():
+    trie = DomainTrie([('*.example.invalid', EXACT)])
+
+    assert_false('example.invalid' in trie)
+    assert_true('mail.example.invalid' in trie)
+    assert_equal(
+        ('example.invalid', WILDCARD), trie.match('x.example.invalid')
+    )
+
+
+def test_broadest_rule_is_returned():
+    trie = DomainTrie([
+        ('mail.example.com', EXACT),
+        ('example.com', SUBDOMAINS),
+    ])
+
+    assert_equal(
+        ('example.com', SUBDOMAINS), trie.match('mail.example.com')
+    )
+
+
+def test_case_and_trailing_dot_are_ignored():
+    trie = DomainTrie([('Example.COM', EXACT)])
+
+    assert_true('example.com.' in trie)
+
+
+def test_len_counts_rules():
+    trie = DomainTrie([
+        ('example.com', EXACT),
+        ('example.com', WILDCARD),
+        ('example.com', EXACT),
+    ])
+
+    assert_equal(2, len(trie))
+
+
+def test_empty_labels_match_nothing():
+    trie = DomainTrie([('example.com', EXACT), ('example.org', SUBDOMAINS)])
+
+    for domain in ('.example.com', 'a..example.com', '', '.',
+                   'a..example.org', 'example..org'):
+        assert_equal(None, trie.match(domain))
@@ -1 +1,5 @@
-from .gpg_wrapper import parse_public_key, encrypt_message, GPGError, GPGFatalProblemWithKey
+from .gpg_wrapper import (
+    parse_public_key, parse_public_key_binary, parse_public_keys,
+    encrypt_message, GPGError, GPGFatalProblemWithKey
+)
+from .worker_pool import get_worker_pool, configure_worker_pool
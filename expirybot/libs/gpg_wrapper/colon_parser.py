@@ -0,0 +1,223 @@
+"""
+Parse `gpg --list-keys --with-colons` output.
+
+Unlike the human-readable output, the colon format is documented and stable
+(see doc/DETAILS in the GnuPG source) and doesn't depend on keyid-format or
+locale settings in gpg.conf. It's parsed in a single pass, splitting each line
+on ':' and dispatching on the record type.
+"""
+
+import datetime
+import re
+
+from expirybot.apps.keys.models import CryptographicKey
+
+# Record fields, 0-indexed (doc/DETAILS numbers them from 1)
+TYPE = 0
+VALIDITY = 1
+LENGTH_BITS = 2
+ALGORITHM = 3
+LONG_ID = 4
+CREATED = 5
+EXPIRES = 6
+USER_ID = 9
+FINGERPRINT = 9
+KEY_FLAGS = 11
+ECC_CURVE = 16
+
+ALGORITHMS_WITH_BITS = {
+    '1': 'RSA',
+    '2': 'RSA',
+    '3': 'RSA',
+    '16': 'ELGAMAL',
+    '17': 'DSA',
+    '20': 'ELGAMAL',
+}
+
+ECC_ALGORITHMS = frozenset(['18', '19', '22'])  # ECDH, ECDSA, EdDSA
+
+ECC_CURVES = frozenset(dict(CryptographicKey.ECC_CURVE_CHOICES).keys())
+
+VALIDITY_NAMES = {
+    'o': 'unknown',
+    'i': 'invalid',
+    'd': 'disabled',
+    'r': 'revoked',
+    'e': 'expired',
+    '-': 'unknown',
+    'q': 'undefined',
+    'n': 'never',
+    'm': 'marginal',
+    'f': 'full',
+    'u': 'ultimate',
+    'w': 'well-known',
+    's': 'special',
+}
+
+UNUSABLE_UID_VALIDITIES = frozenset(['r', 'e', 'i'])
+
+# Same order as gpg's human-readable output, eg [SC]
+CAPABILITY_ORDER = ('s', 'c', 'e', 'a')
+
+ESCAPE_PATTERN = re.compile(r'\\x([0-9a-fA-F]{2})')
+
+
+class ColonParseError(ValueError):
+    pass
+
+
+def parse_colon_key(list_keys_output):
+    """
+    Parse output which should contain exactly one key. Return a dict with the
+    same fields as `gpg_wrapper.parse_list_keys`, plus:
+
+    - created_timestamp, expiry_timestamp: exact, timezone-aware datetimes
+    - key_flags:   gpg's key capabilities field, eg `scESC`
+    - uid_details: every UID, including unusable ones, with its validity
+    - subkeys:     each also has a fingerprint, timestamps and key_flags
+    """
+
+    keys = parse_colon_keys(list_keys_output)
+
+    if len(keys) != 1:
+        raise ColonParseError('Expected 1 key, got {}: {}'.format(
+            len(keys), [k['fingerprint'] for k in keys]))
+
+    return keys[0]
+
+
+def parse_colon_keys(list_keys_output):
+    """
+    Parse output containing any number of keys, returning a list of dicts
+    (see `parse_colon_key`) in the order gpg listed them.
+    """
+
+    keys = []
+    current_key = None
+    last_pub_or_sub = None
+
+    for line_number, line in enumerate(list_keys_output.split('\n'), 1):
+        fields = line.split(':')
+        record_type = fields[TYPE]
+
+        try:
+            if record_type == 'pub':
+                current_key = _parse_pub_or_sub(fields)
+                current_key['uids'] = []
+                current_key['uid_details'] = []
+                current_key['subkeys'] = []
+
+                keys.append(current_key)
+                last_pub_or_sub = current_key
+
+            elif record_type == 'fpr':
+                if last_pub_or_sub is not None:
+                    last_pub_or_sub['fingerprint'] = fields[FINGERPRINT]
+                    last_pub_or_sub = None  # ignore any repeated fpr
+
+            elif record_type == 'uid':
+                _add_uid(current_key, fields)
+
+            elif record_type == 'sub':
+                subkey = _parse_pub_or_sub(fields)
+                current_key['subkeys'].append(subkey)
+                last_pub_or_sub = subkey
+
+        except (AttributeError, IndexError, KeyError, TypeError,
+                ValueError) as e:
+            raise ColonParseError('Line {}: {} `{}`'.format(
+                line_number, repr(e), line))
+
+    for key in keys:
+        if 'fingerprint' not in key:
+            raise ColonParseError('No fingerprint for key {}'.format(
+                key['long_id']))
+
+    return keys
+
+
+def _parse_pub_or_sub(fields):
+    validity = fields[VALIDITY]
+    created = _parse_timestamp(fields[CREATED])
+    expires = _parse_timestamp(fields[EXPIRES])
+    revoked = validity == 'r'
+
+    if revoked:
+        expires = None  # like the human-readable output: [revoked: ...]
+
+    result = {
+        'long_id': fields[LONG_ID],
+        'created_date': created.date(),
+        'expiry_date': expires.date() if expires else None,
+        'revoked': revoked,
+        'capabilities': _parse_capabilities(fields[KEY_FLAGS]),
+        'created_timestamp': created,
+        'expiry_timestamp': expires,
+        'key_flags': fields[KEY_FLAGS],
+    }
+
+    result.update(_parse_algorithm(
+        fields[ALGORITHM], fields[LENGTH_BITS], fields[ECC_CURVE]
+    ))
+
+    return result
+
+
+def _add_uid(key, fields):
+    uid = _unescape(fields[USER_ID])
+    validity = fields[VALIDITY]
+
+    key['uid_details'].append({
+        'uid': uid,
+        'validity': VALIDITY_NAMES.get(validity, validity),
+    })
+
+    if validity not in UNUSABLE_UID_VALIDITIES:
+        key['uids'].append(uid)
+
+
+def _parse_algorithm(algorithm_id, length_bits, ecc_curve):
+    if algorithm_id in ECC_ALGORITHMS and ecc_curve in ECC_CURVES:
+        return {
+            'algorithm': 'ECC',
+            'ecc_curve': ecc_curve,
+            'length_bits': None,
+        }
+
+    elif algorithm_id in ALGORITHMS_WITH_BITS:
+        return {
+            'algorithm': ALGORITHMS_WITH_BITS[algorithm_id],
+            'length_bits': int(length_bits),
+            'ecc_curve': None,
+        }
+
+    else:
+        return {
+            'algorithm': '',  # blank means unknown
+            'ecc_curve': '',  # blank means unknown
+            'length_bits': None
+        }
+
+
+def _parse_capabilities(key_flags):
+    """
+    Lowercase letters are this key's own capabilities, uppercase are for the
+    key as a whole (primary key only). Return eg ['S', 'C'] for `scESC`.
+    """
+    return [c.upper() for c in CAPABILITY_ORDER if c in key_flags]
+
+
+def _parse_timestamp(timestamp):
+    if not timestamp:
+        return None
+
+    return datetime.datetime.fromtimestamp(
+        int(timestamp), datetime.timezone.utc
+    )
+
+
+def _unescape(user_id):
+    """
+    gpg escapes ':' and control characters in user IDs as eg `\\x3a`.
+    """
+    return ESCAPE_PATTERN.sub(lambda m: chr(int(m.group(1), 16)), user_id)
@@ -8,9 +8,13 @@ import re
 from os.path import abspath, dirname, join as pjoin
 import os
 
-from django.conf import settings
+import requests
+
 
 from expirybot.apps.keys.models import CryptographicKey
+from expirybot.libs.keyserver_client import get_keyserver_client
+
+from .colon_parser import parse_colon_keys
 
 
 LOG = logging.getLogger(__name__)
@@ -31,29 +35,157 @@ class GPGFatalProblemWithKey(RuntimeError):
 
 
 def parse_public_key(pgp_key_filename):
-    list_keys, list_packets = run_dump_key(pgp_key_filename)
+    return _parse_single_key(*run_dump_key(pgp_key_filename))
+
+
+def parse_public_key_binary(ascii_key_binary):
+    """
+    Like `parse_public_key`, but for an ASCII-armored key given as bytes. The
+    key is piped into gpg, so nothing is written to disk.
+    """
+    return _parse_single_key(*run_dump_keys(ascii_key_binary))
 
+
+def _parse_single_key(list_keys, list_packets):
     parsed = {}
 
-    parsed.update(parse_list_keys(list_keys))
+    keys = parse_colon_keys(list_keys)
+
+    if len(keys) == 0:
+        raise GPGFatalProblemWithKey(
+            'gpg did not import the key (no valid user IDs?)')
+
+    elif len(keys) > 1:
+        raise GPGError('Expected 1 key, got {}'.format(
+            [k['fingerprint'] for k in keys]))
+
+    parsed.update(keys[0])
     parsed.update(parse_list_packets(list_packets))
 
     return parsed
 
 
+def parse_public_keys(ascii_keys):
+    """
+    Parse many keys with a single gpg import, rather than one per key.
+
+    - `ascii_keys` maps each expected fingerprint to its ASCII-armored key
+                   (bytes)
+
+    Return a dict mapping each of those fingerprints to either the parsed key
+    (as `parse_public_key`) or, if gpg refused to import that key (eg no valid
+    user IDs), a GPGFatalProblemWithKey.
+
+    Raises GPGError if gpg itself fails, since then no key can be trusted.
+    """
+    list_keys, list_packets = run_dump_keys(
+        b'\n'.join(ascii_keys.values()),
+        timeout=5 + len(ascii_keys) // 10
+    )
+
+    try:
+        parsed_by_fingerprint = {
+            k['fingerprint']: k for k in parse_colon_keys(list_keys)
+        }
+
+    except ValueError as e:
+        raise GPGError('Failed to parse gpg --list-keys: {}'.format(repr(e)))
+
+    list_packets_by_long_id = split_list_packets(list_packets)
+
+    results = {}
+
+    for fingerprint in ascii_keys:
+        normalised = fingerprint.replace(' ', '').upper()
+
+        if normalised in parsed_by_fingerprint:
+            parsed = parsed_by_fingerprint[normalised]
+            parsed.update(parse_list_packets(
+                list_packets_by_long_id.get(normalised[-16:], '')
+            ))
+            results[fingerprint] = parsed
+
+        else:
+            e = GPGFatalProblemWithKey(
+                'gpg did not import {} (no valid user IDs?)'.format(
+                    normalised))
+
+            LOG.warning('Failed to parse {}: {}'.format(fingerprint, repr(e)))
+            results[fingerprint] = e
+
+    return results
+
+
+def split_list_packets(list_packets):
+    """
+    Split `gpg --list-packets` output for many keys into a dict of
+    primary key long ID -> packets for just that key.
+    """
+
+    result = {}
+    lines = []
+
+    def add_key(lines):
+        for line in lines:
+            match = re.match(r'^\s+keyid: (?P<long_id>[0-9A-F]{16})$', line)
+
+            if match is not None:
+                result[match.group('long_id')] = '\n'.join(lines) + '\n'
+                return
+
+    for line in list_packets.split('\n'):
+        if line.startswith(':public key packet:'):
+            add_key(lines)
+            lines = []
+
+        lines.append(line)
+
+    add_key(lines)
+
+    return result
+
+
 def run_dump_key(pgp_key_filename):
-    dump_key_stdout = stdout_for_subprocess([DUMP_KEY, pgp_key_filename])
+    from .worker_pool import get_worker_pool  # avoid circular import
 
-    match = re.search('LIST_KEYS: (?P<list_keys>.*)\n'
-                      'LIST_PACKETS: (?P<list_packets>.*)\n', dump_key_stdout)
+    pool = get_worker_pool()
 
-    with io.open(match.group('list_keys'), 'r') as f:
-        list_keys = f.read()
+    if pool is not None:
+        return pool.dump_key(pgp_key_filename)
 
-    with io.open(match.group('list_packets'), 'r') as f:
-        list_packets = f.read()
+    with io.open(pgp_key_filename, 'rb') as f:
+        return _run_dump_key_script(f.read())
 
-    return list_keys, list_packets
+
+def run_dump_keys(keys_binary, timeout=5):
+    """
+    Like `run_dump_key` but for a bytestring of (possibly many) keys, which
+    is piped into gpg rather than written to a file.
+    """
+    from .worker_pool import get_worker_pool  # avoid circular import
+
+    pool = get_worker_pool()
+
+    if pool is not None:
+        return pool.dump_keys(keys_binary, timeout=timeout)
+
+    return _run_dump_key_script(keys_binary, timeout=timeout)
+
+
+def _run_dump_key_script(keys_binary, timeout=5):
+    dump_key_stdout = stdout_for_subprocess(
+        [DUMP_KEY], stdin=keys_binary, timeout=timeout
+    )
+
+    match = re.match('^LIST_KEYS:\n(?P<list_keys>.*)'
+                     '^LIST_PACKETS:\n(?P<list_packets>.*)$',
+                     dump_key_stdout, re.MULTILINE | re.DOTALL)
+
+    if match is None:
+        raise GPGError('Unexpected dump_key output: {}'.format(
+            dump_key_stdout))
+
+    return match.group('list_keys'), match.group('list_packets')
 
 
 def encrypt_message(fingerprint, text):
@@ -62,14 +194,56 @@ def encrypt_message(fingerprint, text):
 
 
 def _receive_key(fingerprint):
+    """
+    Fetch the key with the shared keyserver client (rather than
+    `gpg --recv-key`, which opens a new connection every time) and import it.
+
+    Like `gpg --recv-key`, refuse to import anything but the requested key,
+    so that a keyserver can't add a different key to the keyring used for
+    encrypting.
+    """
     LOG.info('receiving key {}'.format(fingerprint))
+
+    try:
+        response = get_keyserver_client().get_key('0x{}'.format(fingerprint))
+        response.raise_for_status()
+
+    except requests.RequestException as e:
+        raise GPGError('Failed to receive key {}: {}'.format(
+            fingerprint, repr(e)))
+
+    _check_received_key(fingerprint, response.content)
+
     return stdout_for_subprocess([
         GPG2_SANDBOXED,
-        '--keyserver',
-        settings.KEYSERVER_URL,
-        '--recv-key',
-        fingerprint
-    ])
+        '--import',
+    ], stdin=response.content)
+
+
+def _check_received_key(fingerprint, ascii_keys):
+    """
+    Raise GPGError unless `ascii_keys` holds exactly the key with the given
+    fingerprint. The keys are listed without importing them.
+    """
+
+    list_keys = stdout_for_subprocess([
+        GPG2_SANDBOXED,
+        '--with-colons',
+        '--import-options',
+        'show-only',
+        '--import',
+    ], stdin=ascii_keys)
+
+    try:
+        received = [k['fingerprint'] for k in parse_colon_keys(list_keys)]
+
+    except ValueError as e:
+        raise GPGError('Failed to list received key {}: {}'.format(
+            fingerprint, repr(e)))
+
+    if received != [fingerprint.replace(' ', '').upper()]:
+        raise GPGError('Asked the keyserver for {} but got {}'.format(
+            fingerprint, received))
 
 
 def _encrypt_text(fingerprint, text):
@@ -152,7 +326,21 @@ def save_list_keys_stdout(fingerprint, stdout_text):
         f.write(stdout_text)
 
 
-def stdout_for_subprocess(cmd_parts, stdin=None):
+def stdout_for_subprocess(cmd_parts, stdin=None, timeout=5):
+    stdout = bytes_stdout_for_subprocess(
+        cmd_parts, stdin=stdin, timeout=timeout
+    )
+
+    LOG.debug(stdout.decode('utf-8'))
+
+    return stdout.decode('utf-8')
+
+
+def bytes_stdout_for_subprocess(cmd_parts, stdin=None, timeout=5):
+    """
+    Like stdout_for_subprocess but returns raw bytes, for piping binary output
+    (eg `gpg --export`) into another command. `stdin` may be str or bytes.
+    """
     LOG.info('Running {}'.format(' '.join(cmd_parts)))
     p = subprocess.Popen(
         cmd_parts,
@@ -161,14 +349,14 @@ def stdout_for_subprocess(cmd_parts, stdin=None):
         stderr=subprocess.PIPE
     )
 
+    if isinstance(stdin, str):
+        stdin = stdin.encode('utf-8')
+
     try:
-        if stdin is None:
-            stdout, stderr = p.communicate(timeout=5)
-        else:
-            stdout, stderr = p.communicate(
-                input=stdin.encode('utf-8'),
-                timeout=5
-            )  # closes stdin/stdout
+        stdout, stderr = p.communicate(
+            input=stdin,
+            timeout=timeout
+        )  # closes stdin/stdout
 
     except subprocess.TimeoutExpired as e:
         p.kill()
@@ -186,10 +374,9 @@ def stdout_for_subprocess(cmd_parts, stdin=None):
     if stderr is None:
         stderr = b''
 
-    LOG.debug(stdout.decode('utf-8'))
-    LOG.debug(stderr.decode('utf-8'))
+    LOG.debug(stderr.decode('utf-8', errors='replace'))
 
-    return stdout.decode('utf-8')
+    return stdout
 
 
 def raise_gpg_error(returncode, stdout, stderr):
@@ -220,7 +407,7 @@ def _parse_fingerprint_line(list_keys_output):
             fingerprints.append(match.group('fingerprint'))
 
     assert len(fingerprints) == 1, 'expected 1 fingerprint {}: {}'.format(
-            fingerprints, list_keys_output)
+        fingerprints, list_keys_output)
     return fingerprints[0].replace(' ', '').upper()
 
 
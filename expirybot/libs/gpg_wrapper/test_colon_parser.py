@@ -0,0 +1,136 @@
+import io
+import datetime
+
+from os.path import dirname, join as pjoin
+
+from nose.tools import assert_equal, assert_raises
+from django.test import TestCase
+
+from .colon_parser import parse_colon_key, parse_colon_keys, ColonParseError
+
+
+def load_test_data(filename):
+    with io.open(pjoin(dirname(__file__), 'test_data', filename), 'r') as f:
+        return f.read()
+
+
+def utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+class TestParseColonKey(TestCase):
+    def test_same_result_as_human_readable_parser(self):
+        got = parse_colon_key(load_test_data('list_keys_01_colons.txt'))
+
+        expected_subkeys = [{
+            'long_id': '627B1B4E8E532C34',
+            'algorithm': 'RSA',
+            'capabilities': ['E'],
+            'created_date': datetime.date(2014, 10, 31),
+            'ecc_curve': None,
+            'expiry_date': datetime.date(2018, 5, 15),
+            'length_bits': 4096,
+            'revoked': False
+        }, {
+            'long_id': '0AC6AD63E8E8A9B0',
+            'algorithm': 'RSA',
+            'capabilities': ['S'],
+            'created_date': datetime.date(2014, 10, 31),
+            'ecc_curve': None,
+            'expiry_date': datetime.date(2018, 5, 15),
+            'length_bits': 4096,
+            'revoked': False
+        }]
+
+        expected = {
+            'fingerprint': 'A999B7498D1A8DC473E53C92309F635DAD1B5517',
+            'long_id': '309F635DAD1B5517',
+            'algorithm': 'RSA',
+            "length_bits": 4096,
+            "ecc_curve": None,
+            'created_date': datetime.date(2014, 10, 31),
+            'expiry_date': datetime.date(2018, 5, 15),
+            'revoked': False,
+            'capabilities': ['S', 'C'],
+            'uids': ['Paul Michael Furley <paul@paulfurley.com>'],
+        }
+
+        for key, expected_value in expected.items():
+            assert_equal(expected_value, got[key])
+
+        for expected_subkey, got_subkey in zip(expected_subkeys,
+                                               got['subkeys']):
+            for key, expected_value in expected_subkey.items():
+                assert_equal(expected_value, got_subkey[key])
+
+    def test_extra_fields(self):
+        got = parse_colon_key(load_test_data('list_keys_01_colons.txt'))
+
+        assert_equal(utc(2014, 10, 31, 15, 3, 21), got['created_timestamp'])
+        assert_equal(utc(2018, 5, 15, 9, 12, 44), got['expiry_timestamp'])
+        assert_equal('scESC', got['key_flags'])
+        assert_equal(
+            [{
+                'uid': 'Paul Michael Furley <paul@paulfurley.com>',
+                'validity': 'ultimate'
+            }],
+            got['uid_details']
+        )
+        assert_equal(
+            'D37DF4C0AF34E9B2D8DE45F2627B1B4E8E532C34',
+            got['subkeys'][0]['fingerprint']
+        )
+
+    def test_escaped_uid(self):
+        got = parse_colon_key(
+            load_test_data('list_keys_01_colons.txt').replace(
+                'Paul Michael Furley', 'Paul\\x3a Furley'
+            )
+        )
+
+        assert_equal(['Paul: Furley <paul@paulfurley.com>'], got['uids'])
+
+    def test_more_than_one_key_raises(self):
+        assert_raises(
+            ColonParseError,
+            parse_colon_key, load_test_data('list_keys_batch_colons.txt')
+        )
+
+
+class TestParseColonKeys(TestCase):
+    def test_many_keys(self):
+        got = parse_colon_keys(load_test_data('list_keys_batch_colons.txt'))
+
+        assert_equal(
+            [
+                '5FDFCA89258063B2EB446CFE76027EB8C2DF6381',
+                '02DC30BAE0DF578A672C72EDE31F9BFFE9FA1597',
+            ],
+            [k['fingerprint'] for k in got]
+        )
+
+    def test_unusable_uids_are_skipped(self):
+        alice, dave = parse_colon_keys(
+            load_test_data('list_keys_batch_colons.txt')
+        )
+
+        assert_equal(
+            [
+                'Alice Old (work) <alice.old@example.org>',
+                'Alice Example <alice@example.com>',
+            ],
+            alice['uids']
+        )
+        assert_equal('revoked', alice['uid_details'][2]['validity'])
+        assert_equal([], dave['uids'])
+
+    def test_revoked_ecc_key(self):
+        _, dave = parse_colon_keys(
+            load_test_data('list_keys_batch_colons.txt')
+        )
+
+        assert_equal('ECC', dave['algorithm'])
+        assert_equal('nistp256', dave['ecc_curve'])
+        assert_equal(None, dave['length_bits'])
+        assert_equal(True, dave['revoked'])
+        assert_equal(None, dave['expiry_date'])
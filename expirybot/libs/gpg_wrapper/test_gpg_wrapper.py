@@ -2,11 +2,20 @@ import io
 import datetime
 
 from os.path import dirname, join as pjoin
+from unittest.mock import Mock, patch
 
-from nose.tools import assert_equal
+from nose.tools import assert_equal, assert_raises, assert_true
 from django.test import TestCase
 
-from .gpg_wrapper import parse_pub_or_sub_line, parse_list_keys
+from .gpg_wrapper import (
+    parse_pub_or_sub_line, parse_list_keys, parse_public_keys,
+    split_list_packets, _receive_key, GPGError, GPGFatalProblemWithKey
+)
+
+
+def load_test_data(filename):
+    with io.open(pjoin(dirname(__file__), 'test_data', filename), 'r') as f:
+        return f.read()
 
 
 def assert_no_raise(func):
@@ -171,7 +180,7 @@ class TestParseListKeys(TestCase):
             "length_bits": 4096,
             "ecc_curve": None,
             'created_date': datetime.date(2014, 10, 31),
-            'expiry_date':  datetime.date(2018, 5, 15),
+            'expiry_date': datetime.date(2018, 5, 15),
             'revoked': False,
             'capabilities': ['S', 'C'],
             'uids': ['Paul Michael Furley <paul@paulfurley.com>'],
@@ -182,3 +191,78 @@ class TestParseListKeys(TestCase):
 
         for key, expected_value in expected.items():
             assert_equal(expected_value, got[key])
+
+
+class TestParsePublicKeys(TestCase):
+    ALICE = '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+    BOB = '80C37EBEE5D8E2728525FD3B66A4ACA6E78775A2'  # no valid user IDs
+    DAVE = '02DC30BAE0DF578A672C72EDE31F9BFFE9FA1597'
+
+    def test_split_list_packets(self):
+        got = split_list_packets(load_test_data('list_packets_batch.txt'))
+
+        assert_equal(
+            set(['76027EB8C2DF6381', 'E31F9BFFE9FA1597']),
+            set(got.keys())
+        )
+        assert_true(':public sub key packet:' in got['76027EB8C2DF6381'])
+        assert_true(':public sub key packet:' not in got['E31F9BFFE9FA1597'])
+
+    @patch('expirybot.libs.gpg_wrapper.gpg_wrapper.run_dump_keys')
+    def test_one_bad_key_does_not_fail_the_batch(self, run_dump_keys):
+        run_dump_keys.return_value = (
+            load_test_data('list_keys_batch_colons.txt'),
+            load_test_data('list_packets_batch.txt'),
+        )
+
+        got = parse_public_keys({
+            self.ALICE: b'alice',
+            self.BOB: b'bob',
+            self.DAVE.lower(): b'dave',
+        })
+
+        assert_equal(self.ALICE, got[self.ALICE]['fingerprint'])
+        assert_equal([9, 8, 7, 2], got[self.ALICE]['cipher_preferences'])
+        assert_equal(True, got[self.DAVE.lower()]['revoked'])
+        assert_true(isinstance(got[self.BOB], GPGFatalProblemWithKey))
+
+
+@patch('expirybot.libs.gpg_wrapper.gpg_wrapper.get_keyserver_client')
+@patch('expirybot.libs.gpg_wrapper.gpg_wrapper.stdout_for_subprocess')
+class TestReceiveKey(TestCase):
+    FINGERPRINT = 'A999B7498D1A8DC473E53C92309F635DAD1B5517'
+
+    def _receive(self, stdout_for_subprocess, get_keyserver_client,
+                 fingerprint):
+        get_keyserver_client.return_value.get_key.return_value = Mock(
+            content=b'-----BEGIN PGP PUBLIC KEY BLOCK-----'
+        )
+        stdout_for_subprocess.return_value = load_test_data(
+            'list_keys_01_colons.txt'
+        )
+
+        _receive_key(fingerprint)
+
+    def _imported(self, stdout_for_subprocess):
+        return [
+            call for call in stdout_for_subprocess.call_args_list
+            if call[0][0][1:] == ['--import']
+        ]
+
+    def test_requested_key_is_imported(self, stdout_for_subprocess,
+                                       get_keyserver_client):
+        self._receive(
+            stdout_for_subprocess, get_keyserver_client, self.FINGERPRINT
+        )
+
+        assert_equal(1, len(self._imported(stdout_for_subprocess)))
+
+    def test_different_key_is_not_imported(self, stdout_for_subprocess,
+                                           get_keyserver_client):
+        with assert_raises(GPGError):
+            self._receive(
+                stdout_for_subprocess, get_keyserver_client,
+                '5FDFCA89258063B2EB446CFE76027EB8C2DF6381'
+            )
+
+        assert_equal([], self._imported(stdout_for_subprocess))
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+
+from os.path import isdir, join as pjoin
+from unittest.mock import patch
+
+from nose.tools import assert_equal, assert_raises
+from django.test import TestCase
+
+from .gpg_wrapper import GPGError, GPGFatalProblemWithKey
+from .worker_pool import GPGWorkerPool, remove_stale_slot_dirs
+
+
+class FakeSlot():
+    def __init__(self):
+        self.gnupghome = '/tmp/fake-gnupghome'
+        self.jobs_run = 0
+        self.destroyed = False
+
+    def dump_key(self, pgp_key_filename):
+        self.jobs_run += 1
+
+        if pgp_key_filename == 'broken-key':
+            raise GPGFatalProblemWithKey('no valid user IDs')
+
+        elif pgp_key_filename == 'gpg-crashed':
+            raise GPGError('gpg crashed')
+
+        return ('list-keys', 'list-packets')
+
+    def destroy(self):
+        self.destroyed = True
+
+
+@patch('expirybot.libs.gpg_wrapper.worker_pool.GPGWorkerSlot', FakeSlot)
+class TestGPGWorkerPool(TestCase):
+    def test_slot_is_reused(self):
+        pool = GPGWorkerPool(size=2)
+
+        for _ in range(3):
+            pool.dump_key('good-key')
+
+        assert_equal(
+            {'jobs': 3, 'reused': 2, 'slots_created': 1},
+            pool.stats
+        )
+
+    def test_problem_with_key_does_not_recycle_slot(self):
+        pool = GPGWorkerPool(size=1)
+
+        assert_raises(GPGFatalProblemWithKey, pool.dump_key, 'broken-key')
+        pool.dump_key('good-key')
+
+        assert_equal(1, pool.stats['slots_created'])
+        assert_equal(1, pool.stats['key_failures'])
+
+    def test_gpg_error_recycles_slot(self):
+        pool = GPGWorkerPool(size=1)
+
+        assert_raises(GPGError, pool.dump_key, 'gpg-crashed')
+        pool.dump_key('good-key')
+
+        assert_equal(2, pool.stats['slots_created'])
+        assert_equal(1, pool.stats['slots_recycled'])
+        assert_equal(1, pool.stats['gpg_failures'])
+
+    def test_slot_is_recycled_after_max_jobs(self):
+        pool = GPGWorkerPool(size=1, max_jobs_per_slot=2)
+
+        for _ in range(5):
+            pool.dump_key('good-key')
+
+        assert_equal(3, pool.stats['slots_created'])
+        assert_equal(2, pool.stats['slots_recycled'])
+
+
+class TestRemoveStaleSlotDirs(TestCase):
+    def setUp(self):
+        self.scratch_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.scratch_dir)
+
+    def test_only_removes_dirs_of_dead_processes(self):
+        dead = pjoin(self.scratch_dir, 'gpg_worker_slot.999999999.abc')
+        alive = pjoin(self.scratch_dir, 'gpg_worker_slot.{}.abc'.format(
+            os.getpid()))
+        unrelated = pjoin(self.scratch_dir, 'something_else.999999999.abc')
+
+        for directory in (dead, alive, unrelated):
+            os.mkdir(directory)
+
+        with patch('expirybot.libs.gpg_wrapper.worker_pool.scratch_dir',
+                   lambda: self.scratch_dir):
+            remove_stale_slot_dirs()
+
+        assert_equal(
+            [False, True, True],
+            [isdir(d) for d in (dead, alive, unrelated)]
+        )
@@ -0,0 +1,330 @@
+"""
+A pool of long-lived gpg worker slots.
+
+Each slot owns a GNUPGHOME which is built once from skel/ and reused for many
+keys: between jobs only the imported keyring files are wiped. gpg is run with
+`--no-autostart` so no gpg-agent is ever started (or needs killing).
+
+Compare with script/dump_key, which runs mkdir, cp, chmod and mktemp for
+every single key.
+
+Slot directories live in /dev/shm where available, so importing a key never
+touches the disk. They're named after the owning process so that any left
+behind by a killed process are removed when the next pool starts.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+
+from collections import Counter
+from os.path import abspath, dirname, join as pjoin
+
+from django.conf import settings
+
+from .gpg_wrapper import (
+    GPGFatalProblemWithKey, bytes_stdout_for_subprocess
+)
+
+LOG = logging.getLogger(__name__)
+
+GPG2 = '/usr/bin/gpg2'
+SKEL_DIR = abspath(pjoin(dirname(__file__), 'skel'))
+
+SLOT_PREFIX = 'gpg_worker_slot.'
+SLOT_PATTERN = re.compile(r'^gpg_worker_slot\.(?P<pid>\d+)\.')
+
+# Files which gpg creates when keys are imported. Deleting them wipes the
+# keyring without touching the rest of the GNUPGHOME.
+KEYRING_FILES = (
+    'pubring.kbx',
+    'pubring.kbx~',
+    'pubring.gpg',
+    'pubring.gpg~',
+    'trustdb.gpg',
+)
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+class GPGWorkerSlot():
+    def __init__(self):
+        self.gnupghome = tempfile.mkdtemp(
+            prefix='{}{}.'.format(SLOT_PREFIX, os.getpid()),
+            dir=scratch_dir()
+        )
+        self.jobs_run = 0
+
+        for filename in os.listdir(SKEL_DIR):
+            shutil.copy(pjoin(SKEL_DIR, filename), self.gnupghome)
+
+        os.chmod(self.gnupghome, 0o700)
+
+    def dump_key(self, pgp_key_filename):
+        """
+        Return the (list_keys, list_packets) output for the key in the given
+        file, like script/dump_key.
+        """
+        return self._dump(['--fast-import', pgp_key_filename])
+
+    def dump_keys(self, keys_binary, timeout=5):
+        """
+        Like `dump_key` for (possibly many) keys given as bytes.
+        """
+        return self._dump(['--fast-import'], stdin=keys_binary,
+                          timeout=timeout)
+
+    def _dump(self, import_args, stdin=None, timeout=5):
+        self.jobs_run += 1
+
+        try:
+            self._gpg(*import_args, stdin=stdin, timeout=timeout)
+
+            list_keys = self._gpg(
+                '--list-keys', '--with-colons', '--with-subkey-fingerprint',
+                timeout=timeout
+            )
+
+            exported = self._gpg(
+                '--export-options', 'export-minimal', '--export',
+                timeout=timeout
+            )
+
+            if exported:
+                list_packets = self._gpg(
+                    '--list-packets', stdin=exported, timeout=timeout
+                )
+
+            else:  # gpg rejected every key, eg no valid user IDs
+                list_packets = b''
+
+        finally:
+            self.wipe_keys()
+
+        return list_keys.decode('utf-8'), list_packets.decode('utf-8')
+
+    def wipe_keys(self):
+        for filename in KEYRING_FILES:
+            try:
+                os.remove(pjoin(self.gnupghome, filename))
+            except FileNotFoundError:
+                pass
+
+    def destroy(self):
+        shutil.rmtree(self.gnupghome, ignore_errors=True)
+
+    def _gpg(self, *args, stdin=None, timeout=5):
+        return bytes_stdout_for_subprocess(
+            [
+                GPG2,
+                '--homedir', self.gnupghome,
+                '--batch',
+                '--no-tty',
+                '--no-autostart',
+            ] + list(args),
+            stdin=stdin,
+            timeout=timeout
+        )
+
+
+class GPGWorkerPool():
+    """
+    Hand out up to `size` GPGWorkerSlots to concurrent callers, creating them
+    lazily. A slot is recycled (destroyed & rebuilt) after a gpg error or
+    after `max_jobs_per_slot` jobs.
+    """
+
+    def __init__(self, size, max_jobs_per_slot=1000):
+        assert size > 0, 'GPGWorkerPool size must be at least 1'
+
+        remove_stale_slot_dirs()
+
+        self.size = size
+        self.max_jobs_per_slot = max_jobs_per_slot
+
+        self._idle_slots = queue.LifoQueue()  # LIFO: reuse the warmest slot
+        self._all_slots = set()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    @property
+    def stats(self):
+        """
+        - jobs:            keys (or batches of keys) dumped
+        - reused:          jobs run in an already-used slot
+        - key_failures:    jobs which failed because of a problem with the key
+        - gpg_failures:    jobs which failed for any other reason
+        - slots_created:   GNUPGHOMEs built from skel/
+        - slots_recycled:  slots destroyed after an error or max_jobs_per_slot
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def dump_key(self, pgp_key_filename):
+        return self._run_in_slot(lambda slot: slot.dump_key(pgp_key_filename))
+
+    def dump_keys(self, keys_binary, timeout=5):
+        return self._run_in_slot(
+            lambda slot: slot.dump_keys(keys_binary, timeout=timeout)
+        )
+
+    def _run_in_slot(self, func):
+        slot = self._acquire_slot()
+
+        try:
+            result = func(slot)
+
+        except GPGFatalProblemWithKey:
+            self._count('key_failures')
+            self._release_slot(slot)
+            raise
+
+        except Exception:
+            self._count('gpg_failures')
+            self._recycle_slot(slot)
+            raise
+
+        else:
+            self._release_slot(slot)
+            return result
+
+    def close(self):
+        with self._lock:
+            slots, self._all_slots = self._all_slots, set()
+
+        for slot in slots:
+            slot.destroy()
+
+    def _acquire_slot(self):
+        try:
+            slot = self._idle_slots.get_nowait()
+
+        except queue.Empty:
+            slot = self._create_slot_if_below_size()
+
+            if slot is None:
+                slot = self._idle_slots.get()  # block until one is free
+
+        self._count('jobs')
+        if slot.jobs_run:
+            self._count('reused')
+
+        return slot
+
+    def _create_slot_if_below_size(self):
+        with self._lock:
+            if len(self._all_slots) >= self.size:
+                return None
+
+            slot = GPGWorkerSlot()
+            self._all_slots.add(slot)
+            self._stats['slots_created'] += 1
+
+        LOG.info('Created gpg worker slot {}'.format(slot.gnupghome))
+        return slot
+
+    def _release_slot(self, slot):
+        if slot.jobs_run >= self.max_jobs_per_slot:
+            self._recycle_slot(slot)
+        else:
+            self._idle_slots.put(slot)
+
+    def _recycle_slot(self, slot):
+        LOG.info('Recycling gpg worker slot {} after {} jobs'.format(
+            slot.gnupghome, slot.jobs_run))
+
+        with self._lock:
+            self._all_slots.discard(slot)
+            self._stats['slots_recycled'] += 1
+
+        slot.destroy()
+
+        # Wake up anyone blocked in _acquire_slot: they can now create a slot
+        replacement = self._create_slot_if_below_size()
+        if replacement is not None:
+            self._idle_slots.put(replacement)
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+
+def scratch_dir():
+    """
+    Prefer /dev/shm (memory-backed) for slot GNUPGHOMEs, otherwise use the
+    default temp directory.
+    """
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+
+    return tempfile.gettempdir()
+
+
+def remove_stale_slot_dirs():
+    """
+    Delete slot directories whose owning process is no longer running, eg
+    after it was killed by `timeout` before atexit handlers could run.
+    """
+    directory = scratch_dir()
+
+    for filename in os.listdir(directory):
+        match = SLOT_PATTERN.match(filename)
+
+        if match is None or _process_is_running(int(match.group('pid'))):
+            continue
+
+        LOG.info('Removing stale gpg worker slot {}'.format(filename))
+        shutil.rmtree(pjoin(directory, filename), ignore_errors=True)
+
+
+def _process_is_running(pid):
+    try:
+        os.kill(pid, 0)
+
+    except ProcessLookupError:
+        return False
+
+    except PermissionError:
+        return True  # belongs to another user
+
+    return True
+
+
+def get_worker_pool():
+    """
+    Return this process's GPGWorkerPool, or None if it's disabled with
+    `settings.GPG_WORKER_POOL_SIZE = 0`.
+    """
+    global _POOL
+
+    with _POOL_LOCK:
+        if _POOL is None and settings.GPG_WORKER_POOL_SIZE > 0:
+            _POOL = GPGWorkerPool(settings.GPG_WORKER_POOL_SIZE)
+            atexit.register(_POOL.close)
+
+        return _POOL
+
+
+def configure_worker_pool(size):
+    """
+    Replace this process's pool with one of the given size, eg to match the
+    number of worker threads in `manage.py sync_keys --workers N`.
+    """
+    global _POOL
+
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+
+        _POOL = GPGWorkerPool(size) if size > 0 else None
+
+        if _POOL is not None:
+            atexit.register(_POOL.close)
+
+        return _POOL
@@ -0,0 +1 @@
+from .keyserver_client import KeyserverClient, get_keyserver_client
@@ -0,0 +1,164 @@
+"""
+One HTTP client for all keyserver requests.
+
+A single requests.Session per process keeps connections to the keyserver
+alive and pooled, rather than opening a new TCP connection for every key or
+email lookup. Connection errors, timeouts and 5xx responses are retried with
+jittered exponential backoff, and each endpoint (`op=get`, `op=vindex`) has
+its own timeout.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from collections import Counter, defaultdict
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+LOG = logging.getLogger(__name__)
+
+ENDPOINT_TIMEOUTS = {
+    'get': 5,
+    'index': 30,
+    'vindex': 30,
+}
+
+DEFAULT_TIMEOUT = 10
+
+RETRY_STATUS_CODES = frozenset([500, 502, 503, 504])
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+class KeyserverClient():
+    def __init__(self, base_url, max_retries=2, backoff_seconds=0.5,
+                 max_concurrent_requests=4, timeouts=None):
+
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeouts = dict(ENDPOINT_TIMEOUTS, **(timeouts or {}))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_concurrent_requests,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+        self._stats = defaultdict(Counter)
+        self._stats_lock = threading.Lock()
+
+    @property
+    def stats(self):
+        """
+        For each endpoint:
+
+        - requests: HTTP requests made, including retries
+        - retries:  requests which were a retry
+        - failures: requests which raised or got a 5xx response
+        - seconds:  total time spent waiting for responses
+        """
+        with self._stats_lock:
+            return {op: dict(counter) for op, counter in self._stats.items()}
+
+    def get_key(self, search):
+        """
+        Return the `requests.Response` for the ASCII-armored key(s) matching
+        `search`, eg `0x309F635DAD1B5517`.
+        """
+        return self.lookup('get', search, options='mr')
+
+    def vindex(self, search, **params):
+        return self.lookup('vindex', search, **params)
+
+    def lookup(self, op, search, **params):
+        """
+        GET /pks/lookup, retrying connection errors, timeouts and 5xx
+        responses. Return the final `requests.Response`, whatever its status
+        code: callers decide what eg a 404 means.
+        """
+
+        url = '{}/pks/lookup'.format(self.base_url)
+        params = dict(params, op=op, search=search)
+        timeout = self.timeouts.get(op, DEFAULT_TIMEOUT)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count(op, 'retries')
+                time.sleep(self._backoff(attempt))
+
+            started = time.monotonic()
+
+            try:
+                with self._semaphore:
+                    response = self.session.get(
+                        url, params=params, timeout=timeout
+                    )
+
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_request(op, started, failed=True)
+
+                if attempt == self.max_retries:
+                    raise
+
+                LOG.warning('Keyserver {} {} failed, retrying: {}'.format(
+                    op, search, repr(e)))
+                continue
+
+            failed = response.status_code in RETRY_STATUS_CODES
+            self._record_request(op, started, failed=failed)
+
+            if failed and attempt < self.max_retries:
+                LOG.warning('Keyserver {} {} got HTTP {}, retrying'.format(
+                    op, search, response.status_code))
+                continue
+
+            return response
+
+    def _backoff(self, attempt):
+        """
+        "Full jitter": a random delay up to an exponentially growing cap, so
+        concurrent workers don't retry in lockstep.
+        """
+        return random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1))
+
+    def _record_request(self, op, started, failed):
+        with self._stats_lock:
+            self._stats[op]['requests'] += 1
+            self._stats[op]['seconds'] += time.monotonic() - started
+
+            if failed:
+                self._stats[op]['failures'] += 1
+
+    def _count(self, op, stat):
+        with self._stats_lock:
+            self._stats[op][stat] += 1
+
+
+def get_keyserver_client():
+    """
+    Return this process's KeyserverClient for `settings.KEYSERVER_URL`.
+    """
+    global _CLIENT
+
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = KeyserverClient(
+                settings.KEYSERVER_URL,
+                max_retries=settings.KEYSERVER_MAX_RETRIES,
+                max_concurrent_requests=(
+                    settings.KEYSERVER_MAX_CONCURRENT_REQUESTS
+                ),
+            )
+
+        return _CLIENT
@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from nose.tools import assert_equal, assert_raises
+from django.test import TestCase
+
+from .keyserver_client import KeyserverClient
+
+
+def make_response(status_code):
+    response = MagicMock()
+    response.status_code = status_code
+    return response
+
+
+def make_client(**kwargs):
+    client = KeyserverClient(
+        'http://keyserver.example.com', backoff_seconds=0, **kwargs
+    )
+    client.session = MagicMock()
+    return client
+
+
+class TestKeyserverClient(TestCase):
+    def test_get_key_request(self):
+        client = make_client()
+        client.session.get.return_value = make_response(200)
+
+        client.get_key('0x309F635DAD1B5517')
+
+        client.session.get.assert_called_once_with(
+            'http://keyserver.example.com/pks/lookup',
+            params={
+                'op': 'get',
+                'options': 'mr',
+                'search': '0x309F635DAD1B5517',
+            },
+            timeout=5
+        )
+
+    def test_404_is_returned_not_retried(self):
+        client = make_client()
+        client.session.get.return_value = make_response(404)
+
+        response = client.get_key('0x309F635DAD1B5517')
+
+        assert_equal(404, response.status_code)
+        assert_equal(1, client.session.get.call_count)
+
+    def test_5xx_is_retried(self):
+        client = make_client(max_retries=2)
+        client.session.get.side_effect = [
+            make_response(503), make_response(200)
+        ]
+
+        response = client.vindex('paul@example.com', option='json')
+
+        assert_equal(200, response.status_code)
+        assert_equal(
+            {'requests': 2, 'retries': 1, 'failures': 1},
+            {k: v for k, v in client.stats['vindex'].items()
+             if k != 'seconds'}
+        )
+
+    def test_last_5xx_response_is_returned(self):
+        client = make_client(max_retries=1)
+        client.session.get.return_value = make_response(502)
+
+        response = client.get_key('0x309F635DAD1B5517')
+
+        assert_equal(502, response.status_code)
+        assert_equal(2, client.session.get.call_count)
+
+    def test_connection_error_raised_after_retries(self):
+        client = make_client(max_retries=2)
+        client.session.get.side_effect = requests.ConnectionError
+
+        with patch('time.sleep'):
+            assert_raises(
+                requests.ConnectionError,
+                client.get_key, '0x309F635DAD1B5517'
+            )
+
+        assert_equal(3, client.session.get.call_count)
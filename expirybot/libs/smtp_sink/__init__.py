@@ -0,0 +1 @@
+from .smtp_sink import SMTPSink
@@ -0,0 +1,160 @@
+"""
+A minimal SMTP server which accepts every message and sends it nowhere, for
+tests and benchmarks of code which sends email. It runs in a background
+thread:
+
+    with SMTPSink() as sink:
+        # send to sink.host, sink.port
+        ...
+
+    sink.messages, sink.num_connections
+"""
+
+import logging
+import socketserver
+import threading
+
+from collections import namedtuple
+
+LOG = logging.getLogger(__name__)
+
+Message = namedtuple('Message', 'mail_from,rcpt_tos,data')
+
+
+class SMTPSink():
+    def __init__(self, host='127.0.0.1', port=0, keep_messages=True):
+        """
+        - `port` 0 picks a free port
+        - `keep_messages` False just counts them, eg for benchmarks
+        """
+        self._address = (host, port)
+        self._keep_messages = keep_messages
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        self.messages = []
+        self.num_messages = 0
+        self.num_connections = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._server = _Server(self._address, _Handler)
+        self._server.sink = self
+
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _record_connection(self):
+        with self._lock:
+            self.num_connections += 1
+
+    def _record_message(self, mail_from, rcpt_tos, data):
+        with self._lock:
+            self.num_messages += 1
+
+            if self._keep_messages:
+                self.messages.append(Message(mail_from, rcpt_tos, data))
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        sink = self.server.sink
+        sink._record_connection()
+
+        mail_from, rcpt_tos = None, []
+        self._reply('220 smtp-sink ready')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'HELO':
+                self._reply('250 smtp-sink')
+
+            elif verb == 'EHLO':
+                self._reply('250-smtp-sink', '250 8BITMIME')
+
+            elif verb == 'MAIL':
+                mail_from = _parse_address(command)
+                self._reply('250 OK')
+
+            elif verb == 'RCPT':
+                rcpt_tos.append(_parse_address(command))
+                self._reply('250 OK')
+
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                sink._record_message(mail_from, rcpt_tos, self._read_data())
+                mail_from, rcpt_tos = None, []
+                self._reply('250 OK')
+
+            elif verb == 'RSET':
+                mail_from, rcpt_tos = None, []
+                self._reply('250 OK')
+
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+
+            else:
+                self._reply('502 Command not implemented')
+
+    def _read_data(self):
+        lines = []
+
+        for line in self.rfile:
+            if line in (b'.\r\n', b'.\n'):
+                break
+
+            if line.startswith(b'..'):  # dot-stuffing, RFC 5321 4.5.2
+                line = line[1:]
+
+            lines.append(line)
+
+        return b''.join(lines)
+
+    def _reply(self, *lines):
+        self.wfile.write(
+            ''.join(line + '\r\n' for line in lines).encode('ascii')
+        )
+
+
+def _parse_address(command):
+    """
+    'MAIL FROM:<bot@example.com> SIZE=123' -> 'bot@example.com'
+    """
+    address = command.split(':', 1)[-1].strip().split(' ')[0]
+    return address.strip('<>')
@@ -0,0 +1,35 @@
+import smtplib
+
+from nose.tools import assert_equal
+
+from .smtp_sink import SMTPSink
+
+
+def test_receives_messages_over_one_connection():
+    with SMTPSink() as sink:
+        client = smtplib.SMTP(sink.host, sink.port)
+
+        for i in range(3):
+            client.sendmail(
+                'bot@example.com',
+                ['paul@example.com'],
+                'Subject: {}\r\n\r\n.hello\r\n'.format(i)
+            )
+
+        client.quit()
+
+    assert_equal(1, sink.num_connections)
+    assert_equal(3, sink.num_messages)
+    assert_equal('bot@example.com', sink.messages[0].mail_from)
+    assert_equal(['paul@example.com'], sink.messages[0].rcpt_tos)
+    assert_equal(b'Subject: 0\r\n\r\n.hello\r\n', sink.messages[0].data)
+
+
+def test_keep_messages_false_only_counts():
+    with SMTPSink(keep_messages=False) as sink:
+        client = smtplib.SMTP(sink.host, sink.port)
+        client.sendmail('bot@example.com', ['paul@example.com'], 'hello')
+        client.quit()
+
+    assert_equal(1, sink.num_messages)
+    assert_equal([], sink.messages)
@@ -132,16 +132,20 @@ LOGGING = {
 
 AUTH_PASSWORD_VALIDATORS = [
     {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+        'NAME': ('django.contrib.auth.password_validation.'
+                 'UserAttributeSimilarityValidator'),
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+        'NAME': ('django.contrib.auth.password_validation.'
+                 'MinimumLengthValidator'),
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': ('django.contrib.auth.password_validation.'
+                 'CommonPasswordValidator'),
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+        'NAME': ('django.contrib.auth.password_validation.'
+                 'NumericPasswordValidator'),
     },
 ]
 
@@ -209,3 +213,88 @@ KEYSERVER_URL = os.environ.get(
     'KEYSERVER_URL',
     'http://pool.sks-keyservers.net:11371'
 )
+
+
+# Number of reusable gpg home directories per process used when parsing keys
+# with gpg (see expirybot.libs.gpg_wrapper.worker_pool). 0 disables the pool
+# and falls back to building a fresh GNUPGHOME for every key.
+
+GPG_WORKER_POOL_SIZE = int(os.environ.get('GPG_WORKER_POOL_SIZE', '2'))
+
+# Parsed keys are cached by the digest of the ASCII-armored key (see
+# expirybot.apps.keys.helpers.parse_cache): this many in each process, and
+# this many rows in the database.
+
+PARSE_CACHE_LRU_SIZE = int(os.environ.get('PARSE_CACHE_LRU_SIZE', '1000'))
+PARSE_CACHE_MAX_ROWS = int(os.environ.get('PARSE_CACHE_MAX_ROWS', '100000'))
+
+# `manage.py sync_keys --workers` default.
+
+SYNC_KEYS_WORKERS = int(os.environ.get('SYNC_KEYS_WORKERS', '1'))
+
+# Threads per web process for re-syncing stale keys in the background, see
+# expirybot.apps.keys.helpers.background_refresh
+
+BACKGROUND_REFRESH_WORKERS = int(
+    os.environ.get('BACKGROUND_REFRESH_WORKERS', '2')
+)
+
+# `manage.py sync_keys --time-budget` default. script/sync_keys kills the run
+# after 4.5 minutes, so stop starting new work a little before that.
+
+SYNC_KEYS_TIME_BUDGET_SECONDS = int(
+    os.environ.get('SYNC_KEYS_TIME_BUDGET_SECONDS', '240')
+)
+
+# See expirybot.libs.keyserver_client: the most requests in flight at once
+# per process (eg across sync_keys workers) and how many times to retry.
+
+KEYSERVER_MAX_CONCURRENT_REQUESTS = int(
+    os.environ.get('KEYSERVER_MAX_CONCURRENT_REQUESTS', '4')
+)
+
+KEYSERVER_MAX_RETRIES = int(os.environ.get('KEYSERVER_MAX_RETRIES', '2'))
+
+# Rendered key fragments and static pages are cached (see
+# expirybot.apps.keys.helpers.fragment_cache and expirybot.views). Set
+# CACHE_DIR to share the cache between processes on a host, otherwise each
+# process has its own in memory.
+#
+# The cache also holds the version of the blacklisted domains (see
+# expirybot.apps.blacklist.domain_cache). Without a shared cache, a domain
+# blacklisted in one process (eg the admin) takes up to a minute to be seen
+# by the others.
+
+CACHE_DIR = os.environ.get('CACHE_DIR')
+
+if CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 1000},
+        }
+    }
+
+KEY_FRAGMENT_CACHE_SECONDS = int(
+    os.environ.get('KEY_FRAGMENT_CACHE_SECONDS', str(7 * 24 * 3600))
+)
+
+STATIC_PAGE_CACHE_SECONDS = int(
+    os.environ.get('STATIC_PAGE_CACHE_SECONDS', str(24 * 3600))
+)
+
+# `manage.py send_expiry_reminders`: remind key owners this many days before
+# their key expires, eg "30,7,1".
+
+EXPIRY_REMINDER_DAYS = [
+    int(days) for days in
+    os.environ.get('EXPIRY_REMINDER_DAYS', '30,7,1').split(',')
+]
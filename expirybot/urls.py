@@ -20,16 +20,18 @@ from django.conf.urls import url, include
 from django.contrib import admin
 from django.views.generic import TemplateView
 
+from .views import StaticPageView
+
 
 urlpatterns = [
     url(
         r'^$',
-        TemplateView.as_view(template_name='expirybot/index.html')
+        StaticPageView.as_view(template_name='expirybot/index.html')
     ),
 
     url(
         r'^fixmycrypto/$',
-        TemplateView.as_view(template_name='expirybot/fixmycrypto.html')
+        StaticPageView.as_view(template_name='expirybot/fixmycrypto.html')
     ),
 
     url(r'^admin/', admin.site.urls),
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_page
+from django.views.generic import TemplateView
+
+
+class StaticPageView(TemplateView):
+    """
+    A page which is the same for every anonymous visitor, eg the home page.
+    Anonymous visitors are served it from the cache, and browsers & proxies
+    may keep it for STATIC_PAGE_CACHE_SECONDS. Logged-in users see their
+    email address in the navbar, so they get a freshly rendered, private page.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_anonymous():
+            return cache_page(
+                settings.STATIC_PAGE_CACHE_SECONDS, key_prefix='static-page'
+            )(super(StaticPageView, self).dispatch)(request, *args, **kwargs)
+
+        response = super(StaticPageView, self).dispatch(
+            request, *args, **kwargs
+        )
+        patch_cache_control(response, private=True)
+        return response